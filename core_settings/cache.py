@@ -0,0 +1,70 @@
+"""
+Cached SiteSettings singleton.
+
+get_site_settings() is called on the homepage, in every reservation form
+clean and by the dashboard password check on every dashboard request, so
+the row is kept per process and only re-read when it changed:
+
+- saving or deleting SiteSettings (dashboard, admin) bumps a version key in
+  the shared cache once the transaction commits;
+- each process keeps (version, settings) and compares versions on every
+  call, which is a cache read, never a query.
+
+The first call after a change (in each process) loads the row, creating it
+with the model defaults if it does not exist yet.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+
+from django.db import transaction
+
+from mingdyn import cacheversion
+
+from .models import SiteSettings
+
+VERSION_KEY = "core_settings:site_settings:version"
+
+_local: tuple[int, SiteSettings] | None = None
+_lock = threading.Lock()
+
+
+def current_version() -> int:
+    return cacheversion.current(VERSION_KEY)
+
+
+def _bump_version() -> None:
+    global _local
+    _local = None
+    cacheversion.bump(VERSION_KEY)
+
+
+def invalidate() -> None:
+    """
+    Drop the cached settings once the current transaction commits (so no
+    process re-caches the pre-commit row).
+    """
+    transaction.on_commit(_bump_version)
+
+
+def get_site_settings() -> SiteSettings:
+    """
+    The SiteSettings row (pk=1). Returns a copy, so callers may change it
+    without touching the cached instance; save changes through a freshly
+    loaded row (or a form), as before.
+    """
+    global _local
+    # read the version before the row: a change in between is caught next call
+    version = current_version()
+    cached = _local
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _local
+            if cached is None or cached[0] != version:
+                site_settings, created = SiteSettings.objects.get_or_create(pk=1)
+                if created:
+                    # field defaults are strings ("12:00") until read back
+                    site_settings.refresh_from_db()
+                cached = _local = (version, site_settings)
+    return copy.copy(cached[1])
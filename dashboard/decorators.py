@@ -1,17 +1,31 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.shortcuts import redirect
 from django.urls import reverse
-from core_settings.models import SiteSettings
+from core_settings.cache import get_site_settings
 
-def dashboard_password_required(view_func):
-    def _wrapped_view(request, *args, **kwargs):
-        site_settings, _ = SiteSettings.objects.get_or_create(pk=1)
+def _access_granted(request):
+    site_settings = get_site_settings()
+
+    is_granted = request.session.get("dashboard_access_granted")
+    session_version = request.session.get("dashboard_password_version")
 
-        is_granted = request.session.get("dashboard_access_granted")
-        session_version = request.session.get("dashboard_password_version")
+    if not is_granted or session_version != site_settings.dashboard_password_version:
+        request.session.flush()
+        return False
+    return True
 
-        if not is_granted or session_version != site_settings.dashboard_password_version:
-            request.session.flush()
+def dashboard_password_required(view_func):
+    if iscoroutinefunction(view_func):
+        # async views (the live event stream): check access off the event loop
+        async def _wrapped_async_view(request, *args, **kwargs):
+            if not await sync_to_async(_access_granted)(request):
+                return redirect(reverse("dashboard:password_login"))
+            return await view_func(request, *args, **kwargs)
+        return _wrapped_async_view
+
+    def _wrapped_view(request, *args, **kwargs):
+        if not _access_granted(request):
             return redirect(reverse("dashboard:password_login"))
 
         return view_func(request, *args, **kwargs)
-    return _wrapped_view
\ No newline at end of file
+    return _wrapped_view
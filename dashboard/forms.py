@@ -2,7 +2,6 @@ from datetime import date
 
 from django import forms
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
 from django.forms import inlineformset_factory
 
 from reservations.models import (
@@ -12,6 +11,7 @@ from reservations.models import (
     ReservationModel,
 )
 from core_settings.models import SiteSettings
+from reservations import occupancy
 
 
 class TimeSlotForm(forms.ModelForm):
@@ -38,6 +38,11 @@ class TimeSlotForm(forms.ModelForm):
 
 
 class BlockedDayForm(forms.ModelForm):
+    notify_guests = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-checkbox"}),
+    )
+
     class Meta:
         model = BlockedDayModel
         fields = [
@@ -128,6 +133,9 @@ class ReservationForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # what the edited reservation currently contributes to the ledger
+        self._ledger_before = occupancy.ledger_state(self.instance) if self.instance.pk else None
+
         self.fields["time"].input_formats = ["%H:%M"]
         self.fields["date"].input_formats = ["%Y-%m-%d"]
 
@@ -185,18 +193,12 @@ class ReservationForm(forms.ModelForm):
             blocked_seats = slot_block.blocked_seats or 0
             allowed_capacity = max(slot_capacity - blocked_seats, 0)
 
-            existing_qs = ReservationModel.objects.filter(
-                date=reservation_date,
-                slot=slot,
+            already_reserved = occupancy.booked_seats(
+                reservation_date,
+                slot.id,
+                exclude=self._ledger_before,
             )
 
-            if self.instance and self.instance.pk:
-                existing_qs = existing_qs.exclude(pk=self.instance.pk)
-
-            already_reserved = existing_qs.aggregate(
-                total=Sum("party_size")
-            )["total"] or 0
-
             if already_reserved + party_size > allowed_capacity:
                 remaining = max(allowed_capacity - already_reserved, 0)
                 raise ValidationError({
@@ -207,6 +209,24 @@ class ReservationForm(forms.ModelForm):
 
         return cleaned_data
 
+    def add_booking_error(self, error):
+        """
+        Show a reservations.booking.BookingError (raised on save) on the field
+        it belongs to.
+        """
+        slot = self.cleaned_data.get("slot")
+        if error.code == "DAY_CLOSED":
+            self.add_error("date", "This day is blocked for reservations.")
+        elif error.code == "SLOT_CLOSED":
+            self.add_error("slot", f'"{slot.label}" is blocked on this date.')
+        elif error.available is not None:
+            self.add_error(
+                "party_size",
+                f'Only {error.available} seat(s) are available for "{slot.label}" on this date.',
+            )
+        else:
+            self.add_error(None, "Too many bookings for this slot right now, please try again.")
+
 class SiteSettingsForm(forms.ModelForm):
     new_dashboard_password = forms.CharField(
         required=False,
@@ -0,0 +1,72 @@
+"""
+Today's numbers shown above every dashboard section.
+
+Computed once per DASHBOARD_OVERVIEW_CACHE_SECONDS (or until a reservation
+or slot changes) and fetched lazily by the page from dashboard:overview,
+so switching sections or live-searching never pays for it.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from mingdyn import cacheversion
+from reservations.models import ReservationModel, TimeSlotModel
+
+VERSION_KEY = "dashboard:overview:version"
+
+
+def _version() -> int:
+    return cacheversion.current(VERSION_KEY)
+
+
+def _bump_version() -> None:
+    cacheversion.bump(VERSION_KEY)
+
+
+def invalidate() -> None:
+    transaction.on_commit(_bump_version)
+
+
+def compute_overview(today=None, now_time=None) -> dict:
+    today = today or date.today()
+    now_time = now_time or datetime.now().time()
+
+    active = ReservationModel.objects.exclude(status=ReservationModel.Status.CANCELLED)
+
+    totals = active.filter(date=today).aggregate(
+        reservations=Count("id"),
+        guests=Sum("party_size"),
+        no_shows=Count("id", filter=Q(time__lt=now_time, is_arrived=False)),
+    )
+
+    next_reservation = (
+        active
+        .filter(Q(date__gt=today) | Q(date=today, time__gte=now_time))
+        .order_by("date", "time")
+        .values("id", "name", "date", "time")
+        .first()
+    )
+
+    return {
+        "total_today_reservations": totals["reservations"] or 0,
+        "total_today_guests": totals["guests"] or 0,
+        "next_reservation": next_reservation,
+        "active_slots_today": TimeSlotModel.objects.filter(is_active=True).count(),
+        "no_shows_today": totals["no_shows"] or 0,
+    }
+
+
+def get_overview() -> dict:
+    now = datetime.now()
+    # the minute is part of the key: no-shows / next reservation move with the clock
+    key = f"dashboard:overview:{_version()}:{now:%Y%m%d%H%M}"
+    data = cache.get(key)
+    if data is None:
+        data = compute_overview(now.date(), now.time())
+        cache.set(key, data, getattr(settings, "DASHBOARD_OVERVIEW_CACHE_SECONDS", 60))
+    return data
@@ -0,0 +1,232 @@
+"""
+List queries shared by the dashboard views (and the locations copy).
+
+Reservations: `ReservationFilter` compiles the list filters from the
+query string into one queryset (projected to the list columns, cancelled
+rows excluded, count cached), so the full list, the AJAX search,
+single-row updates and the change feed all agree on which rows are
+visible. Lists are read in
+keyset pages on (date, time, id) (`reservation_page`), so a page costs the
+same whether the history holds a hundred rows or a hundred thousand.
+
+Blocked days are listed in a date window: upcoming (today onwards, soonest
+first) by default, past days only when the archive is requested. Each page
+is DASHBOARD_BLOCKED_DAYS_PER_PAGE rows and the slot rules are prefetched
+for that page only.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q, prefetch_related_objects
+from django.utils.dateparse import parse_date, parse_time
+
+from reservations import changefeed
+from reservations.models import BlockedDayModel, ReservationModel
+
+from .search import search_queryset
+
+BLOCKED_SCOPES = ("upcoming", "archive")
+
+
+def blocked_days_context(request, today=None) -> dict:
+    """
+    Context for the blocked-days list, read from ?blocked_scope= and
+    ?blocked_page=: `blocked_days` (current page), `blocked_days_page`
+    (the Page, for the pager) and `blocked_scope`.
+    """
+    today = today or date.today()
+    scope = request.GET.get("blocked_scope", "upcoming")
+    if scope not in BLOCKED_SCOPES:
+        scope = "upcoming"
+
+    if scope == "archive":
+        qs = BlockedDayModel.objects.filter(date__lt=today).order_by("-date")
+    else:
+        qs = BlockedDayModel.objects.filter(date__gte=today).order_by("date")
+
+    paginator = Paginator(qs, getattr(settings, "DASHBOARD_BLOCKED_DAYS_PER_PAGE", 25))
+    page = paginator.get_page(request.GET.get("blocked_page"))
+    blocked_days = list(page.object_list)
+    prefetch_related_objects(blocked_days, "slot_blocks__slot")
+
+    return {
+        "blocked_days": blocked_days,
+        "blocked_days_page": page,
+        "blocked_scope": scope,
+    }
+
+
+# =========================
+# Reservation list filter
+# =========================
+# every column the list row, the calendar JSON and the change feed read;
+# the rest (notes, tokens, timestamps) stays on disk
+LIST_FIELDS = (
+    "id", "name", "email", "phone", "date", "time", "party_size",
+    "message", "is_arrived", "slot__id", "slot__label", "slot__start_time",
+)
+DATE_FILTERS = ("upcoming", "today", "past", "all", "custom")
+
+
+class ReservationFilter:
+    """
+    The reservation list filters (?date_filter=, ?slot_filter=, ?search=,
+    ?selected_date=, ?reservation_id=, ?filter=no_show_today) compiled once
+    into a queryset. Every list endpoint (full page, live search, row
+    updates, change feed, calendar weeks, and the locations copy) goes
+    through here, so they agree on which rows are visible (never cancelled
+    ones), which columns are read and in which order.
+    """
+
+    def __init__(self, params, today=None, now_time=None):
+        self.today = today or date.today()
+        self.now_time = now_time or datetime.now().time()
+
+        self.date_filter = params.get("date_filter", "upcoming")
+        if self.date_filter not in DATE_FILTERS:
+            self.date_filter = "all"
+        self.slot_filter = params.get("slot_filter", "").strip()
+        if not self.slot_filter.isdigit():
+            self.slot_filter = ""
+        self.search = params.get("search", "").strip()
+        self.selected_date = parse_iso_date(params.get("selected_date", ""))
+        if self.selected_date:
+            self.date_filter = "custom"
+        reservation_id = params.get("reservation_id", "").strip()
+        self.reservation_id = int(reservation_id) if reservation_id.isdigit() else None
+        self.no_show_today = params.get("filter") == "no_show_today"
+
+    @classmethod
+    def from_request(cls, request, today=None, now_time=None) -> "ReservationFilter":
+        return cls(request.GET, today, now_time)
+
+    @property
+    def descending(self) -> bool:
+        # history reads newest first, everything else soonest first
+        return self.date_filter == "past"
+
+    def queryset(self, window=None):
+        """
+        Unordered queryset of the visible reservations. With `window` =
+        (start, end) the date filters are replaced by start <= date < end
+        (calendar weeks); search, slot and id filters still apply.
+        """
+        reservations = (
+            ReservationModel.objects
+            .select_related("slot")
+            .only(*LIST_FIELDS)
+            .exclude(status=ReservationModel.Status.CANCELLED)
+        )
+        if window:
+            reservations = reservations.filter(date__gte=window[0], date__lt=window[1])
+        elif self.selected_date:
+            reservations = reservations.filter(date=self.selected_date)
+        elif self.date_filter == "today":
+            reservations = reservations.filter(date=self.today)
+        elif self.date_filter == "upcoming":
+            reservations = reservations.filter(date__gte=self.today)
+        elif self.date_filter == "past":
+            reservations = reservations.filter(date__lt=self.today)
+
+        if self.no_show_today:
+            reservations = reservations.filter(date=self.today, time__lt=self.now_time, is_arrived=False)
+        if self.slot_filter:
+            reservations = reservations.filter(slot_id=self.slot_filter)
+        if self.reservation_id:
+            reservations = reservations.filter(id=self.reservation_id)
+        return search_queryset(reservations, self.search)
+
+    def ordered(self, window=None):
+        order = ("-date", "-time", "-id") if self.descending and not window else ("date", "time", "id")
+        return self.queryset(window).order_by(*order)
+
+    def page(self, cursor: str = "", per_page=None):
+        """(rows, next_cursor), see reservation_page."""
+        return reservation_page(self.queryset(), cursor, self.descending, per_page)
+
+    def get(self, pk):
+        """The reservation if it is visible under these filters, else None."""
+        return self.queryset().filter(pk=pk).first()
+
+    def count(self) -> int:
+        """
+        Number of visible reservations. Cached per change-feed version, so
+        any reservation write (which bumps the version) invalidates it and
+        paging or re-sorting the same list never counts twice.
+        """
+        key = self._count_key()
+        count = cache.get(key)
+        if count is None:
+            count = self.queryset().count()
+            cache.set(key, count, getattr(settings, "DASHBOARD_RESERVATION_COUNT_CACHE_SECONDS", 300))
+        return count
+
+    def _count_key(self) -> str:
+        parts = [
+            self.date_filter, self.slot_filter, self.search.lower(),
+            self.selected_date, self.reservation_id, self.today,
+            # "no show" depends on the clock: recount once a minute
+            self.now_time.strftime("%H:%M") if self.no_show_today else "",
+        ]
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+        return f"dashboard:resv-count:{changefeed.current_version()}:{digest}"
+
+    def context(self) -> dict:
+        """The normalised values the template and the list JS echo back."""
+        return {
+            "date_filter": self.date_filter,
+            "slot_filter": self.slot_filter,
+            "search": self.search,
+            "selected_date": self.selected_date.isoformat() if self.selected_date else "",
+        }
+
+
+def parse_iso_date(value: str):
+    try:
+        return datetime.strptime((value or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+# =========================
+# Keyset pagination
+# =========================
+def reservation_cursor(reservation) -> str:
+    return f"{reservation.date.isoformat()}T{reservation.time.isoformat()}_{reservation.pk}"
+
+
+def _parse_cursor(cursor: str):
+    try:
+        stamp, pk = cursor.rsplit("_", 1)
+        day, at = stamp.split("T", 1)
+        parsed = (parse_date(day), parse_time(at), int(pk))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if None not in parsed else None
+
+
+def reservation_page(reservations, cursor: str = "", descending: bool = False, per_page=None):
+    """
+    One page of `reservations` ordered by (date, time, id), starting after
+    `cursor` (from reservation_cursor). Returns (rows, next_cursor); an
+    invalid cursor starts from the top.
+    """
+    per_page = per_page or getattr(settings, "DASHBOARD_RESERVATIONS_PER_PAGE", 50)
+    after = _parse_cursor(cursor) if cursor else None
+    if after:
+        day, at, pk = after
+        op = "lt" if descending else "gt"
+        reservations = reservations.filter(
+            Q(**{f"date__{op}": day})
+            | Q(date=day, **{f"time__{op}": at})
+            | Q(date=day, time=at, **{f"id__{op}": pk})
+        )
+    order = ("-date", "-time", "-id") if descending else ("date", "time", "id")
+    rows = list(reservations.order_by(*order)[:per_page + 1])
+    next_cursor = reservation_cursor(rows[per_page - 1]) if len(rows) > per_page else ""
+    return rows[:per_page], next_cursor
@@ -0,0 +1,55 @@
+"""
+Search for every dashboard list with a search box.
+
+`search_queryset(queryset, term)` filters any model in SEARCH_FIELDS. On
+PostgreSQL the reservation and feedback fields have pg_trgm GIN indexes on
+the exact expressions Django emits for icontains / contains
+(UPPER(col::text) LIKE UPPER('%term%')), see reservations/0011 and
+qrflow/0004, so live search reads the index instead of scanning the
+table. Other databases (SQLite in tests and local dev) run the same query
+unindexed.
+
+Phone numbers are matched on their digits (ReservationModel.phone_digits)
+when the term looks like a phone number, so "0171 234", "0171-234" and
+"0171234" find the same guest.
+"""
+from __future__ import annotations
+
+import re
+
+from django.db.models import Q
+
+from locations.models import Location
+from qrflow.models import Feedback
+from reservations.models import ReservationModel, digits_only
+
+SEARCH_FIELDS = {
+    ReservationModel: ("name", "email"),
+    Feedback: ("what_went_wrong", "email", "location_slug"),
+    Location: ("name", "slug", "address", "phone", "email"),
+}
+
+# models whose phone numbers are searched by their digits only
+PHONE_DIGITS_FIELDS = {
+    ReservationModel: "phone_digits",
+}
+
+PHONE_TERM = re.compile(r"^[\d\s+\-/().]+$")
+
+
+def search_queryset(queryset, term: str):
+    term = (term or "").strip()
+    if not term:
+        return queryset
+
+    model = queryset.model
+    condition = Q()
+    for field in SEARCH_FIELDS[model]:
+        condition |= Q(**{f"{field}__icontains": term})
+
+    # every OR branch must be indexed, or PostgreSQL falls back to a scan:
+    # only add the phone branch when the term can be a phone number
+    digits = digits_only(term)
+    if model in PHONE_DIGITS_FIELDS and digits and PHONE_TERM.match(term):
+        condition |= Q(**{f"{PHONE_DIGITS_FIELDS[model]}__contains": digits})
+    return queryset.filter(condition)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reservations.models import ReservationModel, TimeSlotModel
+
+from . import overview
+
+
+@receiver(post_save, sender=ReservationModel)
+@receiver(post_delete, sender=ReservationModel)
+@receiver(post_save, sender=TimeSlotModel)
+@receiver(post_delete, sender=TimeSlotModel)
+def overview_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        overview.invalidate()
@@ -5,6 +5,7 @@ app_name = "dashboard"
 
 urlpatterns = [
     path("", views.dashboard_home, name="home"),
+    path("overview/", views.dashboard_overview, name="overview"),
 
     # Time Slots
     path("timeslots/create/",                  views.timeslot_create,        name="timeslot_create"),
@@ -21,10 +22,16 @@ urlpatterns = [
     path("reservations/create/",               views.reservation_create,     name="reservation_create"),
     path("reservations/<int:pk>/update/",      views.reservation_update,     name="reservation_update"),
     path("reservations/<int:pk>/delete/",      views.reservation_delete,     name="reservation_delete"),
+    path("reservations/calendar/",             views.reservation_calendar,   name="reservation_calendar"),
+    path("reservations/changes/",              views.reservation_changes,    name="reservation_changes"),
+    path("reservations/events/",               views.reservation_events,     name="reservation_events"),
 
     # Feedback
     path("feedback/<int:pk>/delete/",          views.feedback_delete,        name="feedback_delete"),
 
+    # Email Outbox
+    path("emails/<int:pk>/retry/",             views.email_outbox_retry,     name="email_outbox_retry"),
+
     # Site Settings
     path("settings/save/",                     views.site_settings_save,     name="site_settings_save"),
     path("access/", views.dashboard_password_login, name="password_login"),
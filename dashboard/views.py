@@ -1,28 +1,36 @@
+import asyncio
 import json
+import logging
 from datetime import date, timedelta
 from django.conf import settings
 from django.contrib.auth.hashers import check_password, make_password
+from core_settings.cache import get_site_settings
 from core_settings.models import SiteSettings
 from django.contrib import messages
 from datetime import date, timedelta, datetime
-from django.db.models import Q
+from django.db.models import Count
 from django.db import transaction
-from reservations.email_sender import send_reservation_update_via_gas
 from django.utils.translation import gettext as _
 from django.db.models.deletion import ProtectedError
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.middleware.csrf import rotate_token
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
-from .decorators import dashboard_password_required
-from mingdyn import settings
-from reservations.models import TimeSlotModel, BlockedDayModel, ReservationModel
+from .decorators import _access_granted, dashboard_password_required
+from mingdyn import metrics, settings
+from reservations.models import TimeSlotModel, BlockedDayModel, ReservationModel, EmailOutboxModel
+from reservations import booking, catalogue, changefeed, events, outbox
+from . import overview, queries
+from .search import search_queryset
 from qrflow.models import Feedback  # adjust import path if different in your project
 from core_settings.models import SiteSettings
 from .forms import TimeSlotForm, BlockedDayForm, BlockedDaySlotBlockFormSet, ReservationForm, SiteSettingsForm
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────
 #  MAIN DASHBOARD HOME (handles all sections)
 # ─────────────────────────────────────────────
@@ -45,356 +53,280 @@ def reservation_mark_arrived(request, pk):
 
     reservation.save(update_fields=["is_arrived", "arrival_marked_at"])
 
-    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        today = date.today()
-        now_time = datetime.now().time()
-        date_filter = request.GET.get("date_filter", "upcoming")
-        slot_filter = request.GET.get("slot_filter", "")
-        search = request.GET.get("search", "").strip()
-
-        reservations = (
-            ReservationModel.objects
-            .select_related("slot")
-            .exclude(status=ReservationModel.Status.CANCELLED)
-        )
-        if date_filter == "today":
-            reservations = reservations.filter(date=today)
-        elif date_filter == "upcoming":
-            reservations = reservations.filter(date__gte=today)
-        elif date_filter == "past":
-            reservations = reservations.filter(date__lt=today)
+    if _is_ajax(request):
+        return JsonResponse({
+            "success": True,
+            "message": f'"{reservation.name}" marked as arrived.',
+            **_row_update(request, reservation.pk),
+        })
 
-        if slot_filter:
-            reservations = reservations.filter(slot_id=slot_filter)
+    messages.success(request, f'"{reservation.name}" marked as arrived.')
+    return redirect(_reservation_list_url())
 
-        if search:
-            reservations = reservations.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-            )
+def _is_ajax(request) -> bool:
+    return request.headers.get("X-Requested-With") == "XMLHttpRequest"
+
+
+def _section_timeslots(request, ctx):
+    ctx["slots"] = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
+    edit_id = request.GET.get("id")
+
+    if ctx["mode"] == "create":
+        ctx["form"] = TimeSlotForm()
+    elif ctx["mode"] == "edit" and edit_id:
+        ctx["selected_slot"] = get_object_or_404(TimeSlotModel, pk=edit_id)
+        ctx["form"] = TimeSlotForm(instance=ctx["selected_slot"])
+    else:
+        ctx["mode"] = "list"
 
-        reservations = reservations.order_by("date", "time")
 
+def _section_blocked_days(request, ctx):
+    ctx.update(queries.blocked_days_context(request))
+    edit_id = request.GET.get("id")
+
+    if ctx["mode"] == "create":
+        ctx["form"] = BlockedDayForm()
+        ctx["slot_block_formset"] = BlockedDaySlotBlockFormSet(prefix="slot_blocks")
+    elif ctx["mode"] == "edit" and edit_id:
+        selected = get_object_or_404(BlockedDayModel, pk=edit_id)
+        ctx["selected_blocked_day"] = selected
+        ctx["form"] = BlockedDayForm(instance=selected)
+        ctx["slot_block_formset"] = BlockedDaySlotBlockFormSet(instance=selected, prefix="slot_blocks")
+    else:
+        ctx["mode"] = "list"
+
+
+def _section_settings(request, ctx):
+    site_settings = SiteSettings.objects.first()
+    if site_settings is None:
+        site_settings = SiteSettings()
+
+    ctx["site_settings"] = site_settings
+    ctx["form"] = SiteSettingsForm(instance=site_settings)
+    ctx["mode"] = "edit"
+
+
+def _calendar_row(r):
+    """
+    One reservation as the weekly calendar (and the change feed) sends it.
+    """
+    return {
+        "id":      r.id,
+        "date":    r.date.strftime("%Y-%m-%d"),
+        "time":    r.time.strftime("%H:%M") if r.time else (r.slot.start_time.strftime("%H:%M") if r.slot else ""),
+        "name":    r.name,
+        "guests":  r.party_size or 0,
+        "status":  "arrived" if r.is_arrived else "confirmed",
+        "phone":   r.phone or "",
+        "email":   r.email or "",
+        "message": r.message or "",
+    }
+
+
+def _calendar_context(filters, week_start):
+    week = filters.ordered(window=(week_start, week_start + timedelta(days=7)))
+    return {
+        "reservations_json": json.dumps([_calendar_row(r) for r in week], default=str),
+        "calendar_week_start": week_start,
+    }
+
+
+def _section_reservations(request, ctx):
+    today, now_time = ctx["today"], ctx["now_time"]
+    edit_id = request.GET.get("id")
+
+    # read before the list so a change between the two is re-sent, not lost
+    version = changefeed.current_version()
+    filters = queries.ReservationFilter.from_request(request, today, now_time)
+
+    # AJAX live search: one keyset page of rows (?after= for the next one)
+    if _is_ajax(request):
+        cursor = request.GET.get("after", "")
+        rows, next_cursor = filters.page(cursor)
         html = render_to_string(
             "dashboard/_reservation_rows.html",
             {
-                "reservations": reservations,
+                "reservations": rows,
+                "next_cursor": next_cursor,
                 "today": today,
                 "now_time": now_time,
             },
             request=request,
         )
-        return JsonResponse({
-            "success": True,
-            "message": f'"{reservation.name}" marked as arrived.',
-            "html": html,
-            "now_time": now_time,
-            "count": reservations.count(),
-        })
+        payload = {"html": html, "next_cursor": next_cursor, "version": version}
+        if not cursor:
+            payload["count"] = filters.count()
+        return JsonResponse(payload)
+
+    ctx["slots_json"] = json.dumps(catalogue.slot_ranges())
+
+    # ── Calendar JSON: this week only, other weeks come from dashboard:reservation_calendar ──
+    week_start = today - timedelta(days=today.weekday())
+    ctx.update(_calendar_context(filters, week_start))
+
+    if ctx["mode"] == "create":
+        ctx["form"] = ReservationForm()
+    elif ctx["mode"] == "edit" and edit_id:
+        ctx["selected_reservation"] = get_object_or_404(ReservationModel, pk=edit_id)
+        ctx["form"] = ReservationForm(instance=ctx["selected_reservation"])
+    else:
+        ctx["mode"] = "list"
 
-    messages.success(request, f'"{reservation.name}" marked as arrived.')
-    return redirect(_reservation_list_url())
+    ctx.update({
+        **filters.context(),
+        "changes_version": version,
+        "changes_poll_seconds": getattr(settings, "DASHBOARD_CHANGE_FEED_POLL_SECONDS", 10),
+    })
 
-@dashboard_password_required
-def dashboard_home(request):
-    section = request.GET.get("section", "reservations")
-    mode    = request.GET.get("mode", "list")
+
+def _section_feedback(request, ctx):
+    today = ctx["today"]
+    date_filter     = request.GET.get("date_filter", "all")
+    location_filter = request.GET.get("location_filter", "")
+    search          = request.GET.get("search", "")
     edit_id = request.GET.get("id")
-    filter_type = request.GET.get("filter")
 
-    slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
-
-    form                = None
-    slot_block_formset  = None
-    selected_slot       = None
-    selected_blocked_day = None
-    selected_reservation = None
-    selected_feedback   = None
-    reservations        = None
-    feedback_list       = None
-    date_filter         = "upcoming"
-    slot_filter         = ""
-    search              = ""
-    location_filter     = ""
-    slots_json          = "[]"
-    site_settings       = None
-    today               = date.today()
-    now_time = datetime.now().time()
-
-    active_reservations = ReservationModel.objects.exclude(
-        status=ReservationModel.Status.CANCELLED
-    )
+    feedback_list = Feedback.objects.order_by("-created_at")
 
-    today_reservations = (
-        active_reservations
-        .select_related("slot")
-        .filter(date=today)
-        .order_by("time")
-    )
+    # Date filter
+    if date_filter == "today":
+        feedback_list = feedback_list.filter(created_at__date=today)
+    elif date_filter == "week":
+        feedback_list = feedback_list.filter(created_at__date__gte=today - timedelta(days=7))
+    elif date_filter == "month":
+        feedback_list = feedback_list.filter(created_at__date__gte=today - timedelta(days=30))
+
+    # Location filter
+    if location_filter:
+        feedback_list = feedback_list.filter(location_slug=location_filter)
+
+    # Search
+    if search:
+        feedback_list = search_queryset(feedback_list, search)
+    feedback_list = list(feedback_list)
 
-    no_shows_today = active_reservations.filter(
-        date=today,
-        time__lt=now_time,
-        is_arrived=False,
-    ).count()
-
-    total_today_reservations = today_reservations.count()
-    total_today_guests = sum((r.party_size or 0) for r in today_reservations)
-
-    next_reservation = (
-        active_reservations
-        .select_related("slot")
-        .filter(
-            Q(date__gt=today) |
-            Q(date=today, time__gte=now_time)
+    # AJAX live search
+    if _is_ajax(request):
+        html = render_to_string(
+            "dashboard/_feedback_rows.html",
+            {"feedback_list": feedback_list, "selected_feedback": None},
+            request=request,
         )
-        .order_by("date", "time")
-        .first()
+        return JsonResponse({"html": html, "count": len(feedback_list)})
+
+    # Detail view — show selected feedback in right panel
+    if ctx["mode"] == "view" and edit_id:
+        ctx["selected_feedback"] = get_object_or_404(Feedback, pk=edit_id)
+    else:
+        ctx["mode"] = "list"
+
+    # Distinct location slugs for the filter dropdown
+    ctx["location_slugs"] = (
+        Feedback.objects
+        .exclude(location_slug__isnull=True)
+        .exclude(location_slug="")
+        .values_list("location_slug", flat=True)
+        .distinct()
+        .order_by("location_slug")
     )
-    active_slots_today = TimeSlotModel.objects.filter(is_active=True).count()
-
-    dashboard_overview = {
-        "total_today_reservations": total_today_reservations,
-        "total_today_guests": total_today_guests,
-        "next_reservation": next_reservation,
-        "active_slots_today": active_slots_today,
-        "no_shows_today": no_shows_today,
-    }
-    # ── Time Slots ──────────────────────────────────────────
-    if section == "timeslots":
-        if mode == "create":
-            form = TimeSlotForm()
-        elif mode == "edit" and edit_id:
-            selected_slot = get_object_or_404(TimeSlotModel, pk=edit_id)
-            form = TimeSlotForm(instance=selected_slot)
-        else:
-            mode = "list"
-
-    # ── Blocked Days ─────────────────────────────────────────
-    elif section == "blocked-days":
-        if mode == "create":
-            form = BlockedDayForm()
-            slot_block_formset = BlockedDaySlotBlockFormSet(prefix="slot_blocks")
-        elif mode == "edit" and edit_id:
-            selected_blocked_day = get_object_or_404(BlockedDayModel, pk=edit_id)
-            form = BlockedDayForm(instance=selected_blocked_day)
-            slot_block_formset = BlockedDaySlotBlockFormSet(
-                instance=selected_blocked_day,
-                prefix="slot_blocks",
-            )
-        else:
-            mode = "list"
-
-    # ── Site Settings ────────────────────────────────────────
-    elif section == "settings":
-        site_settings = SiteSettings.objects.first()
-        if site_settings is None:
-            site_settings = SiteSettings()
-
-        form = SiteSettingsForm(instance=site_settings)
-        mode = "edit"
-    # ── Reservations ─────────────────────────────────────────
-    elif section == "reservations":
-        date_filter = request.GET.get("date_filter", "upcoming")
-        slot_filter = request.GET.get("slot_filter", "")
-        search      = request.GET.get("search", "")
-        reservation_id = request.GET.get("reservation_id", "")
-        selected_date = request.GET.get("selected_date", "").strip()
-
-        reservations = (
-            ReservationModel.objects
-            .select_related("slot")
-            .exclude(status=ReservationModel.Status.CANCELLED)
-            .order_by("-date", "-time")
-        )
-        if selected_date:
-            try:
-                parsed_selected_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-                reservations = reservations.filter(date=parsed_selected_date)
-                date_filter = "custom"
-            except ValueError:
-                selected_date = ""
-        if filter_type == "no_show_today":
-            reservations = reservations.filter(
-                date=today,
-                time__lt=now_time,
-                is_arrived=False,
-            )
-        if not selected_date:
-            if date_filter == "today":
-                reservations = reservations.filter(date=today)
-            elif date_filter == "upcoming":
-                reservations = reservations.filter(date__gte=today)
-            elif date_filter == "past":
-                reservations = reservations.filter(date__lt=today)
-        if slot_filter:
-            reservations = reservations.filter(slot_id=slot_filter)
+    ctx.update({
+        "feedback_list": feedback_list,
+        "date_filter": date_filter,
+        "location_filter": location_filter,
+        "search": search,
+    })
 
-        if search:
-            reservations = reservations.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-            )
-        if reservation_id:
-            reservations = reservations.filter(id=reservation_id)
-        slots_data = list(
-            TimeSlotModel.objects.filter(is_active=True)
-            .values("id", "start_time", "end_time")
-            .order_by("sort_order", "start_time")
-        )
-        slots_json = json.dumps({
-            str(s["id"]): {
-                "start": s["start_time"].strftime("%H:%M"),
-                "end":   s["end_time"].strftime("%H:%M"),
-            }
-            for s in slots_data
-        })
-        reservations = reservations.order_by("date", "time")
 
-        # ── Calendar JSON for the weekly calendar view ──
-        reservations_json = json.dumps([
-            {
-                "id":      r.id,
-                "date":    r.date.strftime("%Y-%m-%d"),
-                "time":    r.time.strftime("%H:%M") if r.time else (r.slot.start_time.strftime("%H:%M") if r.slot else ""),
-                "name":    r.name,
-                "guests":  r.party_size or 0,
-                "status":  "arrived" if r.is_arrived else "confirmed",
-                "phone":   r.phone or "",
-                "email":   r.email or "",
-                "message": r.message or "",
-            }
-            for r in reservations
-        ], default=str)
-
-        if mode == "create":
-            form = ReservationForm()
-        elif mode == "edit" and edit_id:
-            selected_reservation = get_object_or_404(ReservationModel, pk=edit_id)
-            form = ReservationForm(instance=selected_reservation)
-        else:
-            mode = "list"
-
-        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-            html = render_to_string(
-                "dashboard/_reservation_rows.html",
-                {
-                    "reservations": reservations,
-                    "today": today,
-                    "now_time": now_time,
-                },
-                request=request,
-            )
-            return JsonResponse({"html": html, "count": reservations.count()})
+def _section_emails(request, ctx):
+    status_filter = request.GET.get("status_filter", "open")
+    edit_id = request.GET.get("id")
+    Status = EmailOutboxModel.Status
 
-    # ── Feedback ─────────────────────────────────────────────
-    elif section == "feedback":
-        date_filter     = request.GET.get("date_filter", "all")
-        location_filter = request.GET.get("location_filter", "")
-        search          = request.GET.get("search", "")
+    outbox_list = EmailOutboxModel.objects.order_by("-created_at")
+    if status_filter == "open":
+        outbox_list = outbox_list.filter(status__in=[Status.PENDING, Status.SENDING, Status.DEAD])
+    elif status_filter in Status.values:
+        outbox_list = outbox_list.filter(status=status_filter)
+    else:
+        status_filter = "all"
 
-        feedback_list = Feedback.objects.order_by("-created_at")
+    ctx["outbox_list"] = outbox_list[:200]
+    ctx["outbox_counts"] = {
+        row["status"]: row["n"]
+        for row in EmailOutboxModel.objects.values("status").annotate(n=Count("id")).order_by()
+    }
+    ctx["status_filter"] = status_filter
 
-        # Date filter
-        if date_filter == "today":
-            feedback_list = feedback_list.filter(created_at__date=today)
-        elif date_filter == "week":
-            feedback_list = feedback_list.filter(created_at__date__gte=today - timedelta(days=7))
-        elif date_filter == "month":
-            feedback_list = feedback_list.filter(created_at__date__gte=today - timedelta(days=30))
+    if ctx["mode"] == "view" and edit_id:
+        ctx["selected_outbox"] = get_object_or_404(EmailOutboxModel, pk=edit_id)
+    else:
+        ctx["mode"] = "list"
 
-        # Location filter
-        if location_filter:
-            feedback_list = feedback_list.filter(location_slug=location_filter)
 
-        # Search
-        if search:
-            feedback_list = feedback_list.filter(
-                Q(what_went_wrong__icontains=search)
-                | Q(email__icontains=search)
-                | Q(location_slug__icontains=search)
-            )
+# Each section only runs the queries it renders. A handler fills `ctx`
+# and may return a response of its own (AJAX live search).
+SECTION_HANDLERS = {
+    "timeslots":    _section_timeslots,
+    "blocked-days": _section_blocked_days,
+    "settings":     _section_settings,
+    "reservations": _section_reservations,
+    "feedback":     _section_feedback,
+    "emails":       _section_emails,
+}
 
-        # Detail view — show selected feedback in right panel
-        if mode == "view" and edit_id:
-            selected_feedback = get_object_or_404(Feedback, pk=edit_id)
-        else:
-            mode = "list"
-
-        # AJAX live search
-        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-            html = render_to_string(
-                "dashboard/_reservation_rows.html",
-                {
-                    "reservations": reservations,
-                    "today": today,
-                    "now_time": now_time,
-                },
-                request=request,
-            )
-            return JsonResponse({"html": html, "count": feedback_list.count()})
-
-        # Distinct location slugs for the filter dropdown
-        location_slugs = (
-            Feedback.objects
-            .exclude(location_slug__isnull=True)
-            .exclude(location_slug="")
-            .values_list("location_slug", flat=True)
-            .distinct()
-            .order_by("location_slug")
-        )
 
-        return render(request, "dashboard/index.html", {
-            "section":          section,
-            "mode":             mode,
-            "dashboard_overview": dashboard_overview,
-            "slots":            slots,
-            "blocked_days":     blocked_days,
-            "form":             None,
-            "slot_block_formset": None,
-            "selected_slot":    None,
-            "selected_blocked_day": None,
-            "reservations":     None,
-            "selected_reservation": None,
-            "feedback_list":    feedback_list,
-            "selected_feedback": selected_feedback,
-        "site_settings": site_settings,
-            "date_filter":      date_filter,
-            "location_filter":  location_filter,
-            "location_slugs":   location_slugs,
-            "search":           search,
-            "slot_filter":      "",
-            "slots_json":       "[]",
-            "today":            today,
-        })
+@dashboard_password_required
+def dashboard_home(request):
+    section = request.GET.get("section", "reservations")
+    handler = SECTION_HANDLERS.get(section)
+
+    ctx = {
+        "section":            section,
+        "mode":               request.GET.get("mode", "list"),
+        "slots":              [],
+        "blocked_days":       [],
+        "form":               None,
+        "slot_block_formset": None,
+        "selected_slot":      None,
+        "selected_blocked_day": None,
+        "reservations":       None,
+        "selected_reservation": None,
+        "feedback_list":      None,
+        "selected_feedback":  None,
+        "outbox_list":        None,
+        "outbox_counts":      {},
+        "selected_outbox":    None,
+        "status_filter":      "",
+        "site_settings":      None,
+        "date_filter":        "upcoming",
+        "location_filter":    "",
+        "location_slugs":     [],
+        "search":             "",
+        "slot_filter":        "",
+        "slots_json":         "[]",
+        "reservations_json":  "[]",
+        "today":              date.today(),
+        "now_time":           datetime.now().time(),
+    }
+
+    response = handler(request, ctx) if handler else None
+    if response is not None:
+        return response
+    return render(request, "dashboard/index.html", ctx)
+
+
+@dashboard_password_required
+def dashboard_overview(request):
+    """
+    Today's numbers for the cards above every section (fetched by the page).
+    """
+    html = render_to_string(
+        "dashboard/_overview.html",
+        {"dashboard_overview": overview.get_overview()},
+        request=request,
+    )
+    return JsonResponse({"html": html})
 
-    return render(request, "dashboard/index.html", {
-        "section":           section,
-        "mode":              mode,
-        "dashboard_overview": dashboard_overview,
-        "slots":             slots,
-        "blocked_days":      blocked_days,
-        "form":              form,
-        "slot_block_formset": slot_block_formset,
-        "selected_slot":     selected_slot,
-        "selected_blocked_day": selected_blocked_day,
-        "reservations":      reservations,
-        "selected_reservation": selected_reservation,
-        "feedback_list":     feedback_list,
-        "selected_feedback": selected_feedback,
-        "site_settings": site_settings,
-        "date_filter":       date_filter,
-        "location_filter":   location_filter,
-        "location_slugs":    [],
-        "search":            search,
-        "slot_filter":       slot_filter,
-        "slots_json":        slots_json,
-        "reservations_json": reservations_json if section == "reservations" else "[]",
-        "today":             today,
-            })
 
 @dashboard_password_required
 def site_settings_save(request):
@@ -422,14 +354,12 @@ def site_settings_save(request):
 
         return redirect(f"{reverse('dashboard:home')}?section=settings")
     slots = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "settings",
         "mode": "edit",
         "slots": slots,
-        "blocked_days": blocked_days,
         "form": form,
         "slot_block_formset": None,
         "selected_slot": None,
@@ -464,12 +394,11 @@ def timeslot_create(request):
         return redirect(f"{reverse('dashboard:home')}?section=timeslots")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "timeslots", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -490,12 +419,11 @@ def timeslot_update(request, pk):
         return redirect(f"{reverse('dashboard:home')}?section=timeslots")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "timeslots", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": slot, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -536,6 +464,16 @@ def timeslot_toggle_active(request, pk):
 # ─────────────────────────────────────────────
 #  BLOCKED DAY VIEWS
 # ─────────────────────────────────────────────
+def _notify_blocked_day_guests(form, blocked_day):
+    """
+    Queue closure notices if "notify guests" was ticked; returns the
+    suffix for the success message.
+    """
+    if not form.cleaned_data.get("notify_guests"):
+        return ""
+    count = outbox.queue_closure_notices(blocked_day)
+    return f" {count} guest(s) will be notified by email."
+
 @dashboard_password_required
 def blocked_day_create(request):
     if request.method != "POST":
@@ -545,19 +483,20 @@ def blocked_day_create(request):
     formset = BlockedDaySlotBlockFormSet(request.POST, prefix="slot_blocks")
 
     if form.is_valid() and formset.is_valid():
-        blocked_day          = form.save()
-        formset.instance     = blocked_day
-        formset.save()
-        messages.success(request, "Blocked day created successfully.")
+        with transaction.atomic():
+            blocked_day          = form.save()
+            formset.instance     = blocked_day
+            formset.save()
+            notified = _notify_blocked_day_guests(form, blocked_day)
+        messages.success(request, "Blocked day created successfully." + notified)
         return redirect(f"{reverse('dashboard:home')}?section=blocked-days")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "blocked-days", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots, **queries.blocked_days_context(request),
         "form": form, "slot_block_formset": formset,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -575,18 +514,19 @@ def blocked_day_update(request, pk):
     formset = BlockedDaySlotBlockFormSet(request.POST, instance=blocked_day, prefix="slot_blocks")
 
     if form.is_valid() and formset.is_valid():
-        form.save()
-        formset.save()
-        messages.success(request, "Blocked day updated successfully.")
+        with transaction.atomic():
+            form.save()
+            formset.save()
+            notified = _notify_blocked_day_guests(form, blocked_day)
+        messages.success(request, "Blocked day updated successfully." + notified)
         return redirect(f"{reverse('dashboard:home')}?section=blocked-days")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "blocked-days", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots, **queries.blocked_days_context(request),
         "form": form, "slot_block_formset": formset,
         "selected_slot": None, "selected_blocked_day": blocked_day,
         "reservations": None, "feedback_list": None,
@@ -611,6 +551,122 @@ def _reservation_list_url(extra=""):
     base = f"{reverse('dashboard:home')}?section=reservations"
     return f"{base}{extra}"
 
+def _render_row(request, reservation, today, now_time):
+    return render_to_string(
+        "dashboard/_reservation_row.html",
+        {"res": reservation, "today": today, "now_time": now_time},
+        request=request,
+    )
+
+def _row_update(request, pk):
+    """
+    Single-row answer to an AJAX list mutation: the row's new HTML if it
+    still matches the list filters passed in the query string, otherwise
+    removed=True. The version lets the page skip its own change in the feed.
+    """
+    today, now_time = date.today(), datetime.now().time()
+    reservation = queries.ReservationFilter.from_request(request, today, now_time).get(pk)
+    return {
+        "id": pk,
+        "html": _render_row(request, reservation, today, now_time) if reservation else "",
+        "row": _calendar_row(reservation) if reservation else None,
+        "removed": reservation is None,
+        "version": changefeed.current_version(),
+    }
+
+@dashboard_password_required
+def reservation_changes(request):
+    """
+    Change feed for an open reservation list: rows changed since ?since=
+    that match the list filters (re-rendered) and ids to drop. reset=True
+    means the page is too far behind and should reload the list.
+    """
+    try:
+        since = max(int(request.GET.get("since", 0)), 0)
+    except ValueError:
+        since = 0
+
+    feed = changefeed.changes_since(since)
+    payload = {"version": feed["version"], "reset": feed["reset"], "rows": [], "removed": feed["deleted"]}
+    if feed["reset"] or not feed["changed"]:
+        return JsonResponse(payload)
+
+    today, now_time = date.today(), datetime.now().time()
+    filters = queries.ReservationFilter.from_request(request, today, now_time)
+    visible = list(filters.ordered().filter(id__in=feed["changed"]))
+    visible_ids = {r.id for r in visible}
+
+    payload["rows"] = [
+        {"id": r.id, "html": _render_row(request, r, today, now_time), "row": _calendar_row(r)}
+        for r in visible
+    ]
+    payload["removed"] += [rid for rid in feed["changed"] if rid not in visible_ids]
+    return JsonResponse(payload)
+
+@dashboard_password_required
+def reservation_calendar(request):
+    """
+    Calendar rows for ?start=YYYY-MM-DD and ?days= (default 7, at most
+    DASHBOARD_CALENDAR_MAX_DAYS), with the list's search/slot filters.
+    """
+    today = date.today()
+    try:
+        start = datetime.strptime(request.GET.get("start", ""), "%Y-%m-%d").date()
+    except ValueError:
+        start = today - timedelta(days=today.weekday())
+    try:
+        days = int(request.GET.get("days", 7))
+    except ValueError:
+        days = 7
+    days = min(max(days, 1), getattr(settings, "DASHBOARD_CALENDAR_MAX_DAYS", 42))
+    end = start + timedelta(days=days)
+
+    version = changefeed.current_version()
+    filters = queries.ReservationFilter.from_request(request, today)
+    return JsonResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "rows": [_calendar_row(r) for r in filters.ordered(window=(start, end))],
+        "version": version,
+    })
+
+@dashboard_password_required
+async def reservation_events(request):
+    """
+    Server-Sent Events stream of reservation changes for the host stand.
+    Needs the ASGI server (mingdyn/asgi.py); under WSGI it answers 204 so
+    the browser stops reconnecting and the page keeps polling the change
+    feed instead. Connections are closed after RESV_EVENTS_MAX_SECONDS and
+    the browser reconnects on its own.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    heartbeat = getattr(settings, "RESV_EVENTS_HEARTBEAT_SECONDS", 15)
+    max_seconds = getattr(settings, "RESV_EVENTS_MAX_SECONDS", 300)
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        subscription = events.get_broker().subscribe(heartbeat)
+        try:
+            yield "retry: 3000\n\n"
+            async for event in subscription:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    event_id = f"id: {event['version']}\n" if "version" in event else ""
+                    yield f"{event_id}data: {json.dumps(event)}\n\n"
+                if loop.time() >= deadline:
+                    break
+        finally:
+            await subscription.aclose()  # unsubscribe as soon as the client goes
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+    return response
+
 @dashboard_password_required
 def reservation_create(request):
     if request.method != "POST":
@@ -618,40 +674,29 @@ def reservation_create(request):
 
     form = ReservationForm(request.POST)
     if form.is_valid():
-        form.save()
-        messages.success(request, "Reservation created successfully.")
-        return redirect(_reservation_list_url())
+        try:
+            booking.save(form.save(commit=False))
+        except booking.BookingError as e:
+            form.add_booking_error(e)
+        else:
+            messages.success(request, "Reservation created successfully.")
+            return redirect(_reservation_list_url())
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
-    reservations = (
-        ReservationModel.objects
-        .select_related("slot")
-        .exclude(status=ReservationModel.Status.CANCELLED)
-        .filter(date__gte=date.today())
-        .order_by("-date", "-time")
-    )
+    filters      = queries.ReservationFilter.from_request(request)
     messages.error(request, "Please fix the form errors and try again.")
 
-    slots_data = list(
-        TimeSlotModel.objects.filter(is_active=True)
-        .values("id", "start_time", "end_time")
-        .order_by("sort_order", "start_time")
-    )
-    slots_json = json.dumps({
-        str(s["id"]): {"start": s["start_time"].strftime("%H:%M"), "end": s["end_time"].strftime("%H:%M")}
-        for s in slots_data
-    })
+    slots_json = json.dumps(catalogue.slot_ranges())
 
     return render(request, "dashboard/index.html", {
         "section": "reservations", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
-        "reservations": reservations, "selected_reservation": None,
+        "reservations": filters.page()[0], "selected_reservation": None,
         "feedback_list": None, "selected_feedback": None,
-        "date_filter": "upcoming", "slot_filter": "", "search": "",
-        "slots_json": slots_json, "today": date.today(),
+        **filters.context(),
+        "slots_json": slots_json, "today": filters.today,
     })
 
 def _get_reservation_changes(old_reservation, new_reservation):
@@ -689,7 +734,6 @@ def _get_reservation_changes(old_reservation, new_reservation):
             "old": old_reservation.slot.label if old_reservation.slot else "",
             "new": new_reservation.slot.label if new_reservation.slot else "",
         })
-    print(f'changed_fields {changed_fields}')
     return changed_fields
 
 @dashboard_password_required
@@ -702,81 +746,58 @@ def reservation_update(request, pk):
     old_snapshot = ReservationModel.objects.select_related("slot").get(pk=reservation.pk)
     form = ReservationForm(request.POST, instance=reservation)
 
-    if form.is_valid():
-        updated_reservation = form.save()
+    def notify_guest(updated_reservation):
         changed_fields = _get_reservation_changes(old_snapshot, updated_reservation)
-        print("changed_fields", changed_fields)
 
         relevant_fields = {"date", "time", "party_size", "name", "email", "phone", "slot"}
         relevant_changes = [c for c in changed_fields if c["field"] in relevant_fields]
-        print(f'relevant_changesrelevant_changes {relevant_changes}')
-        print(f'updated_reservation.email {updated_reservation.email}')
+        logger.debug("Reservation %s changed: %s", updated_reservation.pk, [c["field"] for c in changed_fields])
         if relevant_changes and updated_reservation.email:
             change_lines = "\n".join(
                 f'- {c["label"]}: "{c["old"]}" → "{c["new"]}"'
                 for c in relevant_changes
             )
 
-            def send_update_email():
-                try:
-                    send_reservation_update_via_gas(
-                        to_email=updated_reservation.email.strip().lower(),
-                        restaurant_name="Ming Dynastie",
-                        reservation_date=updated_reservation.date.strftime("%d.%m.%Y"),
-                        reservation_time=updated_reservation.time.strftime("%H:%M"),
-                        party_size=updated_reservation.party_size,
-                        customer_name=updated_reservation.name,
-                        changes_text=change_lines,
-                    )
-                except Exception as e:
-                    print("email failed:", e)
-
-            transaction.on_commit(send_update_email)
-
-        messages.success(request, f'Reservation for "{updated_reservation.name}" updated successfully.')
-        return redirect(_reservation_list_url())
+            outbox.queue_reservation_update(
+                to_email=updated_reservation.email.strip().lower(),
+                restaurant_name="Ming Dynastie",
+                reservation_date=updated_reservation.date.strftime("%d.%m.%Y"),
+                reservation_time=updated_reservation.time.strftime("%H:%M"),
+                party_size=updated_reservation.party_size,
+                customer_name=updated_reservation.name,
+                changes_text=change_lines,
+            )
+
+    if form.is_valid():
+        try:
+            # reservation and its notification commit together
+            updated_reservation = booking.save(form.save(commit=False), on_save=notify_guest)
+        except booking.BookingError as e:
+            form.add_booking_error(e)
+        else:
+            messages.success(request, f'Reservation for "{updated_reservation.name}" updated successfully.')
+            return redirect(_reservation_list_url())
     slots = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
-    reservations = (
-        ReservationModel.objects
-        .select_related("slot")
-        .exclude(status=ReservationModel.Status.CANCELLED)
-        .filter(date__gte=date.today())
-        .order_by("-date", "-time")
-    )
+    filters      = queries.ReservationFilter.from_request(request)
     messages.error(request, "Please fix the form errors and try again.")
 
-    slots_data = list(
-        TimeSlotModel.objects.filter(is_active=True)
-        .values("id", "start_time", "end_time")
-        .order_by("sort_order", "start_time")
-    )
-    slots_json = json.dumps({
-        str(s["id"]): {
-            "start": s["start_time"].strftime("%H:%M"),
-            "end": s["end_time"].strftime("%H:%M"),
-        }
-        for s in slots_data
-    })
+    slots_json = json.dumps(catalogue.slot_ranges())
 
     return render(request, "dashboard/index.html", {
         "section": "reservations",
         "mode": "edit",
         "slots": slots,
-        "blocked_days": blocked_days,
         "form": form,
         "slot_block_formset": None,
         "selected_slot": None,
         "selected_blocked_day": None,
-        "reservations": reservations,
+        "reservations": filters.page()[0],
         "selected_reservation": reservation,
         "feedback_list": None,
         "selected_feedback": None,
-        "date_filter": "upcoming",
-        "slot_filter": "",
-        "search": "",
+        **filters.context(),
         "slots_json": slots_json,
-        "today": date.today(),
+        "today": filters.today,
     })
 
 @dashboard_password_required
@@ -788,50 +809,11 @@ def reservation_delete(request, pk):
     name = reservation.name
     reservation.delete()
 
-    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        today       = date.today()
-        date_filter = request.GET.get("date_filter", "upcoming")
-        slot_filter = request.GET.get("slot_filter", "")
-        search      = request.GET.get("search", "").strip()
-
-        reservations = (
-            ReservationModel.objects
-            .select_related("slot")
-            .exclude(status=ReservationModel.Status.CANCELLED)
-        )
-        if date_filter == "today":
-            reservations = reservations.filter(date=today)
-        elif date_filter == "upcoming":
-            reservations = reservations.filter(date__gte=today)
-        elif date_filter == "past":
-            reservations = reservations.filter(date__lt=today)
-
-        if slot_filter:
-            reservations = reservations.filter(slot_id=slot_filter)
-
-        if search:
-            reservations = reservations.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-            )
-
-        reservations = reservations.order_by("date", "time")
-
-        html = render_to_string(
-            "dashboard/_reservation_rows.html",
-            {
-                "reservations": reservations,
-                "today": today,
-                "now_time": datetime.now().time(),
-            },
-            request=request,
-        )
+    if _is_ajax(request):
         return JsonResponse({
             "success": True,
             "message": f'Reservation for "{name}" was deleted successfully.',
-            "html":    html,
-            "count":   reservations.count(),
+            **_row_update(request, pk),
         })
 
     messages.success(request, f'Reservation for "{name}" was deleted successfully.')
@@ -868,11 +850,7 @@ def feedback_delete(request, pk):
             feedback_list = feedback_list.filter(location_slug=location_filter)
 
         if search:
-            feedback_list = feedback_list.filter(
-                Q(what_went_wrong__icontains=search)
-                | Q(email__icontains=search)
-                | Q(location_slug__icontains=search)
-            )
+            feedback_list = search_queryset(feedback_list, search)
 
         html = render_to_string(
             "dashboard/_feedback_rows.html",
@@ -884,9 +862,37 @@ def feedback_delete(request, pk):
     messages.success(request, "Feedback entry deleted successfully.")
     return redirect(f"{reverse('dashboard:home')}?section=feedback")
 
+# ─────────────────────────────────────────────
+#  EMAIL OUTBOX VIEWS
+# ─────────────────────────────────────────────
+@dashboard_password_required
+def email_outbox_retry(request, pk):
+    if request.method != "POST":
+        return redirect(f"{reverse('dashboard:home')}?section=emails")
+
+    message = get_object_or_404(EmailOutboxModel, pk=pk)
+    if message.status == EmailOutboxModel.Status.SENT:
+        messages.error(request, "This email was already sent.")
+    else:
+        outbox.retry(message)
+        messages.success(request, f'Email to "{message.to_email}" queued again.')
+    return redirect(f"{reverse('dashboard:home')}?section=emails")
+
+# ─────────────────────────────────────────────
+#  METRICS
+# ─────────────────────────────────────────────
+def metrics_endpoint(request):
+    """
+    Prometheus scrape target (mingdyn/metrics.py), for dashboard sessions or
+    a bearer token.
+    """
+    if not metrics.bearer_authorized(request) and not _access_granted(request):
+        return redirect(reverse("dashboard:password_login"))
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def dashboard_password_login(request):
-    site_settings, _ = SiteSettings.objects.get_or_create(pk=1)
-    print(f'sdvsdvvsvsdvsd {request.session.get("dashboard_access_granted")}')
+    site_settings = get_site_settings()
     if request.session.get("dashboard_access_granted"):
         session_version = request.session.get("dashboard_password_version")
         if session_version == site_settings.dashboard_password_version:
@@ -1,4 +1,32 @@
+"""
+Impressum and Datenschutz.
+
+Both pages only change with a deploy, so each (page, language) is rendered
+once per process and then served from memory with a strong ETag (hash of
+the body) and a long public Cache-Control (LEGAL_CACHE_SECONDS): browsers
+and proxies revalidate rarely and get a 304 when they do. A new deploy
+restarts the processes; mingdyn/wsgi.py and asgi.py call prerender_all()
+at startup, so no visitor pays for the first render.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+PAGES = {
+    "impressum": "legal/impressum.html",
+    "datenschutz": "legal/datenschutz.html",
+}
+
+_rendered: dict[tuple[str, str], tuple[str, str]] = {}
+_lock = threading.Lock()
+
 
 def build_site_context():
     return {
@@ -46,14 +74,56 @@ def build_site_context():
         },
     }
 
-def impressum(request):
+def _page_context():
     context = build_site_context()
     context["site_nav"] = context["hero"]["nav_links"]
     context["site_logo"] = context["hero"]["logo"]
-    return render(request, "legal/impressum.html", context)
+    return context
+
+
+def prerendered(page: str) -> tuple[str, str]:
+    """
+    (html, etag) of a legal page in the active language.
+    """
+    key = (page, translation.get_language())
+    entry = _rendered.get(key)
+    if entry is None:
+        with _lock:
+            entry = _rendered.get(key)
+            if entry is None:
+                html = render_to_string(PAGES[page], _page_context())
+                entry = _rendered[key] = (html, '"{}"'.format(hashlib.sha1(html.encode()).hexdigest()))
+    return entry
+
+
+def prerender_all() -> None:
+    """
+    Render every page in every language (server startup).
+    """
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            for page in PAGES:
+                prerendered(page)
+
+
+def _legal_page(request, page: str):
+    if get_messages(request):
+        # flash messages are per visitor: render this one fresh
+        return render(request, PAGES[page], _page_context())
+
+    html, etag = prerendered(page)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(html)
+    response["ETag"] = etag
+    response["Content-Language"] = translation.get_language()
+    patch_cache_control(response, public=True, max_age=getattr(settings, "LEGAL_CACHE_SECONDS", 86400))
+    patch_vary_headers(response, ("Accept-Language", "Cookie"))
+    return response
+
+
+def impressum(request):
+    return _legal_page(request, "impressum")
 
 def datenschutz(request):
-    context = build_site_context()
-    context["site_nav"] = context["hero"]["nav_links"]
-    context["site_logo"] = context["hero"]["logo"]
-    return render(request, "legal/datenschutz.html", context)
+    return _legal_page(request, "datenschutz")
@@ -2,15 +2,17 @@ import json
 from datetime import date, timedelta
 
 from django.contrib import messages
-from django.db.models import Q
 from django.db.models.deletion import ProtectedError
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from core_settings.models import SiteSettings
+from dashboard.queries import ReservationFilter, blocked_days_context
+from dashboard.search import search_queryset
 from .forms import SiteSettingsForm
 from locations.models import Location
+from reservations import booking, catalogue, changefeed
 from reservations.models import TimeSlotModel, BlockedDayModel, ReservationModel
 from qrflow.models import Feedback  # adjust import path if different in your project
 from .forms import TimeSlotForm, BlockedDayForm, BlockedDaySlotBlockFormSet, ReservationForm, LocationForm
@@ -27,7 +29,6 @@ def dashboard_home(request):
     edit_id = request.GET.get("id")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
 
     form                = None
     slot_block_formset  = None
@@ -47,6 +48,7 @@ def dashboard_home(request):
     location_search     = ""
     slots_json          = "[]"
     today               = date.today()
+    blocked_days_ctx    = {"blocked_days": []}
 
     # ── Time Slots ──────────────────────────────────────────
     if section == "timeslots":
@@ -60,6 +62,7 @@ def dashboard_home(request):
 
     # ── Blocked Days ─────────────────────────────────────────
     elif section == "blocked-days":
+        blocked_days_ctx = blocked_days_context(request, today)
         if mode == "create":
             form = BlockedDayForm()
             slot_block_formset = BlockedDaySlotBlockFormSet(prefix="slot_blocks")
@@ -83,13 +86,7 @@ def dashboard_home(request):
         locations_list = Location.objects.all().order_by("name")
 
         if location_search:
-            locations_list = locations_list.filter(
-                Q(name__icontains=location_search)
-                | Q(slug__icontains=location_search)
-                | Q(address__icontains=location_search)
-                | Q(phone__icontains=location_search)
-                | Q(email__icontains=location_search)
-            )
+            locations_list = search_queryset(locations_list, location_search)
 
         if mode == "create":
             form = LocationForm()
@@ -101,41 +98,15 @@ def dashboard_home(request):
 
     # ── Reservations ─────────────────────────────────────────
     elif section == "reservations":
-        date_filter = request.GET.get("date_filter", "upcoming")
-        slot_filter = request.GET.get("slot_filter", "")
-        search      = request.GET.get("search", "")
-
-        reservations = ReservationModel.objects.select_related("slot").order_by("-date", "-time")
-
-        if date_filter == "today":
-            reservations = reservations.filter(date=today)
-        elif date_filter == "upcoming":
-            reservations = reservations.filter(date__gte=today)
-        elif date_filter == "past":
-            reservations = reservations.filter(date__lt=today)
+        filters     = ReservationFilter.from_request(request, today)
+        date_filter = filters.date_filter
+        slot_filter = filters.slot_filter
+        search      = filters.search
+        cursor      = request.GET.get("after", "")
 
-        if slot_filter:
-            reservations = reservations.filter(slot_id=slot_filter)
+        reservations, next_cursor = filters.page(cursor)
 
-        if search:
-            reservations = reservations.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-            )
-
-        slots_data = list(
-            TimeSlotModel.objects.filter(is_active=True)
-            .values("id", "start_time", "end_time")
-            .order_by("sort_order", "start_time")
-        )
-        slots_json = json.dumps({
-            str(s["id"]): {
-                "start": s["start_time"].strftime("%H:%M"),
-                "end":   s["end_time"].strftime("%H:%M"),
-            }
-            for s in slots_data
-        })
+        slots_json = json.dumps(catalogue.slot_ranges())
 
         if mode == "create":
             form = ReservationForm()
@@ -148,10 +119,13 @@ def dashboard_home(request):
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             html = render_to_string(
                 "dashboard/_reservation_rows.html",
-                {"reservations": reservations, "today": today},
+                {"reservations": reservations, "next_cursor": next_cursor, "today": today},
                 request=request,
             )
-            return JsonResponse({"html": html, "count": reservations.count()})
+            payload = {"html": html, "next_cursor": next_cursor}
+            if not cursor:
+                payload["count"] = filters.count()
+            return JsonResponse(payload)
 
     # ── Feedback ─────────────────────────────────────────────
     elif section == "feedback":
@@ -175,11 +149,7 @@ def dashboard_home(request):
 
         # Search
         if search:
-            feedback_list = feedback_list.filter(
-                Q(what_went_wrong__icontains=search)
-                | Q(email__icontains=search)
-                | Q(location_slug__icontains=search)
-            )
+            feedback_list = search_queryset(feedback_list, search)
 
         # Detail view — show selected feedback in right panel
         if mode == "view" and edit_id:
@@ -211,7 +181,6 @@ def dashboard_home(request):
             "mode":             mode,
             "site_settings": site_settings,
             "slots":            slots,
-            "blocked_days":     blocked_days,
             "form":             None,
             "slot_block_formset": None,
             "selected_slot":    None,
@@ -236,7 +205,7 @@ def dashboard_home(request):
         "section":           section,
         "mode":              mode,
         "slots":             slots,
-        "blocked_days":      blocked_days,
+        **blocked_days_ctx,
         "form":              form,
         "slot_block_formset": slot_block_formset,
         "selected_slot":     selected_slot,
@@ -273,12 +242,11 @@ def timeslot_create(request):
         return redirect(f"{reverse('dashboard:home')}?section=timeslots")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "timeslots", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -299,12 +267,11 @@ def timeslot_update(request, pk):
         return redirect(f"{reverse('dashboard:home')}?section=timeslots")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "timeslots", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": slot, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -361,12 +328,11 @@ def blocked_day_create(request):
         return redirect(f"{reverse('dashboard:home')}?section=blocked-days")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "blocked-days", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots, **blocked_days_context(request),
         "form": form, "slot_block_formset": formset,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "feedback_list": None,
@@ -390,12 +356,11 @@ def blocked_day_update(request, pk):
         return redirect(f"{reverse('dashboard:home')}?section=blocked-days")
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "blocked-days", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots, **blocked_days_context(request),
         "form": form, "slot_block_formset": formset,
         "selected_slot": None, "selected_blocked_day": blocked_day,
         "reservations": None, "feedback_list": None,
@@ -428,36 +393,29 @@ def reservation_create(request):
 
     form = ReservationForm(request.POST)
     if form.is_valid():
-        form.save()
-        messages.success(request, "Reservation created successfully.")
-        return redirect(_reservation_list_url())
+        try:
+            booking.save(form.save(commit=False))
+        except booking.BookingError as e:
+            form.add_booking_error(e)
+        else:
+            messages.success(request, "Reservation created successfully.")
+            return redirect(_reservation_list_url())
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
-    reservations = ReservationModel.objects.select_related("slot").filter(
-        date__gte=date.today()
-    ).order_by("-date", "-time")
+    filters      = ReservationFilter.from_request(request)
     messages.error(request, "Please fix the form errors and try again.")
 
-    slots_data = list(
-        TimeSlotModel.objects.filter(is_active=True)
-        .values("id", "start_time", "end_time")
-        .order_by("sort_order", "start_time")
-    )
-    slots_json = json.dumps({
-        str(s["id"]): {"start": s["start_time"].strftime("%H:%M"), "end": s["end_time"].strftime("%H:%M")}
-        for s in slots_data
-    })
+    slots_json = json.dumps(catalogue.slot_ranges())
 
     return render(request, "dashboard/index.html", {
         "section": "reservations", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
-        "reservations": reservations, "selected_reservation": None,
+        "reservations": filters.page()[0], "selected_reservation": None,
         "feedback_list": None, "selected_feedback": None,
-        "date_filter": "upcoming", "slot_filter": "", "search": "",
-        "slots_json": slots_json, "today": date.today(),
+        **filters.context(),
+        "slots_json": slots_json, "today": filters.today,
     })
 
 
@@ -469,36 +427,29 @@ def reservation_update(request, pk):
 
     form = ReservationForm(request.POST, instance=reservation)
     if form.is_valid():
-        form.save()
-        messages.success(request, f'Reservation for "{reservation.name}" updated successfully.')
-        return redirect(_reservation_list_url())
+        try:
+            booking.save(form.save(commit=False))
+        except booking.BookingError as e:
+            form.add_booking_error(e)
+        else:
+            messages.success(request, f'Reservation for "{reservation.name}" updated successfully.')
+            return redirect(_reservation_list_url())
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
-    reservations = ReservationModel.objects.select_related("slot").filter(
-        date__gte=date.today()
-    ).order_by("-date", "-time")
+    filters      = ReservationFilter.from_request(request)
     messages.error(request, "Please fix the form errors and try again.")
 
-    slots_data = list(
-        TimeSlotModel.objects.filter(is_active=True)
-        .values("id", "start_time", "end_time")
-        .order_by("sort_order", "start_time")
-    )
-    slots_json = json.dumps({
-        str(s["id"]): {"start": s["start_time"].strftime("%H:%M"), "end": s["end_time"].strftime("%H:%M")}
-        for s in slots_data
-    })
+    slots_json = json.dumps(catalogue.slot_ranges())
 
     return render(request, "dashboard/index.html", {
         "section": "reservations", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
-        "reservations": reservations, "selected_reservation": reservation,
+        "reservations": filters.page()[0], "selected_reservation": reservation,
         "feedback_list": None, "selected_feedback": None,
-        "date_filter": "upcoming", "slot_filter": "", "search": "",
-        "slots_json": slots_json, "today": date.today(),
+        **filters.context(),
+        "slots_json": slots_json, "today": filters.today,
     })
 
 
@@ -511,42 +462,15 @@ def reservation_delete(request, pk):
     reservation.delete()
 
     if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        today       = date.today()
-        date_filter = request.GET.get("date_filter", "upcoming")
-        slot_filter = request.GET.get("slot_filter", "")
-        search      = request.GET.get("search", "").strip()
-
-        reservations = ReservationModel.objects.select_related("slot")
-
-        if date_filter == "today":
-            reservations = reservations.filter(date=today)
-        elif date_filter == "upcoming":
-            reservations = reservations.filter(date__gte=today)
-        elif date_filter == "past":
-            reservations = reservations.filter(date__lt=today)
-
-        if slot_filter:
-            reservations = reservations.filter(slot_id=slot_filter)
-
-        if search:
-            reservations = reservations.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-            )
-
-        reservations = reservations.order_by("date", "time")
-
-        html = render_to_string(
-            "dashboard/_reservation_rows.html",
-            {"reservations": reservations, "today": today},
-            request=request,
-        )
+        # same single-row answer as the dashboard: the deleted row goes away
         return JsonResponse({
             "success": True,
             "message": f'Reservation for "{name}" was deleted successfully.',
-            "html":    html,
-            "count":   reservations.count(),
+            "id":      pk,
+            "html":    "",
+            "row":     None,
+            "removed": True,
+            "version": changefeed.current_version(),
         })
 
     messages.success(request, f'Reservation for "{name}" was deleted successfully.')
@@ -568,13 +492,12 @@ def location_create(request):
         return redirect(_location_list_url())
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     locations_list = Location.objects.all().order_by("name")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "locations", "mode": "create",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "selected_reservation": None,
@@ -597,13 +520,12 @@ def location_update(request, pk):
         return redirect(_location_list_url())
 
     slots        = TimeSlotModel.objects.all().order_by("sort_order", "start_time")
-    blocked_days = BlockedDayModel.objects.prefetch_related("slot_blocks__slot").order_by("-date")
     locations_list = Location.objects.all().order_by("name")
     messages.error(request, "Please fix the form errors and try again.")
 
     return render(request, "dashboard/index.html", {
         "section": "locations", "mode": "edit",
-        "slots": slots, "blocked_days": blocked_days,
+        "slots": slots,
         "form": form, "slot_block_formset": None,
         "selected_slot": None, "selected_blocked_day": None,
         "reservations": None, "selected_reservation": None,
@@ -654,11 +576,7 @@ def feedback_delete(request, pk):
             feedback_list = feedback_list.filter(location_slug=location_filter)
 
         if search:
-            feedback_list = feedback_list.filter(
-                Q(what_went_wrong__icontains=search)
-                | Q(email__icontains=search)
-                | Q(location_slug__icontains=search)
-            )
+            feedback_list = search_queryset(feedback_list, search)
 
         html = render_to_string(
             "dashboard/_feedback_rows.html",
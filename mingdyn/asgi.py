@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mingdyn.settings')
 
 application = get_asgi_application()
+
+# legal pages never change between deploys: render them before the first visitor
+from legal.views import prerender_all  # noqa: E402
+
+prerender_all()
@@ -0,0 +1,32 @@
+"""
+Version keys for caches that are invalidated by bumping a counter.
+
+A cached value is stored under a key that contains the current version, so
+one incr() drops every entry at once. The version key itself never expires,
+but the cache may still evict it (FileBasedCache culls random entries once
+MAX_ENTRIES is reached; LRU backends drop it under memory pressure). A lost
+key is therefore recreated from the clock in nanoseconds instead of
+restarting at 1, so it can never match a number handed out before.
+"""
+from __future__ import annotations
+
+import time
+
+from django.core.cache import cache
+
+
+def current(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)  # another process may have won add()
+    return version
+
+
+def bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted: any fresh clock value is newer than the lost one
+        cache.set(key, time.time_ns(), None)
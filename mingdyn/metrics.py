@@ -0,0 +1,211 @@
+"""
+In-process metrics in the Prometheus text format.
+
+RequestMetricsMiddleware (mingdyn/middleware.py) records per-view latency,
+query counts and DB time. reservations.gas_client records the webhook
+latency. The dashboard serves everything at /metrics.
+
+The registry lives in each process. Under several gunicorn workers every
+scrape reads the worker that answered it. The `pid` label keeps their
+series apart; aggregate with `sum without (pid)`.
+
+GAS calls happen in the outbox worker (`manage.py process_email_outbox`),
+never in the web process that serves /metrics. Their histogram is a
+SharedHistogram: each process copies its values to the shared cache, and
+/metrics reads the copies of every process.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REGISTRY: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=(), pid=None) -> str:
+    pairs = [*zip(names, values), ("pid", pid or os.getpid()), *extra]
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    def samples(self):
+        yield from self._series(self.snapshot())
+
+    def _series(self, values: dict, pid=None):
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), state[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(float(bound))
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, [('le', le)], pid)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key, pid=pid)} {_number(state[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key, pid=pid)} {cumulative}"
+
+
+class SharedHistogram(Histogram):
+    """
+    A histogram recorded outside the web processes. observe() copies this
+    process's values to the shared cache (at most every
+    METRICS_SHARED_PUBLISH_SECONDS; publish_shared() forces it), and
+    samples() returns the copies of every process that published within
+    METRICS_SHARED_TTL_SECONDS, each under its own pid.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._index_key = f"metrics:{self.name}:pids"
+        self._published_at = None
+
+    def _key(self, pid) -> str:
+        return f"metrics:{self.name}:{pid}"
+
+    def observe(self, value: float, **labels) -> None:
+        super().observe(value, **labels)
+        self.publish()
+
+    def publish(self, force: bool = False) -> None:
+        now = time.monotonic()
+        interval = getattr(settings, "METRICS_SHARED_PUBLISH_SECONDS", 10)
+        if not force and self._published_at is not None and now - self._published_at < interval:
+            return
+        self._published_at = now
+        pid = os.getpid()
+        try:
+            cache.set(self._key(pid), self.snapshot(), getattr(settings, "METRICS_SHARED_TTL_SECONDS", 3600))
+            pids = cache.get(self._index_key) or []
+            alive = set(cache.get_many([self._key(p) for p in pids]))
+            # read-modify-write: a pid lost to a concurrent publish is re-added by its next one
+            pids = [p for p in pids if self._key(p) in alive and p != pid] + [pid]
+            cache.set(self._index_key, pids, None)
+        except Exception:
+            # metrics must never break the work they measure
+            logger.warning("Could not publish %s to the shared cache", self.name, exc_info=True)
+
+    def samples(self):
+        pids = cache.get(self._index_key) or []
+        copies = cache.get_many([self._key(pid) for pid in pids])
+        for pid in sorted(pids):
+            values = copies.get(self._key(pid))
+            if values:
+                yield from self._series(values, pid)
+
+
+def bearer_authorized(request) -> bool:
+    """
+    True if the request carries "Authorization: Bearer <METRICS_BEARER_TOKEN>"
+    (for the Prometheus scraper, which has no dashboard session).
+    """
+    token = getattr(settings, "METRICS_BEARER_TOKEN", "")
+    return bool(token) and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def publish_shared(force: bool = False) -> None:
+    """
+    Refresh this process's copy of every SharedHistogram (long-running
+    workers call it between rounds, so an idle worker's series stays up).
+    """
+    for metric in REGISTRY:
+        if isinstance(metric, SharedHistogram):
+            metric.publish(force)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# Instruments
+# =========================
+REQUEST_LATENCY = Histogram(
+    "mingdyn_http_request_duration_seconds", "Request latency by view.",
+    ("view", "method", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "mingdyn_http_request_db_queries", "Database queries per request by view.",
+    ("view",), buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Counter(
+    "mingdyn_http_request_db_seconds_total", "Time spent in database queries by view.",
+    ("view",),
+)
+SLOW_REQUESTS = Counter(
+    "mingdyn_http_slow_requests_total", "Requests slower than METRICS_SLOW_REQUEST_SECONDS by view.",
+    ("view",),
+)
+GAS_LATENCY = SharedHistogram(
+    "mingdyn_gas_request_duration_seconds", "Google Apps Script webhook call latency (outbox workers).",
+    ("outcome",),
+)
@@ -0,0 +1,102 @@
+"""
+Per-request timing and query instrumentation (see mingdyn/metrics.py).
+
+Every request records its latency by view name, method and status. Sync
+requests also record the number and total duration of their database
+queries, captured with connection.execute_wrapper() on every configured
+database. A request slower than METRICS_SLOW_REQUEST_SECONDS is logged
+with its METRICS_SLOW_REQUEST_TOP_QUERIES slowest queries.
+
+Async views (the dashboard event stream) are timed up to the start of
+their response. Their queries run in worker threads and are not counted.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.queries = []  # (seconds, sql)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for seconds, _sql in self.queries)
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name or match._func_path) if match else "<unresolved>"
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "METRICS_ENABLED", True)
+        self.slow_seconds = getattr(settings, "METRICS_SLOW_REQUEST_SECONDS", 1.0)
+        self.top_queries = getattr(settings, "METRICS_SLOW_REQUEST_TOP_QUERIES", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, None)
+        return response
+
+    def _record(self, request, response, elapsed: float, recorder) -> None:
+        view = _view_name(request)
+        metrics.REQUEST_LATENCY.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        if recorder is not None:
+            metrics.REQUEST_QUERIES.observe(len(recorder.queries), view=view)
+            metrics.REQUEST_DB_SECONDS.inc(recorder.seconds, view=view)
+
+        if elapsed < self.slow_seconds:
+            return
+        metrics.SLOW_REQUESTS.inc(view=view)
+        if recorder is None:
+            logger.warning("Slow request %s %s (%s): %.3f s", request.method, request.path, view, elapsed)
+            return
+        top = sorted(recorder.queries, key=lambda q: q[0], reverse=True)[:self.top_queries]
+        logger.warning(
+            "Slow request %s %s (%s): %.3f s, %d queries in %.3f s%s",
+            request.method, request.path, view, elapsed, len(recorder.queries), recorder.seconds,
+            "".join(f"\n  {seconds * 1000:8.1f} ms  {sql[:500]}" for seconds, sql in top),
+        )
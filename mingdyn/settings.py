@@ -52,8 +52,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'mingsite',  # before staticfiles: its collectstatic builds the responsive images first
     'django.contrib.staticfiles',
-    'mingsite',
     'locations',
     'menus',
     'gallery',
@@ -66,6 +66,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "mingdyn.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -168,7 +169,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 TEMPLATES[0]['DIRS'] = [BASE_DIR / 'templates']
 
-STATICFILES_DIRS = [BASE_DIR / 'static']  # where we keep source static files
+STATICFILES_DIRS = [
+    BASE_DIR / 'static',        # where we keep source static files
+    BASE_DIR / 'static_build',  # generated: manage.py build_responsive_images
+]
 
 DEBUG = os.getenv('DJANGO_DEBUG', 'False') == 'True'
 
@@ -184,16 +188,128 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_ROOT = os.path.join(BASE_DIR, "static_collected")
 MEDIA_ROOT  = os.path.join(BASE_DIR, "media")
 
+# Shared cache for all gunicorn workers (availability, rate limits, version keys, ...).
+# The file cache is a single-host fallback: past MAX_ENTRIES it deletes a random third
+# of its files, including rate-limit buckets and idempotency keys. Production should
+# point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at redis or memcached.
+# Evicted version keys are safe either way (mingdyn/cacheversion.py).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", os.path.join(BASE_DIR, ".django_cache")),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith("FileBasedCache"):
+    # redis/memcached pass OPTIONS to their client, which rejects MAX_ENTRIES
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("DJANGO_CACHE_MAX_ENTRIES", "20000"))}
+
 # Cookie name for verified browser session
 RESV_SESSION_COOKIE_NAME = "ming_resv_session"
 
 # How long trusted browser stays logged in
 RESV_SESSION_DAYS_VALID = 30
 
+# Expired / revoked sessions are kept this long, then purged by
+# `manage.py purge_email_sessions` (cron)
+RESV_SESSION_RETENTION_DAYS = 7
+
+# Rate limits for the public booking / magic-link endpoints
+# (reservations/ratelimit.py): {scope: {"ip"|"email": (burst, per_seconds)}}
+RESV_RATE_LIMITS = {
+    "magic_link": {"ip": (10, 600), "email": (3, 600)},
+    "reservation": {"ip": (10, 600), "email": (5, 3600)},
+}
+# identical submissions within this window are answered from the first one
+RESV_IDEMPOTENCY_SECONDS = 60
+# proxies in front of Django that append to X-Forwarded-For (nginx)
+RESV_RATELIMIT_TRUSTED_PROXIES = 1
+
+# Magic-link cookie verification cache (reservations/auth.py)
+RESV_AUTH_CACHE_SECONDS = 30
+RESV_AUTH_CACHE_SIZE = 1024
+RESV_AUTH_SHARED_CACHE = True
+
+# Dashboard "today" cards (dashboard/overview.py)
+DASHBOARD_OVERVIEW_CACHE_SECONDS = 60
+
+# Blocked-days list page size (dashboard/queries.py)
+DASHBOARD_BLOCKED_DAYS_PER_PAGE = 25
+
+# Reservation list page size and calendar window (dashboard/queries.py)
+DASHBOARD_RESERVATIONS_PER_PAGE = 50
+DASHBOARD_CALENDAR_MAX_DAYS = 42
+
+# Live reservation list (reservations/changefeed.py)
+DASHBOARD_CHANGE_FEED_LIMIT = 200
+DASHBOARD_CHANGE_FEED_RETENTION_HOURS = 24
+DASHBOARD_CHANGE_FEED_POLL_SECONDS = 10
+
+# Live reservation events over SSE (reservations/events.py, ASGI only).
+# Use "reservations.events.ChangeFeedBroker" with more than one worker process.
+RESV_EVENTS_BROKER = os.getenv("RESV_EVENTS_BROKER", "reservations.events.InProcessBroker")
+RESV_EVENTS_POLL_SECONDS = 2
+RESV_EVENTS_HEARTBEAT_SECONDS = 15
+RESV_EVENTS_MAX_SECONDS = 300
+
+# Public homepage page cache (mingsite/views.py); invalidated on settings/slot changes
+HOMEPAGE_CACHE_SECONDS = 3600
+
+# Impressum / Datenschutz browser and proxy cache lifetime (legal/views.py)
+LEGAL_CACHE_SECONDS = 86400
+
+# Responsive images (mingsite/images.py): AVIF/WebP variants built into
+# STATICFILES_DIRS[1] by collectstatic, and for uploaded gallery/location images
+RESPONSIVE_IMAGES_BUILD_DIR = STATICFILES_DIRS[1]
+RESPONSIVE_IMAGE_WIDTHS = (480, 960, 1600)
+RESPONSIVE_STATIC_IMAGES = [
+    "mingsite/img/hero-3.jpg",
+    "mingsite/img/bg-floral.jpg",
+    "mingsite/img/bg-texture-white.png",
+    "mingsite/img/bg-texture-red.jpg",
+    "mingsite/img/bg-delivery.jpg",
+]
+RESPONSIVE_STYLESHEETS = ["mingsite/css/style.css"]
+
+# Public seat map (/reservations/availability/)
+RESV_AVAILABILITY_CACHE_SECONDS = 300
+RESV_AVAILABILITY_MAX_DAYS = 62
+
 # Google Apps Script webhook (you create this URL)
-GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL = "https://script.google.com/macros/s/AKfycbyEqtykwvs4Vej2tq6mPQAdc1le6XT6r1JT9UQaaaV8fbkoJPfLrQQ6uwRWNOKya3R0YA/exec"
+GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL = os.getenv(
+    "GAS_EMAIL_WEBHOOK_URL",
+    "https://script.google.com/macros/s/AKfycbyEqtykwvs4Vej2tq6mPQAdc1le6XT6r1JT9UQaaaV8fbkoJPfLrQQ6uwRWNOKya3R0YA/exec",
+)
 
 # Optional: shared secret to prevent abuse
 GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET = "change-me"
 
+# GAS client (reservations/gas_client.py)
+GAS_CONNECT_TIMEOUT = 3.05
+GAS_READ_TIMEOUT = 12
+GAS_POOL_SIZE = 4
+GAS_BREAKER_FAILURES = 5
+GAS_BREAKER_RESET_SECONDS = 60
+# bulk notices (day closures) per webhook call; raise it only once the deployed Apps
+# Script accepts {"messages": [...]} (reservations/gas_client.py). 1 = no batching
+GAS_BATCH_SIZE = 1
+
+# Email outbox (manage.py process_email_outbox)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_BACKOFF_SECONDS = 30
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = 3600
+EMAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS = 300
+
+# Booking service (reservations/booking.py): attempts before giving up on a contended slot
+BOOKING_MAX_RETRIES = 5
+
+# Request metrics (mingdyn/middleware.py), served at /metrics to dashboard
+# sessions or with "Authorization: Bearer <METRICS_BEARER_TOKEN>"
+METRICS_ENABLED = True
+METRICS_SLOW_REQUEST_SECONDS = 1.0
+METRICS_SLOW_REQUEST_TOP_QUERIES = 5
+METRICS_BEARER_TOKEN = os.getenv("METRICS_BEARER_TOKEN", "")
+# metrics recorded by the outbox worker reach /metrics through the shared cache
+METRICS_SHARED_PUBLISH_SECONDS = 10
+METRICS_SHARED_TTL_SECONDS = 3600
+
 SECURE_SSL_REDIRECT = False
\ No newline at end of file
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.i18n import JavaScriptCatalog
+from dashboard.views import metrics_endpoint
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
     path('admin/', admin.site.urls),
@@ -16,6 +17,7 @@ urlpatterns = [
     path("", include("qrflow.urls")),
     path("dashboard/", include(("dashboard.urls", "dashboard"), namespace="dashboard")),
     path("jsi18n/", JavaScriptCatalog.as_view(), name="javascript-catalog"),
+    path("metrics", metrics_endpoint, name="metrics"),
 ]
 
 if settings.DEBUG:
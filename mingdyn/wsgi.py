@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mingdyn.settings')
 
 application = get_wsgi_application()
+
+# legal pages never change between deploys: render them before the first visitor
+from legal.views import prerender_all  # noqa: E402
+
+prerender_all()
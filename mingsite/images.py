@@ -0,0 +1,227 @@
+"""
+Responsive images for the public site.
+
+Static assets (RESPONSIVE_STATIC_IMAGES) are converted at build time by
+`manage.py build_responsive_images`, which `collectstatic` runs first:
+
+- every image is resized to each RESPONSIVE_IMAGE_WIDTHS width (never
+  upscaled) and saved as AVIF and WebP under <dir>/responsive/ in
+  RESPONSIVE_IMAGES_BUILD_DIR (a STATICFILES_DIRS entry, not committed);
+- a manifest (MANIFEST_NAME) lists the variants for the template tags in
+  mingsite/templatetags/responsive_images.py; without it the tags fall
+  back to the original files;
+- background images in RESPONSIVE_STYLESHEETS are rewritten into
+  mingsite/css/responsive.css: one image-set() override per width in a
+  max-width media query. Browsers without image-set() ignore it and keep
+  the original rule.
+
+Uploaded images (GalleryImage.image, Location.hero_image) get the same
+variants in the media storage when they are saved (see mingsite/signals.py).
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import posixpath
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "mingsite/responsive.json"
+STYLESHEET_NAME = "mingsite/css/responsive.css"
+
+# (format, Pillow encoder options, MIME type), preferred first
+FORMATS = (
+    ("avif", {"quality": 55}, "image/avif"),
+    ("webp", {"quality": 80, "method": 6}, "image/webp"),
+)
+
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+
+def widths() -> tuple[int, ...]:
+    return tuple(sorted(getattr(settings, "RESPONSIVE_IMAGE_WIDTHS", (480, 960, 1600))))
+
+
+def formats():
+    return [f for f in FORMATS if features.check(f[0])]
+
+
+def variant_name(name: str, width: int, fmt: str) -> str:
+    """mingsite/img/hero-3.jpg -> mingsite/img/responsive/hero-3-960.webp"""
+    folder, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(folder, "responsive", f"{stem}-{width}.{fmt}")
+
+
+def render_variants(image: Image.Image):
+    """
+    Yield (width, fmt, bytes) for every configured width below the image's
+    own width, plus the image at its own width (capped at the widest). An
+    image narrower than every width is saved as is under the smallest one.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+    targets = [w for w in widths() if w < image.width] + [min(image.width, widths()[-1])]
+    for width in sorted(set(targets)):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, options, _mime in formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), **options)
+            yield max(width, widths()[0]), fmt, buffer.getvalue()
+
+
+# =========================
+# Build step (static files)
+# =========================
+def _build_dir() -> Path:
+    return Path(getattr(settings, "RESPONSIVE_IMAGES_BUILD_DIR", Path(settings.BASE_DIR) / "static_build"))
+
+
+def build_static_images(stdout=None) -> dict:
+    """
+    Write the variants of RESPONSIVE_STATIC_IMAGES, the manifest and the
+    background stylesheet into RESPONSIVE_IMAGES_BUILD_DIR. Returns the
+    manifest: {static name: {"type": mime, fmt: [[width, variant name], ...]}}.
+    """
+    out = _build_dir()
+    manifest = {}
+    for name in getattr(settings, "RESPONSIVE_STATIC_IMAGES", ()):
+        source = finders.find(name)
+        if not source:
+            logger.warning("Responsive image source %s not found", name)
+            continue
+
+        entry = {"type": MIME_TYPES.get(posixpath.splitext(name)[1].lower(), "image/jpeg")}
+        with Image.open(source) as image:
+            for width, fmt, data in render_variants(image):
+                target = out / variant_name(name, width, fmt)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+                entry.setdefault(fmt, []).append([width, variant_name(name, width, fmt)])
+        manifest[name] = entry
+        if stdout:
+            sizes = ", ".join(f"{fmt} {len(v)}x" for fmt, v in entry.items() if fmt != "type")
+            stdout.write(f"{name}: {sizes}")
+
+    (out / MANIFEST_NAME).parent.mkdir(parents=True, exist_ok=True)
+    (out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    (out / STYLESHEET_NAME).parent.mkdir(parents=True, exist_ok=True)
+    (out / STYLESHEET_NAME).write_text(build_stylesheet(manifest))
+    load_manifest.cache_clear()
+    return manifest
+
+
+# top-level rules only (selector at column 0, two-space indented background)
+CSS_RULE = re.compile(r"^([^\s@}/][^{]*)\{([^}]*)\}", re.M)
+CSS_BACKGROUND = re.compile(r"^  background:([^;]*);", re.M)
+CSS_URL = re.compile(r"url\((['\"]?)([^'\")]+)\1\)")
+
+
+def variant_widths(manifest_entry: dict) -> list[int]:
+    return sorted({w for fmt, *_ in formats() for w, _name in manifest_entry.get(fmt, [])})
+
+
+def image_set(manifest_entry: dict, width: int, relative_to: str, original_url: str) -> str:
+    """image-set() of the `width` variants (preferred format first), the original last."""
+    candidates = []
+    for fmt, _options, mime in formats():
+        name = dict(manifest_entry.get(fmt, [])).get(width)
+        if name:
+            candidates.append(f'url("{posixpath.relpath(name, relative_to)}") type("{mime}")')
+    candidates.append(f'url("{original_url}") type("{manifest_entry["type"]}")')
+    return f"image-set({', '.join(candidates)})"
+
+
+def build_stylesheet(manifest: dict) -> str:
+    css_dir = posixpath.dirname(STYLESHEET_NAME)
+    rules = {width: [] for width in widths()}
+    for stylesheet in getattr(settings, "RESPONSIVE_STYLESHEETS", ()):
+        source = finders.find(stylesheet)
+        if not source:
+            continue
+        base = posixpath.dirname(stylesheet)
+        for selector, body in CSS_RULE.findall(Path(source).read_text()):
+            for declaration in CSS_BACKGROUND.findall(body):
+                match = CSS_URL.search(declaration)
+                name = posixpath.normpath(posixpath.join(base, match.group(2))) if match else None
+                entry = manifest.get(name)
+                if not entry:
+                    continue
+                available = variant_widths(entry)
+                original = posixpath.relpath(name, css_dir)
+                for width in rules:
+                    # the narrowest variant covering this breakpoint
+                    chosen = next((w for w in available if w >= width), available[-1])
+                    rewritten = CSS_URL.sub(lambda _m: image_set(entry, chosen, css_dir, original), declaration, count=1)
+                    rules[width].append(f"  {selector.strip()} {{ background:{rewritten}; }}")
+
+    lines = ["/* generated by manage.py build_responsive_images, do not edit */"]
+    for width in sorted(rules, reverse=True):
+        if rules[width]:
+            lines.append(f"@media (max-width: {width}px) {{")
+            lines.extend(rules[width])
+            lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict:
+    path = _build_dir() / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+# =========================
+# Uploads (media storage)
+# =========================
+def generate_upload_variants(field_file) -> list[str]:
+    """
+    Save the variants of an uploaded image next to it (<dir>/responsive/)
+    in its storage. Skipped when they already exist, so re-saving the row
+    is cheap.
+    """
+    if not field_file:
+        return []
+    storage = field_file.storage
+    smallest = variant_name(field_file.name, widths()[0], formats()[-1][0]) if formats() else None
+    if smallest is None or storage.exists(smallest):
+        return []
+
+    saved = []
+    with field_file.open("rb") as f, Image.open(f) as image:
+        for width, fmt, data in render_variants(image):
+            name = variant_name(field_file.name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            saved.append(storage.save(name, ContentFile(data)))
+    return saved
+
+
+def upload_variant_url(field_file, width: int) -> str:
+    """
+    URL of the largest variant up to `width` of an uploaded image, or the
+    original's URL if it has none.
+    """
+    if not field_file:
+        return ""
+    storage = field_file.storage
+    for fmt, _options, _mime in reversed(formats()):  # WebP: widest support
+        for w in sorted((w for w in widths() if w <= width), reverse=True) or [widths()[0]]:
+            name = variant_name(field_file.name, w, fmt)
+            if storage.exists(name):
+                return storage.url(name)
+    return field_file.url
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from mingsite import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Build AVIF/WebP variants of RESPONSIVE_STATIC_IMAGES at every "
+        "RESPONSIVE_IMAGE_WIDTHS width, the responsive manifest and the "
+        "background stylesheet (run by collectstatic)."
+    )
+
+    def handle(self, *args, **options):
+        manifest = images.build_static_images(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Built responsive variants for {len(manifest)} image(s)."))
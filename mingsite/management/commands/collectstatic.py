@@ -0,0 +1,19 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.management import call_command
+
+
+class Command(CollectStaticCommand):
+    """
+    collectstatic that first builds the responsive image variants, so they
+    are collected with everything else.
+    """
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--skip-responsive-images", action="store_true",
+                            help="Do not rebuild the responsive image variants first.")
+
+    def handle(self, **options):
+        if not options["skip_responsive_images"] and not options["dry_run"]:
+            call_command("build_responsive_images", verbosity=options["verbosity"])
+        return super().handle(**options)
@@ -0,0 +1,37 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from locations.models import Location as DashboardLocation
+
+from . import images
+from .models import GalleryImage, Location
+
+logger = logging.getLogger(__name__)
+
+# model -> image field that gets responsive variants on upload
+RESPONSIVE_UPLOADS = {
+    GalleryImage: "image",
+    Location: "hero_image",
+    DashboardLocation: "hero_image",
+}
+
+
+def _generate(field_file):
+    try:
+        images.generate_upload_variants(field_file)
+    except Exception:
+        # the upload itself is saved; pages fall back to the original
+        logger.warning("Could not build responsive variants for %s", field_file.name, exc_info=True)
+
+
+@receiver(post_save)
+def image_uploaded(sender, instance, raw=False, **kwargs):
+    field = RESPONSIVE_UPLOADS.get(sender)
+    if raw or not field:
+        return
+    field_file = getattr(instance, field)
+    if field_file:
+        transaction.on_commit(lambda: _generate(field_file))
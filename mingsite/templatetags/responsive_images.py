@@ -0,0 +1,50 @@
+"""
+Template tags for the responsive variants built by mingsite/images.py.
+
+    {% load responsive_images %}
+    {% responsive_stylesheet %}                   <link> to the generated background overrides
+    {% responsive_img "mingsite/img/x.jpg" alt="…" sizes="100vw" %}
+    {{ location.hero_image|thumbnail_url:480 }}   uploaded image variant
+
+Every tag falls back to the original file when no variants were built.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from mingsite import images
+
+register = template.Library()
+
+
+def _srcset(entry: dict, fmt: str) -> str:
+    return ", ".join(f"{static(name)} {width}w" for width, name in entry.get(fmt, []))
+
+
+@register.simple_tag
+def responsive_stylesheet():
+    if not images.load_manifest():
+        return ""
+    return format_html('<link rel="stylesheet" href="{}">', static(images.STYLESHEET_NAME))
+
+
+@register.simple_tag
+def responsive_img(name, alt="", sizes="100vw", **attrs):
+    """
+    <picture> with one <source> per built format and the original as <img>.
+    """
+    extra = format_html_join("", ' {}="{}"', attrs.items())
+    img = format_html('<img src="{}" alt="{}"{}>', static(name), alt, extra)
+    entry = images.load_manifest().get(name)
+    if not entry:
+        return img
+    sources = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, _srcset(entry, fmt), sizes) for fmt, _options, mime in images.formats() if entry.get(fmt)),
+    )
+    return format_html("<picture>{}{}</picture>", sources, img)
+
+
+@register.filter
+def thumbnail_url(field_file, width=480):
+    return images.upload_variant_url(field_file, int(width))
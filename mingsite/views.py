@@ -1,10 +1,39 @@
+"""
+Public homepage.
+
+The page is the same for every visitor in a language, so it is rendered
+once per (language, settings version, slot catalogue version) and kept in
+the shared cache. The only per-visitor part, the CSRF token of the booking
+form, is rendered as a placeholder and filled in on the way out. Saving
+SiteSettings or any time slot changes a version, so the next request
+renders a fresh page; HOMEPAGE_CACHE_SECONDS only bounds how long an
+unused copy lingers.
+
+Responses carry an ETag and Last-Modified for the cached copy (the ETag
+also covers the visitor's CSRF cookie, so a stale token is never reused),
+so repeat visitors revalidate and get a 304.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 
-from core_settings.models import SiteSettings
-from reservations.models import TimeSlotModel
+from core_settings import cache as site_settings_cache
+from core_settings.cache import get_site_settings
+from reservations import catalogue
 
+CSRF_PLACEHOLDER = "__homepage_csrf_token__"
 
-def index(request):
+
+def homepage_context() -> dict:
     context = {
         "hero": {
             "headline": "Ming Dynastie",
@@ -270,13 +299,55 @@ def index(request):
     }
     context["site_nav"] = context["hero"]["nav_links"]
     context["site_logo"] = context["hero"]["logo"]
-    settings = SiteSettings.objects.first()
-    days_required = settings.booking_days_in_advance if settings else 3
+    site_settings = get_site_settings()
+    days_required = site_settings.booking_days_in_advance if site_settings else 3
 
-    slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
-    context["slots"] = slots
+    context["slots"] = catalogue.active_slots()
     context["booking_days_in_advance"] = days_required
-    context["opening_time"] = settings.opening_time.strftime("%H:%M") if settings else "12:00"
-    context["closing_time"] = settings.closing_time.strftime("%H:%M") if settings else "22:00"
-    print(context["opening_time"], context["closing_time"])
-    return render(request, "mingsite/index.html", context)
+    context["opening_time"] = site_settings.opening_time.strftime("%H:%M") if site_settings else "12:00"
+    context["closing_time"] = site_settings.closing_time.strftime("%H:%M") if site_settings else "22:00"
+    return context
+
+
+def _cached_homepage(request) -> dict:
+    """
+    {"html", "rendered_at"} for the visitor's language, rendered with
+    CSRF_PLACEHOLDER in place of the form token.
+    """
+    key = "mingsite:home:{}:{}:{}:{}".format(
+        translation.get_language(),
+        site_settings_cache.current_version(),
+        catalogue.current_version(),
+        timezone.localdate().year,  # footer copyright year
+    )
+    entry = cache.get(key)
+    if entry is None:
+        context = homepage_context()
+        context["csrf_token"] = CSRF_PLACEHOLDER
+        entry = {
+            "html": render_to_string("mingsite/index.html", context, request=request),
+            "rendered_at": int(timezone.now().timestamp()),
+            "key": key,
+        }
+        cache.set(key, entry, getattr(settings, "HOMEPAGE_CACHE_SECONDS", 3600))
+    return entry
+
+
+def index(request):
+    if get_messages(request):
+        # flash messages are per visitor: render this one fresh
+        return render(request, "mingsite/index.html", homepage_context())
+
+    entry = _cached_homepage(request)
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    etag = '"{}"'.format(hashlib.sha1(f"{entry['key']}:{csrf_cookie}".encode()).hexdigest())
+
+    response = get_conditional_response(request, etag=etag, last_modified=entry["rendered_at"])
+    if response is None:
+        response = HttpResponse(entry["html"].replace(CSRF_PLACEHOLDER, get_token(request)))
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(entry["rendered_at"])
+    # private: the page holds the visitor's CSRF token; always revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Accept-Language", "Cookie"))
+    return response
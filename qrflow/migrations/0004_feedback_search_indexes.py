@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:40
+
+from django.db import migrations
+
+# pg_trgm GIN indexes for the dashboard feedback search (see
+# dashboard/search.py); skipped on databases other than PostgreSQL.
+TRIGRAM_INDEXES = {
+    "feedback_text_trgm_idx": 'UPPER(("what_went_wrong")::text) gin_trgm_ops',
+    "feedback_email_trgm_idx": 'UPPER(("email")::text) gin_trgm_ops',
+    "feedback_location_trgm_idx": 'UPPER(("location_slug")::text) gin_trgm_ops',
+}
+TABLE = "qrflow_feedback"
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{TABLE}" USING gin ({expression})')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qrflow', '0003_rename_message_feedback_what_went_wrong_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,7 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponseBadRequest
 from .models import Location, Feedback
-from reservations.email_sender import send_feedback_notification_via_gas
+from reservations.outbox import queue_feedback_notification
 from qrflow.models import Location
 
 def select_location(request):
@@ -38,7 +38,7 @@ def qr_bad(request, slug):
         else:
             recipient = "info@ming-dynastie.de"  # fallback
 
-        send_feedback_notification_via_gas(
+        queue_feedback_notification(
             to_email=recipient,
             restaurant_name=location.name,
             feedback_text=what,
@@ -1,10 +1,14 @@
 from django.contrib import admin
+
+from . import outbox
 from .models import (
     TimeSlotModel,
     ReservationModel,
     BlockedDayModel,
     DaySlotBlockModel,
     EmailSessionModel,
+    SlotOccupancyModel,
+    EmailOutboxModel,
 )
 
 
@@ -79,3 +83,39 @@ class EmailSessionAdmin(admin.ModelAdmin):
     search_fields = ("email",)
     list_filter = ("is_revoked",)
     ordering = ("-created_at",)
+
+
+# =========================
+# Occupancy ledger (read-only, maintained automatically)
+# =========================
+@admin.register(SlotOccupancyModel)
+class SlotOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("date", "slot", "booked_seats", "booked_parties", "blocked_seats", "updated_at")
+    list_filter = ("slot",)
+    ordering = ("-date",)
+    date_hierarchy = "date"
+    readonly_fields = ("date", "slot", "booked_seats", "booked_parties", "blocked_seats", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =========================
+# Email outbox
+# =========================
+@admin.register(EmailOutboxModel)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "kind", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    search_fields = ("to_email", "subject")
+    list_filter = ("status", "kind")
+    ordering = ("-created_at",)
+    readonly_fields = ("payload", "locked_at", "last_error", "created_at", "sent_at")
+    actions = ["retry_now"]
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        for message in queryset.exclude(status=EmailOutboxModel.Status.SENT):
+            outbox.retry(message)
@@ -1,18 +1,152 @@
+"""
+Magic-link cookie verification.
+
+get_verified_email() is called by most of the "my reservations" views, so
+the token lookup is cached at three levels:
+
+1. on the request object, so one request never verifies twice;
+2. in a small per-process LRU (RESV_AUTH_CACHE_SIZE entries);
+3. optionally in the shared Django cache (RESV_AUTH_SHARED_CACHE).
+
+Entries live at most RESV_AUTH_CACHE_SECONDS and never past the session's
+own expiry. Saving or deleting an EmailSessionModel (revoke, logout, purge
+via the ORM) drops its entry from this process and the shared cache; other
+processes' LRUs catch up within the TTL.
+"""
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
 from .models import EmailSessionModel
 
+_REQUEST_ATTR = "_resv_verified_email"
+_MISSING = object()
+
+
+def _ttl() -> float:
+    return getattr(settings, "RESV_AUTH_CACHE_SECONDS", 30)
+
+
+def _use_shared_cache() -> bool:
+    return getattr(settings, "RESV_AUTH_SHARED_CACHE", True)
+
+
+def _cache_key(token_hash: str) -> str:
+    return f"resv:auth:{token_hash}"
+
+
+class _LRU:
+    """
+    Tiny thread-safe LRU of token_hash -> (email or "", valid_until).
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            email, valid_until = item
+            if valid_until <= time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return email
+
+    def set(self, key, email, valid_until):
+        with self._lock:
+            self._data[key] = (email, valid_until)
+            self._data.move_to_end(key)
+            while len(self._data) > getattr(settings, "RESV_AUTH_CACHE_SIZE", 1024):
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = _LRU()
+
+
+def _lookup(token_hash: str) -> str:
+    """
+    Email for a valid session, "" for unknown / revoked / expired tokens.
+    """
+    email = _local.get(token_hash)
+    if email is not _MISSING:
+        return email
+
+    if _use_shared_cache():
+        cached = cache.get(_cache_key(token_hash))
+        if cached is not None:
+            email, valid_until = cached
+            if valid_until > time.time():
+                _local.set(token_hash, email, valid_until)
+                return email
+
+    now = time.time()
+    valid_until = now + _ttl()
+    session = EmailSessionModel.objects.filter(token_hash=token_hash).first()
+    if session and session.is_valid():
+        email = session.email
+        valid_until = min(valid_until, session.expires_at.timestamp())
+    else:
+        email = ""  # cache the miss too, so bogus cookies don't hit the DB
+
+    _local.set(token_hash, email, valid_until)
+    if _use_shared_cache():
+        cache.set(_cache_key(token_hash), (email, valid_until), max(int(valid_until - now), 1))
+    return email
+
+
+def _drop(token_hash: str) -> None:
+    _local.delete(token_hash)
+    if _use_shared_cache():
+        cache.delete(_cache_key(token_hash))
+
+
+def invalidate(token_hash: str) -> None:
+    """
+    Forget a cached verification once the current transaction commits.
+    """
+    _drop(token_hash)
+    transaction.on_commit(lambda: _drop(token_hash))
+
 
 def get_verified_email(request) -> str | None:
+    memo = getattr(request, _REQUEST_ATTR, _MISSING)
+    if memo is not _MISSING:
+        return memo
+
     cookie_name = getattr(settings, "RESV_SESSION_COOKIE_NAME", "ming_resv_session")
     raw = request.COOKIES.get(cookie_name)
-    if not raw:
-        return None
+    email = _lookup(EmailSessionModel.hash_token(raw)) if raw else ""
+
+    setattr(request, _REQUEST_ATTR, email or None)
+    return email or None
 
-    token_hash = EmailSessionModel.hash_token(raw)
-    session = EmailSessionModel.objects.filter(token_hash=token_hash).first()
-    if not session or not session.is_valid():
-        return None
 
-    return session.email
+def revoke_request_session(request) -> None:
+    """
+    Revoke the session behind the request's cookie (logout).
+    """
+    cookie_name = getattr(settings, "RESV_SESSION_COOKIE_NAME", "ming_resv_session")
+    raw = request.COOKIES.get(cookie_name)
+    if raw:
+        token_hash = EmailSessionModel.hash_token(raw)
+        EmailSessionModel.objects.filter(token_hash=token_hash).update(is_revoked=True)
+        invalidate(token_hash)
+    setattr(request, _REQUEST_ATTR, None)
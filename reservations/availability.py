@@ -0,0 +1,114 @@
+"""
+Remaining seats per active time slot for a date range.
+
+The seat map for a whole range is built from three queries (the occupancy
+ledger rows, closed days and closed slot blocks) plus the cached slot
+catalogue, and cached.
+Every reservation / block / slot change bumps a version key, which
+invalidates all cached ranges at once.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from mingdyn import cacheversion
+
+from . import catalogue
+from .models import BlockedDayModel, DaySlotBlockModel, SlotOccupancyModel
+
+VERSION_KEY = "resv:availability:version"
+
+
+def _cache_seconds() -> int:
+    return getattr(settings, "RESV_AVAILABILITY_CACHE_SECONDS", 300)
+
+
+def max_days() -> int:
+    return getattr(settings, "RESV_AVAILABILITY_MAX_DAYS", 62)
+
+
+def _version() -> int:
+    return cacheversion.current(VERSION_KEY)
+
+
+def _bump_version() -> None:
+    cacheversion.bump(VERSION_KEY)
+
+
+def invalidate() -> None:
+    """
+    Drop every cached seat map once the current transaction commits
+    (so a concurrent request can't re-cache the pre-commit state).
+    """
+    transaction.on_commit(_bump_version)
+
+
+def compute_seat_map(date_from, date_to) -> list[dict]:
+    slots = catalogue.get_catalogue().slots
+
+    ledger = {
+        (row["date"], row["slot_id"]): row
+        for row in (
+            SlotOccupancyModel.objects
+            .filter(date__range=(date_from, date_to), slot__is_active=True)
+            .values("date", "slot_id", "booked_seats", "blocked_seats")
+        )
+    }
+
+    closed_days = set(
+        BlockedDayModel.objects
+        .filter(date__range=(date_from, date_to), is_closed=True)
+        .values_list("date", flat=True)
+    )
+
+    closed_slots = set(
+        DaySlotBlockModel.objects
+        .filter(blocked_day__date__range=(date_from, date_to), is_closed=True)
+        .values_list("blocked_day__date", "slot_id")
+    )
+
+    days = []
+    day = date_from
+    while day <= date_to:
+        day_closed = day in closed_days
+        day_slots = []
+        for s in slots:
+            row = ledger.get((day, s.id), {})
+            booked = row.get("booked_seats", 0)
+            blocked = row.get("blocked_seats", 0)
+            closed = day_closed or (day, s.id) in closed_slots
+            remaining = 0 if closed else max(s.capacity - blocked - booked, 0)
+            day_slots.append({
+                "id": s.id,
+                "slug": s.slug,
+                "label": s.label,
+                "start": s.start_time.strftime("%H:%M"),
+                "end": s.end_time.strftime("%H:%M"),
+                "capacity": s.capacity,
+                "remaining": remaining,
+                "closed": closed,
+            })
+        days.append({
+            "date": day.isoformat(),
+            "closed": day_closed,
+            "slots": day_slots,
+        })
+        day += timedelta(days=1)
+
+    return days
+
+
+def get_seat_map(date_from, date_to) -> list[dict]:
+    """
+    Cached compute_seat_map(); the range is inclusive on both ends.
+    """
+    key = f"resv:availability:{_version()}:{date_from.isoformat()}:{date_to.isoformat()}"
+    days = cache.get(key)
+    if days is None:
+        days = compute_seat_map(date_from, date_to)
+        cache.set(key, days, _cache_seconds())
+    return days
@@ -0,0 +1,163 @@
+"""
+Booking service: the one place that changes how many seats a reservation
+occupies.
+
+save() creates, moves (date/slot) and resizes reservations and cancel()
+cancels them, for the guest views and both staff dashboards. Capacity is
+checked against the occupancy ledger (reservations.occupancy), which only
+counts reservations that are not cancelled. It uses optimistic concurrency
+rather than locks:
+
+1. read the ledger rows the change touches (the old and the new date+slot)
+   with their `version`, outside any transaction;
+2. check closures and capacity against those numbers;
+3. in one transaction, bump the version of each row only if it is still
+   the one read (UPDATE ... WHERE version = v), then save the reservation;
+   the signals move its seats in the ledger in the same transaction.
+
+Every ledger write bumps the version, and so does closing a day or a slot
+(occupancy.touch). If another booking, edit, cancel, slot block or
+closure committed in between, a version no longer matches. The
+transaction is then rolled back and the change is retried from 1 with
+fresh numbers, up to BOOKING_MAX_RETRIES times. After that it raises
+BookingConflict. Rows are claimed in (date, slot) order, so two moves
+never wait on each other in opposite order.
+
+Call these outside transaction.atomic(). Step 1 must see committed data,
+and SQLite only takes the write lock cleanly when the claim is the first
+statement of the transaction. Work that has to commit together with the
+reservation, such as queued emails, goes in `on_save`.
+"""
+from __future__ import annotations
+
+import random
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import occupancy
+from .models import BlockedDayModel, DaySlotBlockModel, ReservationModel
+
+
+class BookingError(ValueError):
+    """
+    A change that cannot be made. args[0] is the guest popup payload
+    ({"code", "title", "text"}). `available` is set for capacity errors.
+    """
+
+    def __init__(self, code: str, title: str, text: str, *, available: int | None = None):
+        super().__init__({"code": code, "title": title, "text": text})
+        self.code = code
+        self.available = available
+
+
+class BookingConflict(BookingError):
+    """
+    Still losing the race for the slot after BOOKING_MAX_RETRIES attempts.
+    """
+
+
+class _Retry(Exception):
+    pass
+
+
+def max_retries() -> int:
+    return max(getattr(settings, "BOOKING_MAX_RETRIES", 5), 1)
+
+
+def save(reservation: ReservationModel, *, on_save=None) -> ReservationModel:
+    """
+    Create, move or resize a reservation (an unsaved or edited instance with
+    its slot set). Only the seats it adds at its new date+slot need room.
+    `on_save(reservation)` runs in the same transaction, after the save.
+    """
+    return _commit(reservation, reservation.save, on_save)
+
+
+def cancel(reservation: ReservationModel, *, by: str, note: str = "", on_save=None) -> ReservationModel:
+    """
+    Cancel a reservation and release its seats.
+    """
+    reservation.status = ReservationModel.Status.CANCELLED
+    reservation.cancelled_at = timezone.now()
+    reservation.cancelled_by = by
+    reservation.cancellation_note = note
+    return _commit(
+        reservation,
+        lambda: reservation.save(update_fields=["status", "cancelled_at", "cancelled_by", "cancellation_note", "updated_at"]),
+        on_save,
+    )
+
+
+def _commit(reservation, save_reservation, on_save):
+    for attempt in range(max_retries()):
+        before = occupancy.stored_ledger_state(reservation.pk) if reservation.pk else None
+        after = occupancy.ledger_state(reservation)
+
+        keys = sorted({state[:2] for state in (before, after) if state})
+        rows = {key: occupancy.ledger_row(*key) for key in keys}
+        if after:
+            _check_room(reservation, rows[after[:2]], after, before)
+
+        try:
+            with transaction.atomic():
+                if not all(occupancy.claim(rows[key]) for key in keys):
+                    raise _Retry
+                save_reservation()
+                if on_save:
+                    on_save(reservation)
+        except _Retry:
+            # someone changed one of the rows since step 1
+            time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+            continue
+        return reservation
+
+    raise BookingConflict(
+        "SLOT_BUSY",
+        "Bitte erneut versuchen",
+        "Für diesen Zeitraum gehen gerade viele Reservierungen ein. Bitte versuchen Sie es noch einmal.",
+    )
+
+
+def _check_room(reservation, row, after, before) -> None:
+    date, slot_id, requested = after
+    # what this reservation already holds at the same date+slot
+    held = before[2] if before and before[:2] == after[:2] else 0
+    if requested <= held:
+        return  # frees seats or keeps them: always allowed
+
+    if BlockedDayModel.objects.filter(date=date, is_closed=True).exists():
+        raise BookingError(
+            "DAY_CLOSED",
+            "Tag nicht verfügbar",
+            "An diesem Tag sind keine Reservierungen möglich.",
+        )
+    if DaySlotBlockModel.objects.filter(blocked_day__date=date, slot_id=slot_id, is_closed=True).exists():
+        raise BookingError(
+            "SLOT_CLOSED",
+            "Zeitraum nicht verfügbar",
+            "Dieser Zeitraum ist an diesem Tag nicht verfügbar.",
+        )
+
+    capacity = max(reservation.slot.capacity - row.blocked_seats, 0)
+    booked = max(row.booked_seats - held, 0)
+    available = max(capacity - booked, 0)
+
+    if booked == 0 and requested > capacity:
+        raise BookingError(
+            "FIRST_BOOKING_EXCEEDS",
+            "Kapazität überschritten",
+            f"Für diesen Zeitraum stehen insgesamt {capacity} Plätze zur Verfügung. "
+            f"Sie haben {requested} Personen ausgewählt.",
+            available=available,
+        )
+    if requested > available:
+        raise BookingError(
+            "SLOT_FULL",
+            "Nicht genügend Plätze verfügbar",
+            f"Es sind nur noch {available} Plätze verfügbar. "
+            f"Sie haben {requested} Personen ausgewählt.",
+            available=available,
+        )
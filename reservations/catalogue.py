@@ -0,0 +1,119 @@
+"""
+Active time-slot catalogue.
+
+The active slots change a few times a year but are read on every booking
+(time -> slot in ReservationCreateForm.clean), by the seat map and by the
+dashboard/homepage pages, so they are kept per process:
+
+- saving or deleting a TimeSlotModel (edit, activate/deactivate) bumps a
+  version key in the shared cache once the transaction commits;
+- each process keeps one SlotCatalogue per version and rebuilds it (one
+  query) on the first call after a change.
+
+slot_for_time() keeps the form's old first-match rule (active slots in
+sort order, a slot covers start <= t < end, or t >= start / t < end when it
+runs past midnight) but answers from a precomputed cut of the day into
+segments, so a lookup is one bisect instead of a scan.
+"""
+from __future__ import annotations
+
+import bisect
+import copy
+import threading
+from datetime import time
+
+from django.db import transaction
+
+from mingdyn import cacheversion
+
+from .models import TimeSlotModel
+
+VERSION_KEY = "resv:slots:version"
+
+_local = None  # (version, SlotCatalogue)
+_lock = threading.Lock()
+
+
+def covers(slot, t: time) -> bool:
+    if slot.start_time <= slot.end_time:
+        # normal range (12:00–16:00)
+        return slot.start_time <= t < slot.end_time
+    # overnight (22:00–02:00)
+    return t >= slot.start_time or t < slot.end_time
+
+
+class SlotCatalogue:
+    """
+    Immutable snapshot of the active slots (sort_order, start_time order).
+    """
+
+    def __init__(self, slots):
+        self.slots = tuple(slots)
+        self.by_id = {s.id: s for s in self.slots}
+
+        # every start/end cuts the day; coverage is constant inside a
+        # segment, so its owner is the first slot covering its start
+        self._bounds = sorted({time(0, 0)} | {s.start_time for s in self.slots} | {s.end_time for s in self.slots})
+        self._owners = [
+            next((s for s in self.slots if covers(s, bound)), None)
+            for bound in self._bounds
+        ]
+
+    def slot_for_time(self, t: time):
+        return self._owners[bisect.bisect_right(self._bounds, t) - 1]
+
+
+def current_version() -> int:
+    return cacheversion.current(VERSION_KEY)
+
+
+def _bump_version() -> None:
+    global _local
+    _local = None
+    cacheversion.bump(VERSION_KEY)
+
+
+def invalidate() -> None:
+    """
+    Rebuild the catalogue (in every process) once the current transaction
+    commits.
+    """
+    transaction.on_commit(_bump_version)
+
+
+def get_catalogue() -> SlotCatalogue:
+    global _local
+    version = current_version()
+    cached = _local
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _local
+            if cached is None or cached[0] != version:
+                slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
+                cached = _local = (version, SlotCatalogue(slots))
+    return cached[1]
+
+
+def active_slots() -> list[TimeSlotModel]:
+    """
+    Copies of the active slots, in display order.
+    """
+    return [copy.copy(s) for s in get_catalogue().slots]
+
+
+def slot_for_time(t: time) -> TimeSlotModel | None:
+    """
+    The active slot a reservation at `t` belongs to (a copy), or None.
+    """
+    slot = get_catalogue().slot_for_time(t)
+    return copy.copy(slot) if slot else None
+
+
+def slot_ranges() -> dict:
+    """
+    {slot id: {"start": "HH:MM", "end": "HH:MM"}} for the dashboard forms.
+    """
+    return {
+        str(s.id): {"start": s.start_time.strftime("%H:%M"), "end": s.end_time.strftime("%H:%M")}
+        for s in get_catalogue().slots
+    }
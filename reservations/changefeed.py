@@ -0,0 +1,112 @@
+"""
+Reservation change feed for the dashboard.
+
+Every committed save/delete of a reservation appends a ReservationChangeModel
+row (see signals.py); its id is the version stamp. A dashboard that has
+rendered the list at version N asks for `changes_since(N)` and only
+re-renders the reservations listed there.
+
+The log is pruned to DASHBOARD_CHANGE_FEED_RETENTION_HOURS; a client whose
+version is older than that (or more than DASHBOARD_CHANGE_FEED_LIMIT
+changes behind) is told to reload the whole list instead.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import ReservationChangeModel
+
+PRUNE_EVERY = 500  # prune the log once every N recorded changes
+
+
+def _limit() -> int:
+    return getattr(settings, "DASHBOARD_CHANGE_FEED_LIMIT", 200)
+
+
+def current_version() -> int:
+    return ReservationChangeModel.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def record(reservation_id: int, event: str = "updated") -> None:
+    """
+    Log a change once the surrounding transaction commits, so pollers never
+    see a version whose reservation change is not visible yet, and push it
+    to the live dashboards (events.py).
+    """
+    def _write():
+        change = ReservationChangeModel.objects.create(
+            reservation_id=reservation_id,
+            deleted=event == "deleted",
+            event=event,
+        )
+        events.publish(event, reservation_id, change.pk)
+        if change.pk % PRUNE_EVERY == 0:
+            prune()
+
+    transaction.on_commit(_write)
+
+
+def prune() -> int:
+    hours = getattr(settings, "DASHBOARD_CHANGE_FEED_RETENTION_HOURS", 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = ReservationChangeModel.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def changes_since(version: int) -> dict:
+    """
+    {"version": latest id, "changed": ids to re-render, "deleted": ids to
+    drop, "reset": True if the caller must reload everything}.
+    """
+    limit = _limit()
+    rows = list(
+        ReservationChangeModel.objects
+        .filter(id__gt=version)
+        .order_by("id")
+        .values_list("id", "reservation_id", "deleted")[:limit + 1]
+    )
+    if not rows:
+        return {"version": version, "changed": [], "deleted": [], "reset": False}
+
+    # ids can skip; it is only a gap if the log was pruned past `version`
+    gap = (
+        version
+        and rows[0][0] != version + 1
+        and not ReservationChangeModel.objects.filter(id__lte=version).exists()
+    )
+    if gap or len(rows) > limit:
+        return {"version": current_version(), "changed": [], "deleted": [], "reset": True}
+
+    latest = {}
+    for _, reservation_id, deleted in rows:
+        latest[reservation_id] = deleted  # last change per reservation wins
+    return {
+        "version": rows[-1][0],
+        "changed": [rid for rid, deleted in latest.items() if not deleted],
+        "deleted": [rid for rid, deleted in latest.items() if deleted],
+        "reset": False,
+    }
+
+
+def events_since(version: int) -> tuple[list[dict], int]:
+    """
+    Logged changes after `version` as event dicts, plus the new version
+    (for ChangeFeedBroker). Too many at once collapse into one reset.
+    """
+    limit = _limit()
+    rows = list(
+        ReservationChangeModel.objects
+        .filter(id__gt=version)
+        .order_by("id")
+        .values_list("id", "reservation_id", "event")[:limit + 1]
+    )
+    if not rows:
+        return [], version
+    if len(rows) > limit:
+        return [dict(events.RESET)], current_version()
+    return [{"type": event, "id": rid, "version": pk} for pk, rid, event in rows], rows[-1][0]
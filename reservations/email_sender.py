@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-import requests
-from django.conf import settings
 import html
 
-def send_reservation_confirmation_via_gas(
+from . import gas_client
+
+
+def post_to_gas(payload: dict) -> dict:
+    """
+    POST one email payload to the Apps Script webhook through the shared
+    pooled client. The secret is added by the client, so it never ends up
+    in the outbox table.
+    """
+    return gas_client.get_client().post(payload)
+
+
+def post_batch_to_gas(payloads: list[dict]) -> list[dict]:
+    """
+    POST several email payloads in one webhook call; one
+    {"ok", "error"} result per payload.
+    """
+    return gas_client.get_client().post_batch(payloads)
+
+
+def build_reservation_confirmation_email(
     *,
     to_email: str,
     edit_cancel_url: str,
@@ -13,13 +31,7 @@ def send_reservation_confirmation_via_gas(
     reservation_time: str | None = None,   # e.g. "19:30"
     party_size: int | None = None,
     customer_name: str | None = None,
-) -> None:
-    url = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL", "")
-    if not url:
-        raise RuntimeError("GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL is not set")
-
-    secret = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET", "")
-
+) -> dict:
     # ---- Build a short details line for text + HTML ----
     details_parts = []
     if reservation_date:
@@ -74,8 +86,7 @@ def send_reservation_confirmation_via_gas(
       </div>
     """
 
-    payload = {
-        "secret": secret,
+    return {
         "to": to_email,
         "bcc": "mingeast@ming-dynastie.de",
         "subject": subject,
@@ -84,25 +95,13 @@ def send_reservation_confirmation_via_gas(
         "name": restaurant_name,
     }
 
-    r = requests.post(url, json=payload, timeout=12)
-
-    try:
-        data = r.json()
-    except Exception:
-        raise RuntimeError(f"GAS returned non-JSON: {r.status_code} {r.text[:200]}")
 
-    if not data.get("ok"):
-        raise RuntimeError(f"GAS failed: {r.status_code} {data}")
-    
-def send_magic_link_via_gas(*, to_email: str, magic_url: str) -> None:
-    url = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL", "")
-    if not url:
-        raise RuntimeError("GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL is not set")
+def send_reservation_confirmation_via_gas(**kwargs) -> None:
+    post_to_gas(build_reservation_confirmation_email(**kwargs))
 
-    secret = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET", "")
 
-    payload = {
-        "secret": secret,
+def build_magic_link_email(*, to_email: str, magic_url: str) -> dict:
+    return {
         "to": to_email,
         "subject": "Ihr Login-Link für Reservierungen",
         "body": (
@@ -119,30 +118,18 @@ def send_magic_link_via_gas(*, to_email: str, magic_url: str) -> None:
         "name": "Ming Dynastie",
     }
 
-    r = requests.post(url, json=payload, timeout=12)
 
-    # Apps Script often returns 200 even on "errors", so check JSON body
-    try:
-        data = r.json()
-    except Exception:
-        raise RuntimeError(f"GAS returned non-JSON: {r.status_code} {r.text[:200]}")
+def send_magic_link_via_gas(*, to_email: str, magic_url: str) -> None:
+    post_to_gas(build_magic_link_email(to_email=to_email, magic_url=magic_url))
 
-    if not data.get("ok"):
-        raise RuntimeError(f"GAS failed: {r.status_code} {data}")
 
-def send_feedback_notification_via_gas(
+def build_feedback_notification_email(
     *,
     to_email: str,
     restaurant_name: str,
     feedback_text: str,
     customer_email: str | None = None,
-) -> None:
-    url = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL", "")
-    if not url:
-        raise RuntimeError("GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL is not set")
-
-    secret = getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET", "")
-
+) -> dict:
     subject = f"Neues Feedback – {restaurant_name}"
 
     body = (
@@ -160,8 +147,7 @@ def send_feedback_notification_via_gas(
     </div>
     """
 
-    payload = {
-        "secret": secret,
+    return {
         "to": to_email,
         "subject": subject,
         "body": body,
@@ -169,17 +155,12 @@ def send_feedback_notification_via_gas(
         "name": restaurant_name,
     }
 
-    r = requests.post(url, json=payload, timeout=12)
 
-    data = r.json()
-    if not data.get("ok"):
-        raise RuntimeError(f"GAS failed: {data}")
-    
-import requests
-from django.conf import settings
+def send_feedback_notification_via_gas(**kwargs) -> None:
+    post_to_gas(build_feedback_notification_email(**kwargs))
 
 
-def send_reservation_update_via_gas(
+def build_reservation_update_email(
     to_email,
     restaurant_name,
     reservation_date,
@@ -207,8 +188,7 @@ Viele Grüße
 {restaurant_name}
 """.strip()
 
-    payload = {
-        "secret": settings.GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET,
+    return {
         "to": to_email,
         "bcc": "mingeast@ming-dynastie.de",
         "subject": subject,
@@ -216,16 +196,46 @@ Viele Grüße
         "name": restaurant_name,
     }
 
-    response = requests.post(
-        settings.GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL,
-        json=payload,
-        timeout=10,
-    )
 
-    try:
-        data = response.json()
-    except Exception:
-        raise RuntimeError(f"GAS returned non-JSON: {response.status_code} {response.text[:200]}")
+def send_reservation_update_via_gas(**kwargs) -> None:
+    post_to_gas(build_reservation_update_email(**kwargs))
+
 
-    if not data.get("ok"):
-        raise RuntimeError(f"GAS failed: {response.status_code} {data}")
\ No newline at end of file
+def build_closure_notice_email(
+    *,
+    to_email: str,
+    restaurant_name: str,
+    reservation_date: str,
+    reservation_time: str,
+    party_size: int,
+    customer_name: str,
+    reason: str = "",
+) -> dict:
+    subject = f"Ihre Reservierung am {reservation_date} kann leider nicht stattfinden"
+
+    reason_line = f"Grund: {reason}\n\n" if reason else ""
+    body = f"""
+Hallo {customer_name},
+
+leider müssen wir Ihnen mitteilen, dass {restaurant_name} zum Zeitpunkt Ihrer
+Reservierung keine Gäste empfangen kann.
+
+Betroffene Reservierung:
+Datum: {reservation_date}
+Uhrzeit: {reservation_time}
+Personenzahl: {party_size}
+
+{reason_line}Bitte entschuldigen Sie die Unannehmlichkeiten. Gerne können Sie über unsere
+Website einen neuen Termin reservieren.
+
+Viele Grüße
+{restaurant_name}
+""".strip()
+
+    return {
+        "to": to_email,
+        "bcc": "mingeast@ming-dynastie.de",
+        "subject": subject,
+        "body": body,
+        "name": restaurant_name,
+    }
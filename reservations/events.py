@@ -0,0 +1,166 @@
+"""
+Reservation events pushed to open dashboards (Server-Sent Events).
+
+Every change logged by changefeed.record() is published here once its
+transaction commits, as {"type", "id", "version"} where type is one of
+EVENT_TYPES and version is the change-feed id. The dashboard stream
+(dashboard:reservation_events) subscribes and forwards them; the page then
+fetches the changed rows from the change feed.
+
+The broker is chosen by RESV_EVENTS_BROKER (dotted path):
+
+- InProcessBroker: fan-out inside one process. Right for a single
+  uvicorn/daphne process; with several workers a dashboard only hears
+  about changes made by the worker it is connected to.
+- ChangeFeedBroker: every process polls the shared change log once per
+  RESV_EVENTS_POLL_SECONDS (one query per process, not per connection)
+  and fans out locally, so it works behind multi-worker gunicorn/uvicorn.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import changefeed
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("created", "updated", "arrived", "cancelled", "deleted")
+RESET = {"type": "reset"}  # subscriber fell behind: reload instead of patching
+QUEUE_SIZE = 100
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESET)
+
+
+class InProcessBroker:
+    """
+    Subscribers are asyncio queues on their event loop; publish() may be
+    called from any thread (signals run in the sync view threads).
+    """
+
+    def __init__(self):
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict) -> None:
+        self._fanout(event)
+
+    def _fanout(self, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:  # loop already closed
+                self._unsubscribe((loop, queue))
+
+    def _unsubscribe(self, subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, heartbeat: float):
+        """
+        Register a subscriber now and return an async iterator over its
+        events, yielding None after `heartbeat` idle seconds (so the caller
+        can keep the connection alive). Must be called on the event loop.
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return self._listen(subscriber, heartbeat)
+
+    async def _listen(self, subscriber, heartbeat: float):
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._unsubscribe(subscriber)
+
+
+class ChangeFeedBroker(InProcessBroker):
+    """
+    Multi-process broker on top of the ReservationChangeModel log: local
+    publishes are ignored (the log row is the message) and one poller task
+    per process turns new log rows into events while anyone is subscribed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poller: asyncio.Task | None = None
+
+    def publish(self, event: dict) -> None:
+        pass
+
+    def subscribe(self, heartbeat: float):
+        subscription = super().subscribe(heartbeat)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return subscription
+
+    async def _poll(self) -> None:
+        interval = getattr(settings, "RESV_EVENTS_POLL_SECONDS", 2)
+        version = await sync_to_async(changefeed.current_version)()
+        while self.subscriber_count():
+            await asyncio.sleep(interval)
+            try:
+                events, version = await sync_to_async(changefeed.events_since)(version)
+            except Exception:
+                logger.warning("Reservation event poll failed", exc_info=True)
+                continue
+            for event in events:
+                self._fanout(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InProcessBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "RESV_EVENTS_BROKER", "reservations.events.InProcessBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(event_type: str, reservation_id: int, version: int) -> None:
+    try:
+        get_broker().publish({"type": event_type, "id": reservation_id, "version": version})
+    except Exception:
+        # events are a convenience; the page still polls the change feed
+        logger.warning("Could not publish reservation event", exc_info=True)
+
+
+def reservation_event(instance, created: bool, update_fields=None) -> str:
+    """
+    Event type for a saved reservation (no extra query: judged from the
+    saved instance and the fields that were written).
+    """
+    if created:
+        return "created"
+    if instance.status == instance.Status.CANCELLED:
+        return "cancelled"
+    if update_fields and "is_arrived" in update_fields and instance.is_arrived:
+        return "arrived"  # un-marking an arrival is a plain update
+    return "updated"
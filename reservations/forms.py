@@ -1,9 +1,9 @@
 from django import forms
 from django.utils import timezone
-from django.db.models import Sum
 
-from core_settings.models import SiteSettings
-from .models import DaySlotBlockModel, ReservationModel, BlockedDayModel, TimeSlotModel
+from core_settings.cache import get_site_settings
+from . import catalogue, occupancy
+from .models import DaySlotBlockModel, ReservationModel, BlockedDayModel
 
 
 class ReservationCreateForm(forms.ModelForm):
@@ -13,6 +13,8 @@ class ReservationCreateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # what the edited reservation currently contributes to the ledger
+        self._ledger_before = occupancy.ledger_state(self.instance) if self.instance.pk else None
 
     def clean(self):
         cleaned = super().clean()
@@ -21,7 +23,7 @@ class ReservationCreateForm(forms.ModelForm):
         t = cleaned.get("time")
         party_size = cleaned.get("party_size") or 0
 
-        settings = SiteSettings.objects.first()
+        settings = get_site_settings()
 
         if not d or not t:
             return cleaned
@@ -32,20 +34,7 @@ class ReservationCreateForm(forms.ModelForm):
             return cleaned
 
         # 🔥 Find matching slot
-        slot = None
-        active_slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
-
-        for s in active_slots:
-            if s.start_time <= s.end_time:
-                # normal range (12:00–16:00)
-                if s.start_time <= t < s.end_time:
-                    slot = s
-                    break
-            else:
-                # overnight (22:00–02:00)
-                if t >= s.start_time or t < s.end_time:
-                    slot = s
-                    break
+        slot = catalogue.slot_for_time(t)
 
         if not slot:
             self.add_error("time", "Diese Uhrzeit ist nicht verfügbar.")
@@ -71,24 +60,11 @@ class ReservationCreateForm(forms.ModelForm):
             self.add_error("time", "Dieser Zeitraum ist an diesem Tag nicht verfügbar.")
             return cleaned
 
-        blocked_seats = block.blocked_seats if block else 0
-        print(f'blocked_seats {blocked_seats}')
-        allowed_capacity = max(slot.capacity - blocked_seats, 0)
-
-        # Capacity check (UX level)
-        total_seats = (
-            ReservationModel.objects
-            .filter(date=d, slot=slot)
-            .aggregate(total=Sum("party_size"))["total"] or 0
-        )
-        qs = ReservationModel.objects.filter(date=d, slot=slot)
-
+        # Capacity check (UX level), booked + blocked seats from the occupancy ledger
         # ✅ if editing existing reservation, exclude it from totals
-        if self.instance and self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
+        total_seats, blocked_seats = occupancy.seat_counts(d, slot.id, exclude=self._ledger_before)
+        allowed_capacity = max(slot.capacity - blocked_seats, 0)
 
-        total_seats = qs.aggregate(total=Sum("party_size"))["total"] or 0
-        print(f'total_seats + party_size {total_seats + party_size} > allowed_capacity {allowed_capacity}')
         if total_seats + party_size > allowed_capacity:
             remaining = max(allowed_capacity - total_seats, 0)
             self.add_error(
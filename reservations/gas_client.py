@@ -0,0 +1,223 @@
+"""
+HTTP client for the Google Apps Script email webhook.
+
+One pooled keep-alive requests.Session per process, so consecutive emails
+reuse the TLS connection to script.google.com. A small circuit breaker stops
+hammering GAS while it is failing: after GAS_BREAKER_FAILURES consecutive
+errors every call fails fast with CircuitOpenError for
+GAS_BREAKER_RESET_SECONDS, then one trial request is let through.
+
+Batches: post_batch() sends {"secret", "messages": [payload, ...]} in one
+request; the script must answer {"ok": true, "results": [{"ok": bool,
+"error": str}, ...]} with one result per message, in order. Any other
+answer raises GasBatchUnsupported, and the outbox re-sends those messages
+one by one.
+
+For local development / tests point GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL at
+reservations.gas_stub (`manage.py run_gas_stub`).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from mingdyn import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class GasError(RuntimeError):
+    """GAS could not be reached or answered with an error."""
+
+
+class GasUnreachable(GasError):
+    """The request did not get an answer (connection error, timeout)."""
+
+
+class GasBatchUnsupported(GasError):
+    """
+    GAS answered a batch, but not with one result per message: the deployed
+    script does not speak the batch protocol. Nothing can be assumed sent.
+    """
+
+
+class CircuitOpenError(GasError):
+    """GAS failed repeatedly; calls are short-circuited until `retry_at`."""
+
+    def __init__(self, retry_at: float):
+        super().__init__("GAS circuit breaker is open")
+        self.retry_at = retry_at
+
+
+class GasClient:
+    def __init__(
+        self,
+        url: str,
+        secret: str = "",
+        *,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 12,
+        pool_size: int = 4,
+        failure_threshold: int = 5,
+        reset_seconds: float = 60,
+    ):
+        self.url = url
+        self.secret = secret
+        self.timeout = (connect_timeout, read_timeout)
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self.counters = {
+            "requests": 0,
+            "messages": 0,
+            "ok": 0,
+            "errors": 0,
+            "short_circuited": 0,
+            "latency_seconds_total": 0.0,
+            "latency_seconds_max": 0.0,
+        }
+
+    # ── circuit breaker ────────────────────────────────────
+    def _before_request(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            retry_at = self._opened_at + self.reset_seconds
+            if time.monotonic() < retry_at:
+                self.counters["short_circuited"] += 1
+                raise CircuitOpenError(time.time() + (retry_at - time.monotonic()))
+            # half-open: let this request through, re-open on failure
+            self._opened_at = None
+            self._consecutive_failures = self.failure_threshold - 1
+
+    def _record(self, ok: bool, elapsed: float, messages: int = 1) -> None:
+        metrics.GAS_LATENCY.observe(elapsed, outcome="ok" if ok else "error")
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["messages"] += messages
+            self.counters["ok" if ok else "errors"] += 1
+            self.counters["latency_seconds_total"] += elapsed
+            self.counters["latency_seconds_max"] = max(self.counters["latency_seconds_max"], elapsed)
+
+            if ok:
+                self._consecutive_failures = 0
+                return
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold and self._opened_at is None:
+                self._opened_at = time.monotonic()
+                logger.warning("GAS circuit opened after %s consecutive failures", self._consecutive_failures)
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() < self._opened_at + self.reset_seconds
+
+    # ── requests ───────────────────────────────────────────
+    def _send(self, body: dict, messages: int) -> dict:
+        if not self.url:
+            raise GasError("GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL is not set")
+
+        self._before_request()
+        started = time.monotonic()
+        try:
+            r = self.session.post(self.url, json={**body, "secret": self.secret}, timeout=self.timeout)
+            # Apps Script often returns 200 even on "errors", so check JSON body
+            try:
+                data = r.json()
+            except ValueError:
+                raise GasError(f"GAS returned non-JSON: {r.status_code} {r.text[:200]}")
+            if not data.get("ok"):
+                raise GasError(f"GAS failed: {r.status_code} {data}")
+        except requests.RequestException as e:
+            self._record(False, time.monotonic() - started, messages)
+            raise GasUnreachable(f"GAS request failed: {e}") from e
+        except GasError:
+            self._record(False, time.monotonic() - started, messages)
+            raise
+
+        self._record(True, time.monotonic() - started, messages)
+        return data
+
+    def post(self, payload: dict) -> dict:
+        """
+        POST one JSON payload (the secret is added here) and return the
+        decoded response. Raises GasError unless GAS answers {"ok": true}.
+        """
+        return self._send(payload, 1)
+
+    def post_batch(self, payloads: list[dict]) -> list[dict]:
+        """
+        POST several email payloads in one request. Returns one
+        {"ok": bool, "error": str} per payload, in order. Raises GasError if
+        the request as a whole failed, GasBatchUnsupported if GAS answered
+        but not in the batch format.
+        """
+        if not payloads:
+            return []
+        try:
+            data = self._send({"messages": payloads}, len(payloads))
+        except (CircuitOpenError, GasUnreachable):
+            raise
+        except GasError as e:
+            # answered, but with an error or no JSON: a single-message script
+            raise GasBatchUnsupported(str(e)) from e
+        results = data.get("results")
+        if not isinstance(results, list) or len(results) != len(payloads):
+            raise GasBatchUnsupported("GAS answered a batch without one result per message")
+        return [
+            {"ok": bool(r.get("ok")), "error": str(r.get("error") or "")} if isinstance(r, dict)
+            else {"ok": False, "error": "invalid result"}
+            for r in results
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "circuit_open": self._opened_at is not None}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GasClient:
+    """
+    Process-wide client built from settings on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GasClient(
+                    getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL", ""),
+                    getattr(settings, "GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_SECRET", ""),
+                    connect_timeout=getattr(settings, "GAS_CONNECT_TIMEOUT", 3.05),
+                    read_timeout=getattr(settings, "GAS_READ_TIMEOUT", 12),
+                    pool_size=getattr(settings, "GAS_POOL_SIZE", 4),
+                    failure_threshold=getattr(settings, "GAS_BREAKER_FAILURES", 5),
+                    reset_seconds=getattr(settings, "GAS_BREAKER_RESET_SECONDS", 60),
+                )
+    return _client
+
+
+def reset_client() -> None:
+    """
+    Drop the shared client (e.g. after changing settings in tests).
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
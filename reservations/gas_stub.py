@@ -0,0 +1,114 @@
+"""
+Local stand-in for the Apps Script email webhook.
+
+    with GasStubServer() as stub:
+        settings.GOOGLE_APPS_SCRIPT_EMAIL_WEBHOOK_URL = stub.url
+        gas_client.reset_client()
+        ...
+        assert stub.received[0]["to"] == "guest@example.com"
+
+`stub.fail = True` makes it answer {"ok": false}; addresses in `stub.reject`
+fail individually inside a batch; `stub.batches = False` answers a batch like
+a single-message script would; `stub.delay` adds latency. `stub.requests`
+counts HTTP calls, `stub.received` holds every message (batches unpacked).
+`manage.py run_gas_stub` runs it in the foreground for manual testing.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+    server: "_StubHTTPServer"
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = None
+
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if body is None:
+            self._reply({"ok": False, "error": "invalid JSON"})
+            return
+        if stub.secret is not None and body.get("secret") != stub.secret:
+            self._reply({"ok": False, "error": "bad secret"})
+            return
+
+        body.pop("secret", None)
+        with stub.lock:
+            stub.requests += 1
+            if "messages" not in body or not stub.batches:
+                stub.received.append(body)
+                self._reply({"ok": not stub.fail and body.get("to") not in stub.reject})
+                return
+            results = []
+            for message in body["messages"]:
+                stub.received.append(message)
+                if message.get("to") in stub.reject:
+                    results.append({"ok": False, "error": "rejected by stub"})
+                else:
+                    results.append({"ok": True})
+        self._reply({"ok": not stub.fail, "results": results})
+
+    def _reply(self, data: dict) -> None:
+        raw = json.dumps(data).encode()
+        self.send_response(200)  # GAS answers 200 even for errors
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            super().log_message(format, *args)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "GasStubServer"
+
+
+class GasStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, secret: str | None = None, verbose: bool = False):
+        self.received: list[dict] = []
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.fail = False
+        self.reject: set[str] = set()
+        self.batches = True
+        self.delay = 0.0
+        self.secret = secret
+        self.verbose = verbose
+
+        self.httpd = _StubHTTPServer((host, port), _Handler)
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/exec"
+
+    def start(self) -> "GasStubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "GasStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,307 @@
+"""
+Booking load test (manage.py benchmark_bookings).
+
+Worker threads hammer the guest booking endpoints with a mix of create,
+edit (move/resize) and cancel requests, either in process through the
+Django test client or over HTTP against a running server (`base_url`; it
+must use the same database, which the harness reads to check results).
+
+- Guests are synthetic (<worker>-<n>@bench.invalid). Their magic-link
+  sessions are created directly in the database, outside the timings.
+- Bookings go to `dates` consecutive days starting `days_ahead` from
+  today, on the chosen slots. One date and one slot is maximum contention.
+- A monitor thread re-aggregates the raw reservations of those dates every
+  `sample_interval` seconds and records every (date, slot) found above its
+  capacity minus blocked seats. The ledger is verified once at the end.
+- Bench reservations, sessions and queued emails are deleted afterwards
+  (emails always, the rest unless keep=True).
+
+In process, the rate limits are switched off for the run and the test
+client's host is allowed. Over HTTP they apply as configured, and 429s are
+reported separately. Only the views' own refusals (full, closed, busy,
+duplicate) count as "rejected"; any other non-2xx answer, such as a 400
+from DisallowedHost or CSRF, is an "error".
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from . import occupancy
+from .models import EmailOutboxModel, EmailSessionModel, ReservationModel, TimeSlotModel
+
+EMAIL_DOMAIN = "bench.invalid"
+KINDS = ("create", "edit", "cancel")
+CLIENT_HOST = "testserver"  # django.test.Client's default Host header
+
+# BookingError codes and the create view's own refusals
+REFUSAL_CODES = {
+    "SLOT_FULL", "FIRST_BOOKING_EXCEEDS", "DAY_CLOSED", "SLOT_CLOSED", "SLOT_BUSY",
+    "DUPLICATE_PENDING",
+}
+
+
+@dataclass
+class Stats:
+    latencies: dict = field(default_factory=lambda: defaultdict(list))  # kind -> [seconds]
+    outcomes: dict = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))  # kind -> outcome -> n
+    violations: dict = field(default_factory=dict)  # (date, slot_id) -> highest booked seen
+    drift: list = field(default_factory=list)
+    elapsed: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, kind: str, seconds: float, outcome: str) -> None:
+        with self.lock:
+            self.latencies[kind].append(seconds)
+            self.outcomes[kind][outcome] += 1
+
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    def count(self, outcome: str, kinds=KINDS) -> int:
+        return sum(self.outcomes[kind][outcome] for kind in kinds)
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(pct / 100 * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+def _is_refusal(payload) -> bool:
+    """
+    True for the booking views' JSON answers that turn a booking down.
+    """
+    if not isinstance(payload, dict) or payload.get("ok") is not False:
+        return False
+    code = payload.get("code")
+    if code in REFUSAL_CODES:
+        return True
+    if code == "FORM_ERROR":
+        # the form's own closure / capacity checks (the bench sends valid fields)
+        return set(payload.get("errors") or {}) <= {"date", "time"}
+    return code is None and "html" in payload  # edit form re-rendered with the booking error
+
+
+def _outcome(status: int, payload) -> str:
+    if status < 300:
+        return "ok"
+    if status == 429:
+        return "rate_limited"
+    if status in (400, 409) and _is_refusal(payload):
+        return "rejected"
+    return "error"
+
+
+# =========================
+# Transports
+# =========================
+def _json(content_type: str, content: bytes):
+    if not content_type.startswith("application/json"):
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+class InProcessTransport:
+    def __init__(self, worker: int):
+        self.client = Client(REMOTE_ADDR=f"198.18.{worker // 256}.{worker % 256}")
+
+    def post(self, path: str, data: dict):
+        response = self.client.post(path, data, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        return response.status_code, _json(response.get("Content-Type", ""), response.content)
+
+    def set_cookie(self, name: str, value: str) -> None:
+        self.client.cookies[name] = value
+
+    def close(self) -> None:
+        pass
+
+
+class HttpTransport:
+    def __init__(self, base_url: str):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.get(self.base_url + "/", timeout=10)  # csrftoken cookie
+
+    def post(self, path: str, data: dict):
+        response = self.session.post(
+            self.base_url + path,
+            data=data,
+            headers={
+                "X-CSRFToken": self.session.cookies.get("csrftoken", ""),
+                "X-Requested-With": "XMLHttpRequest",
+                "Referer": self.base_url + "/",
+            },
+            timeout=30,
+        )
+        return response.status_code, _json(response.headers.get("Content-Type", ""), response.content)
+
+    def set_cookie(self, name: str, value: str) -> None:
+        self.session.cookies.set(name, value)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# =========================
+# Workers
+# =========================
+def _booking_form(email: str, date, slot: TimeSlotModel, party_size: int) -> dict:
+    return {
+        "name": "Bench Guest",
+        "email": email,
+        "phone": "030000000",
+        "date": date.isoformat(),
+        "time": slot.start_time.strftime("%H:%M"),
+        "party_size": party_size,
+        "message": "",
+    }
+
+
+def _worker(worker, transport, queue, queue_lock, stats, dates, slots, mix, max_party, seed):
+    rng = random.Random(seed)
+    cookie_name = getattr(settings, "RESV_SESSION_COOKIE_NAME", "ming_resv_session")
+    mine = []  # [(pk, email, session token)] of this worker's live reservations
+    n = 0
+    try:
+        while True:
+            with queue_lock:
+                if next(queue, None) is None:
+                    return
+
+            kind = rng.choices(KINDS, weights=mix)[0]
+            if kind != "create" and not mine:
+                kind = "create"
+
+            if kind == "create":
+                n += 1
+                email = f"w{worker}-{n}@{EMAIL_DOMAIN}"
+                path = "/reservations/create/"
+                data = _booking_form(email, rng.choice(dates), rng.choice(slots), rng.randint(1, max_party))
+            else:
+                pk, email, raw = entry = rng.choice(mine)
+                transport.set_cookie(cookie_name, raw)
+                if kind == "edit":
+                    path = f"/reservations/update/{pk}/"
+                    data = _booking_form(email, rng.choice(dates), rng.choice(slots), rng.randint(1, max_party))
+                else:
+                    path = f"/reservations/cancel/{pk}/"
+                    data = {}
+
+            started = time.perf_counter()
+            try:
+                outcome = _outcome(*transport.post(path, data))
+            except Exception:
+                outcome = "error"
+            stats.record(kind, time.perf_counter() - started, outcome)
+
+            if outcome == "ok" and kind == "create":
+                pk = ReservationModel.objects.filter(email=email).values_list("pk", flat=True).first()
+                if pk:
+                    mine.append((pk, email, EmailSessionModel.create_for_email(email)[1]))
+            elif outcome == "ok" and kind == "cancel":
+                mine.remove(entry)
+    finally:
+        transport.close()
+        connections.close_all()
+
+
+def _check_capacity(stats, dates, capacities) -> None:
+    expected = occupancy.compute_expected(dates[0], dates[-1])
+    for (date, slot_id), values in expected.items():
+        if slot_id not in capacities:
+            continue
+        allowed = max(capacities[slot_id] - values["blocked_seats"], 0)
+        if values["booked_seats"] > allowed:
+            with stats.lock:
+                key = (date, slot_id)
+                stats.violations[key] = max(stats.violations.get(key, 0), values["booked_seats"])
+
+
+def _monitor(stop, interval, stats, dates, capacities) -> None:
+    try:
+        while not stop.wait(interval):
+            _check_capacity(stats, dates, capacities)
+    finally:
+        connections.close_all()
+
+
+def cleanup(keep: bool = False) -> None:
+    pattern = f"@{EMAIL_DOMAIN}"
+    EmailOutboxModel.objects.filter(to_email__endswith=pattern).delete()
+    if not keep:
+        ReservationModel.objects.filter(email__endswith=pattern).delete()
+        EmailSessionModel.objects.filter(email__endswith=pattern).delete()
+
+
+def run(*, workers=8, operations=400, mix=(60, 25, 15), dates=1, days_ahead=30, slots=None,
+        max_party=4, base_url=None, sample_interval=0.2, keep=False, seed=0) -> Stats:
+    """
+    Run one load test and return its Stats. `mix` weighs create/edit/cancel;
+    `slots` is a list of TimeSlotModel (default: all active ones).
+    """
+    slots = list(slots or TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time"))
+    first = timezone.localdate() + timedelta(days=days_ahead)
+    day_list = [first + timedelta(days=i) for i in range(dates)]
+    capacities = {s.id: s.capacity for s in slots}
+
+    stats = Stats()
+    queue = iter(range(operations))
+    queue_lock = threading.Lock()
+    stop = threading.Event()
+
+    def transport(worker):
+        return HttpTransport(base_url) if base_url else InProcessTransport(worker)
+
+    # bookings from one address would hit the rate limits, not the slots
+    limits = None if base_url else override_settings(
+        RESV_RATE_LIMITS={},
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, CLIENT_HOST],
+    )
+    if limits:
+        limits.enable()
+    try:
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(i, transport(i), queue, queue_lock, stats, day_list, slots, mix, max_party, seed + i),
+            )
+            for i in range(workers)
+        ]
+        monitor = threading.Thread(target=_monitor, args=(stop, sample_interval, stats, day_list, capacities))
+
+        monitor.start()
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats.elapsed = time.perf_counter() - started
+        stop.set()
+        monitor.join()
+    finally:
+        if limits:
+            limits.disable()
+
+    _check_capacity(stats, day_list, capacities)
+    stats.drift = occupancy.verify(day_list[0], day_list[-1])
+    cleanup(keep)
+    return stats
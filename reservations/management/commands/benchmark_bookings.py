@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations import loadtest
+from reservations.models import TimeSlotModel
+
+
+def _ints(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the guest booking endpoints (create / edit / cancel) with concurrent "
+        "workers and report latency percentiles, throughput and whether any date/slot "
+        "ever exceeded its capacity. Uses synthetic @bench.invalid guests; do not run "
+        "against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent workers (default 8).")
+        parser.add_argument("--operations", type=int, default=400,
+                            help="Requests in total (default 400).")
+        parser.add_argument("--mix", default="60,25,15",
+                            help="Weights of create,edit,cancel (default 60,25,15).")
+        parser.add_argument("--dates", type=int, default=1,
+                            help="Distinct dates to book (default 1: everyone competes for the same days).")
+        parser.add_argument("--days-ahead", type=int, default=30,
+                            help="First benchmark date, in days from today (default 30).")
+        parser.add_argument("--slots", type=_ints,
+                            help="Comma-separated slot ids (default: all active slots).")
+        parser.add_argument("--max-party", type=int, default=4,
+                            help="Largest party size requested (default 4).")
+        parser.add_argument("--url",
+                            help="Base URL of a running server on the same database "
+                                 "(default: in process through the test client).")
+        parser.add_argument("--sample-interval", type=float, default=0.2,
+                            help="Seconds between capacity checks during the run (default 0.2).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the benchmark reservations afterwards.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = _ints(options["mix"])
+        except ValueError:
+            raise CommandError("--mix must be three comma-separated integers.")
+        if len(mix) != 3 or min(mix) < 0 or not sum(mix):
+            raise CommandError("--mix must be three non-negative weights for create,edit,cancel.")
+        if min(options["workers"], options["operations"], options["dates"], options["max_party"]) < 1:
+            raise CommandError("--workers, --operations, --dates and --max-party must be at least 1.")
+        if options["days_ahead"] < 2:
+            raise CommandError("--days-ahead must be at least 2 (guests cannot edit within 24 hours).")
+
+        slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
+        if options["slots"]:
+            slots = slots.filter(pk__in=options["slots"])
+        slots = list(slots)
+        if not slots:
+            raise CommandError("No active time slot to book.")
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['operations']} requests "
+            f"(create/edit/cancel {'/'.join(map(str, mix))}) on {options['dates']} date(s) x "
+            f"{len(slots)} slot(s), {'against ' + options['url'] if options['url'] else 'in process'}"
+        )
+        stats = loadtest.run(
+            workers=options["workers"],
+            operations=options["operations"],
+            mix=mix,
+            dates=options["dates"],
+            days_ahead=options["days_ahead"],
+            slots=slots,
+            max_party=options["max_party"],
+            base_url=options["url"],
+            sample_interval=options["sample_interval"],
+            keep=options["keep"],
+            seed=options["seed"],
+        )
+        self._report(stats)
+
+        if stats.violations or stats.drift:
+            for (date, slot_id), booked in sorted(stats.violations.items()):
+                self.stdout.write(f"{date} slot={slot_id}: {booked} seats booked, over capacity")
+            for row in stats.drift:
+                self.stdout.write(f"{row['date']} slot={row['slot_id']}: ledger {row['stored']} != {row['expected']}")
+            raise CommandError(
+                f"Invariant broken: {len(stats.violations)} overbooked date/slot pair(s), "
+                f"{len(stats.drift)} ledger drift(s)."
+            )
+        # a run where nothing got booked proves nothing about capacity
+        if not stats.count("ok", kinds=("create",)):
+            raise CommandError("No booking succeeded; check the errors above (host, CSRF, slots, rate limits).")
+        if stats.count("error"):
+            raise CommandError(
+                f"{stats.count('error')} request(s) failed with an unexpected answer; "
+                "capacity held, but the run is not representative."
+            )
+        self.stdout.write(self.style.SUCCESS("No date/slot exceeded its capacity; ledger consistent."))
+
+    def _report(self, stats):
+        outcomes = ("ok", "rejected", "rate_limited", "error")
+        self.stdout.write(
+            f"{'':8}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  " + "  ".join(outcomes)
+        )
+        rows = [(kind, stats.latencies[kind], stats.outcomes[kind]) for kind in loadtest.KINDS]
+        rows.append((
+            "all",
+            [s for kind in loadtest.KINDS for s in stats.latencies[kind]],
+            {o: sum(stats.outcomes[kind][o] for kind in loadtest.KINDS) for o in outcomes},
+        ))
+        for kind, latencies, counts in rows:
+            p50, p95, p99 = (loadtest.percentile(latencies, p) * 1000 for p in (50, 95, 99))
+            self.stdout.write(
+                f"{kind:8}{len(latencies):>7}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}  "
+                + "  ".join(f"{counts.get(o, 0):>{len(o)}}" for o in outcomes)
+            )
+        self.stdout.write(f"throughput: {stats.total() / stats.elapsed:.1f} requests/s over {stats.elapsed:.2f} s")
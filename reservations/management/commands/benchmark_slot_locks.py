@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from reservations import booking, occupancy
+from reservations.models import SlotOccupancyModel, TimeSlotModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure booking-lock throughput: worker threads claim the per-(date, slot) "
+        "ledger row the way reservations.booking does (read the version, then "
+        "UPDATE ... WHERE version = v), hold it like a booking would and commit, "
+        "retrying lost claims. Run once per number of distinct dates; throughput "
+        "should grow with it on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slot", type=int,
+                            help="Time slot id (default: the first active slot).")
+        parser.add_argument("--threads", type=int, default=8,
+                            help="Concurrent workers (default 8).")
+        parser.add_argument("--bookings", type=int, default=200,
+                            help="Successful claims per run (default 200).")
+        parser.add_argument("--hold-ms", type=float, default=20.0,
+                            help="Time each claim is held, i.e. the booking's save (default 20).")
+        parser.add_argument("--dates", default="1,2,4,8",
+                            help="Comma-separated numbers of distinct dates to spread the bookings over.")
+
+    def handle(self, *args, slot=None, threads=8, bookings=200, hold_ms=20.0, dates="1,2,4,8", **options):
+        try:
+            date_counts = [int(n) for n in dates.split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--dates must be a comma-separated list of integers.")
+        if threads < 1 or bookings < 1 or not date_counts or min(date_counts) < 1:
+            raise CommandError("--threads, --bookings and --dates must be at least 1.")
+
+        slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
+        slot_obj = slots.filter(pk=slot).first() if slot else slots.first()
+        if slot_obj is None:
+            raise CommandError("No active time slot to benchmark.")
+
+        # far enough ahead not to touch real bookings; the empty ledger rows
+        # the claims create are deleted afterwards
+        base = timezone.localdate() + timedelta(days=3650)
+        self.stdout.write(
+            f"{connection.vendor}: slot {slot_obj.pk}, {threads} threads, "
+            f"{bookings} bookings, {hold_ms:g} ms per claim"
+        )
+        if not connection.features.has_select_for_update:
+            self.stdout.write(self.style.WARNING(
+                "This backend has no row locks: every claim takes the database "
+                "write lock, so throughput does not scale with the number of dates."
+            ))
+
+        baseline = None
+        try:
+            for count in date_counts:
+                elapsed, stats = self._run(slot_obj.pk, [base + timedelta(days=i) for i in range(count)],
+                                             threads, bookings, hold_ms / 1000)
+                rate = (bookings - stats["conflicts"]) / elapsed
+                baseline = baseline or rate
+                self.stdout.write(
+                    f"{count:>4} date(s): {rate:8.1f} bookings/s  ({rate / baseline:.2f}x), "
+                    f"{stats['retries']} lost claim(s) retried, {stats['conflicts']} gave up"
+                )
+        finally:
+            SlotOccupancyModel.objects.filter(
+                date__gte=base, slot_id=slot_obj.pk, booked_parties=0, blocked_seats=0,
+            ).delete()
+
+    def _run(self, slot_id, dates, threads, bookings, hold):
+        queue = iter(range(bookings))
+        queue_lock = threading.Lock()
+        errors = []
+        stats = {"retries": 0, "conflicts": 0}
+        stats_lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    with queue_lock:
+                        n = next(queue, None)
+                    if n is None:
+                        return
+                    date = dates[n % len(dates)]
+                    for attempt in range(booking.max_retries()):
+                        row = occupancy.ledger_row(date, slot_id)
+                        with transaction.atomic():
+                            if occupancy.claim(row):
+                                time.sleep(hold)
+                                break
+                        with stats_lock:
+                            stats["retries"] += 1
+                        time.sleep(random.uniform(0, 0.005 * (attempt + 1)))  # as in booking._commit
+                    else:
+                        with stats_lock:
+                            stats["conflicts"] += 1  # the guest would get BookingConflict
+            except Exception as exc:  # reported after the run
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            raise CommandError(f"{len(errors)} worker(s) failed: {errors[0]!r}")
+        return elapsed, stats
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import overview
+from reservations import synthetic
+from reservations.models import TimeSlotModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic multi-year reservation history (reservations, blocked days, "
+        "magic-link sessions, feedback) with bulk_create, for benchmarks and query-plan "
+        "checks. Synthetic rows use @synthetic.invalid addresses; --clear removes them."
+    )
+
+    def add_arguments(self, parser):
+        defaults = synthetic.Options()
+        parser.add_argument("--years", type=float, default=defaults.years,
+                            help=f"History length in years (default {defaults.years}).")
+        parser.add_argument("--future-days", type=int, default=defaults.future_days,
+                            help=f"Days of upcoming bookings (default {defaults.future_days}).")
+        parser.add_argument("--occupancy", type=float, default=defaults.occupancy,
+                            help=f"Mean share of free seats booked, 0..1 (default {defaults.occupancy}).")
+        parser.add_argument("--cancel-rate", type=float, default=defaults.cancel_rate,
+                            help=f"Cancelled parties per booked party (default {defaults.cancel_rate}).")
+        parser.add_argument("--no-show-rate", type=float, default=defaults.no_show_rate,
+                            help=f"Past parties never marked arrived (default {defaults.no_show_rate}).")
+        parser.add_argument("--closed-days-per-year", type=int, default=defaults.closed_days_per_year)
+        parser.add_argument("--slot-blocks-per-year", type=int, default=defaults.slot_blocks_per_year)
+        parser.add_argument("--sessions-per-day", type=float, default=defaults.sessions_per_day)
+        parser.add_argument("--feedback-per-day", type=float, default=defaults.feedback_per_day)
+        parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size,
+                            help=f"Rows per bulk_create transaction (default {defaults.chunk_size}).")
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--clear", action="store_true",
+                            help="Delete the existing synthetic data before generating.")
+        parser.add_argument("--clear-only", action="store_true",
+                            help="Delete the synthetic data and exit.")
+
+    def handle(self, *args, clear=False, clear_only=False, **options):
+        if clear or clear_only:
+            deleted = synthetic.delete()
+            overview.invalidate()
+            self.stdout.write("Deleted " + ", ".join(f"{n} {what}" for what, n in deleted.items()) + ".")
+            if clear_only:
+                return
+
+        fields = synthetic.Options.__dataclass_fields__
+        opts = synthetic.Options(**{k: v for k, v in options.items() if k in fields})
+        if opts.years <= 0 or opts.future_days < 0 or opts.chunk_size < 1:
+            raise CommandError("--years must be positive, --future-days and --chunk-size non-negative.")
+        if not 0 <= opts.occupancy <= 1:
+            raise CommandError("--occupancy must be between 0 and 1.")
+
+        slots = TimeSlotModel.objects.filter(is_active=True).order_by("sort_order", "start_time")
+        if not slots:
+            raise CommandError("No active time slots; create them in the dashboard first.")
+
+        synthetic.Generator(opts, slots, stdout=self.stdout).run()
+        overview.invalidate()
+        self.stdout.write(self.style.SUCCESS("Synthetic data generated."))
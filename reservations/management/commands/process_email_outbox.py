@@ -0,0 +1,58 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mingdyn import metrics
+from reservations import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued GAS emails from the outbox. Runs as a long-lived worker "
+        "(systemd / supervisor) or once per invocation with --once (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Process the due messages once and exit.")
+        parser.add_argument("--batch-size", type=int, default=50,
+                            help="Messages claimed per round (default 50); GAS_BATCH_SIZE "
+                                 "of them go into one webhook call.")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty (default 5).")
+
+    def handle(self, *args, once=False, batch_size=50, interval=5.0, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        self._stop = False
+
+        def stop(signum, frame):
+            self._stop = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        totals = {"sent": 0, "deferred": 0, "failed": 0}
+        while not self._stop:
+            result = outbox.process_batch(batch_size)
+            for key in totals:
+                totals[key] += result[key]
+            if result["claimed"]:
+                self.stdout.write(
+                    f"sent={result['sent']} deferred={result['deferred']} failed={result['failed']}"
+                )
+            metrics.publish_shared()  # GAS latency for /metrics, served by the web processes
+
+            if result["claimed"] == batch_size:
+                continue  # more may be due right away
+            if once:
+                break
+            time.sleep(interval)
+
+        metrics.publish_shared(force=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox worker stopped: {totals['sent']} sent, {totals['deferred']} deferred "
+            f"(GAS circuit open), {totals['failed']} failed."
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from reservations.gas_stub import GasStubServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Apps Script email webhook. Point "
+        "GAS_EMAIL_WEBHOOK_URL at the printed URL to test emails without sending them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--fail", action="store_true",
+                            help='Answer every request with {"ok": false}.')
+        parser.add_argument("--delay", type=float, default=0.0,
+                            help="Seconds to wait before answering.")
+
+    def handle(self, *args, host, port, fail, delay, **options):
+        stub = GasStubServer(host, port, verbose=True)
+        stub.fail = fail
+        stub.delay = delay
+
+        self.stdout.write(self.style.SUCCESS(f"GAS stub listening on {stub.url}"))
+        try:
+            stub.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.httpd.server_close()
+            self.stdout.write(f"{len(stub.received)} message(s) received.")
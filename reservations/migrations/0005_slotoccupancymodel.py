@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_occupancy(apps, schema_editor):
+    ReservationModel = apps.get_model("reservations", "ReservationModel")
+    DaySlotBlockModel = apps.get_model("reservations", "DaySlotBlockModel")
+    SlotOccupancyModel = apps.get_model("reservations", "SlotOccupancyModel")
+
+    rows = {}
+    for row in (
+        ReservationModel.objects
+        .exclude(status="cancelled")
+        .values("date", "slot_id")
+        .annotate(seats=Sum("party_size"), parties=Count("id"))
+        .order_by()
+    ):
+        rows[(row["date"], row["slot_id"])] = SlotOccupancyModel(
+            date=row["date"],
+            slot_id=row["slot_id"],
+            booked_seats=row["seats"] or 0,
+            booked_parties=row["parties"] or 0,
+        )
+
+    for row in (
+        DaySlotBlockModel.objects
+        .filter(blocked_day__isnull=False)
+        .values("blocked_day__date", "slot_id")
+        .annotate(seats=Sum("blocked_seats"))
+        .order_by()
+    ):
+        key = (row["blocked_day__date"], row["slot_id"])
+        obj = rows.setdefault(key, SlotOccupancyModel(date=key[0], slot_id=key[1]))
+        obj.blocked_seats = row["seats"] or 0
+
+    SlotOccupancyModel.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_reservationmodel_cancellation_note_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotOccupancyModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_seats', models.IntegerField(default=0)),
+                ('booked_parties', models.IntegerField(default=0)),
+                ('blocked_seats', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='reservations.timeslotmodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['slot', 'date'], name='reservation_slot_id_d9d1aa_idx')],
+                'unique_together': {('date', 'slot')},
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_emailoutboxmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutboxmodel',
+            name='group',
+            field=models.CharField(blank=True, db_index=True, max_length=80),
+        ),
+    ]
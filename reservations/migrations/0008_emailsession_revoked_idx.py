@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_emailoutboxmodel_group'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailsessionmodel',
+            index=models.Index(condition=models.Q(('is_revoked', True)), fields=['created_at'], name='resv_session_revoked_idx'),
+        ),
+    ]
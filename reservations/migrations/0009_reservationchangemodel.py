@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_emailsession_revoked_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationChangeModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reservation_id', models.PositiveIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0009_reservationchangemodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationchangemodel',
+            name='event',
+            field=models.CharField(default='updated', max_length=20),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:25
+
+from django.db import migrations, models
+
+# pg_trgm GIN indexes on exactly the expressions Django's icontains/contains
+# emit on PostgreSQL, so the dashboard search can use them. Skipped on
+# other databases (SQLite in tests/local dev just scans).
+TRIGRAM_INDEXES = {
+    "resv_name_trgm_idx": 'UPPER(("name")::text) gin_trgm_ops',
+    "resv_email_trgm_idx": 'UPPER(("email")::text) gin_trgm_ops',
+    "resv_phone_digits_trgm_idx": '(("phone_digits")::text) gin_trgm_ops',
+}
+TABLE = "reservations_reservationmodel"
+
+
+def backfill_phone_digits(apps, schema_editor):
+    ReservationModel = apps.get_model("reservations", "ReservationModel")
+    batch = []
+    for pk, phone in ReservationModel.objects.values_list("pk", "phone").iterator(chunk_size=2000):
+        batch.append(ReservationModel(pk=pk, phone_digits="".join(ch for ch in phone or "" if ch.isdigit())))
+        if len(batch) >= 2000:
+            ReservationModel.objects.bulk_update(batch, ["phone_digits"])
+            batch = []
+    if batch:
+        ReservationModel.objects.bulk_update(batch, ["phone_digits"])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{TABLE}" USING gin ({expression})')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0010_reservationchangemodel_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationmodel',
+            name='phone_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(backfill_phone_digits, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
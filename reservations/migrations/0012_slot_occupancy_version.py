@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0011_reservation_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slotoccupancymodel',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -6,7 +6,6 @@ import secrets
 from datetime import timedelta
 from django.forms import ValidationError
 from django.utils import timezone
-from django.db.models import Sum
 
 class TimeSlotModel(models.Model):
     """
@@ -39,23 +38,19 @@ class TimeSlotModel(models.Model):
         # New capacity the admin is trying to set
         new_capacity = self.capacity or 0
 
-        # total booked per date for this slot (today and future)
+        # Find the maximum booked on any single date (today and future)
         today = timezone.localdate()
 
-        qs = (self.reservations
-            .filter(date__gte=today)
-            .exclude(status=ReservationModel.Status.CANCELLED)
-            .values("date")
-            .annotate(total=Sum("party_size"))
-            .order_by())
-
-        # Find the maximum booked on any single date
-        max_booked = 0
-        worst_date = None
-        for row in qs:
-            if (row["total"] or 0) > max_booked:
-                max_booked = row["total"] or 0
-                worst_date = row["date"]
+        busiest = (
+            SlotOccupancyModel.objects
+            .filter(slot=self, date__gte=today)
+            .order_by("-booked_seats", "date")
+            .values("date", "booked_seats")
+            .first()
+        )
+
+        max_booked = busiest["booked_seats"] if busiest else 0
+        worst_date = busiest["date"] if busiest else None
 
         if new_capacity < max_booked:
             raise ValidationError({
@@ -67,6 +62,12 @@ class TimeSlotModel(models.Model):
 
 def default_time():
     return timezone.localtime(timezone.now()).time()
+
+def digits_only(value) -> str:
+    """
+    "+49 (0)171 234-567" -> "490171234567"; what phone search matches on.
+    """
+    return "".join(ch for ch in value or "" if ch.isdigit())
   
 class ReservationModel(models.Model):
     class Status(models.TextChoices):
@@ -76,6 +77,7 @@ class ReservationModel(models.Model):
     name = models.CharField(max_length=120)
     email = models.EmailField()
     phone = models.CharField(max_length=40)
+    phone_digits = models.CharField(max_length=40, blank=True, default="", editable=False)  # set in save()
 
     status = models.CharField(
         max_length=20,
@@ -104,6 +106,15 @@ class ReservationModel(models.Model):
             models.Index(fields=["email", "status"]),
             models.Index(fields=["status", "date", "time"]),
         ]
+        # PostgreSQL also has pg_trgm GIN indexes for the dashboard search
+        # (migration 0011, see dashboard/search.py).
+
+    def save(self, *args, **kwargs):
+        self.phone_digits = digits_only(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_digits"}
+        return super().save(*args, **kwargs)
 
 class BlockedDayModel(models.Model):
     date = models.DateField(unique=True)
@@ -153,13 +164,8 @@ class DaySlotBlockModel(models.Model):
         if not self.blocked_day_id:
             return
 
-        # 2) booked seats already in that date+slot
-        booked = (
-            ReservationModel.objects
-            .filter(date=self.blocked_day.date, slot=self.slot)
-            .exclude(status=ReservationModel.Status.CANCELLED)
-            .aggregate(total=Sum("party_size"))["total"] or 0
-        )
+        # 2) booked seats already in that date+slot (from the occupancy ledger)
+        booked = SlotOccupancyModel.booked_seats_for(self.blocked_day.date, self.slot_id)
 
         # Allowed capacity after blocking
         allowed = self.slot.capacity - self.blocked_seats
@@ -177,6 +183,43 @@ class DaySlotBlockModel(models.Model):
         self.full_clean()
         return super().save(*args, **kwargs)
 
+class SlotOccupancyModel(models.Model):
+    """
+    Precomputed occupancy per (date, slot).
+
+    Maintained transactionally by reservations.occupancy whenever a
+    reservation or a slot block changes, so capacity checks read one row
+    instead of aggregating over ReservationModel.
+    Rebuild/verify with `manage.py rebuild_occupancy`.
+    """
+    date = models.DateField()
+    slot = models.ForeignKey(TimeSlotModel, on_delete=models.CASCADE, related_name="occupancy")
+
+    booked_seats = models.IntegerField(default=0)    # sum of party_size (not cancelled)
+    booked_parties = models.IntegerField(default=0)  # number of reservations (not cancelled)
+    blocked_seats = models.IntegerField(default=0)   # from DaySlotBlockModel
+    version = models.PositiveIntegerField(default=0)  # bumped on every change (see reservations.booking)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("date", "slot")
+        indexes = [
+            models.Index(fields=["slot", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.slot_id}: {self.booked_seats} booked / {self.blocked_seats} blocked"
+
+    @classmethod
+    def booked_seats_for(cls, date, slot_id) -> int:
+        return (
+            cls.objects
+            .filter(date=date, slot_id=slot_id)
+            .values_list("booked_seats", flat=True)
+            .first()
+        ) or 0
+
 class EmailSessionModel(models.Model):
     email = models.EmailField(db_index=True)
     token_hash = models.CharField(max_length=64, unique=True)  # sha256 hex
@@ -189,6 +232,16 @@ class EmailSessionModel(models.Model):
 
     is_revoked = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # purge_email_sessions walks revoked rows by age
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_revoked=True),
+                name="resv_session_revoked_idx",
+            ),
+        ]
+
     @staticmethod
     def hash_token(raw: str) -> str:
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -211,4 +264,61 @@ class EmailSessionModel(models.Model):
         return obj, raw
 
     def is_valid(self) -> bool:
-        return (not self.is_revoked) and (self.expires_at > timezone.now())
\ No newline at end of file
+        return (not self.is_revoked) and (self.expires_at > timezone.now())
+
+
+class EmailOutboxModel(models.Model):
+    """
+    Outgoing GAS emails. Rows are written in the same transaction as the
+    change that triggers them and delivered by `manage.py process_email_outbox`.
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        DEAD = "dead", "Dead"  # gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+
+    kind = models.CharField(max_length=40)  # "confirmation", "magic_link", "update", "feedback", "closure"
+    # groups the messages of one bulk notification, e.g. "closure:2026-12-24"
+    group = models.CharField(max_length=80, blank=True, db_index=True)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200, blank=True)
+    payload = models.JSONField(default=dict)  # GAS payload without the secret
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} → {self.to_email} ({self.status})"
+
+
+class ReservationChangeModel(models.Model):
+    """
+    Append-only change log behind the dashboard's live reservation list.
+    The row id is the version stamp; open dashboards poll for ids above
+    the last one they saw (see reservations/changefeed.py).
+    """
+    reservation_id = models.PositiveIntegerField()  # no FK: deleted rows stay listed
+    deleted = models.BooleanField(default=False)
+    # "created", "updated", "arrived", "cancelled" or "deleted" (see events.py)
+    event = models.CharField(max_length=20, default="updated")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.pk} reservation {self.reservation_id}{' (deleted)' if self.deleted else ''}"
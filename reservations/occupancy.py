@@ -0,0 +1,313 @@
+"""
+Per-(date, slot) occupancy ledger.
+
+SlotOccupancyModel rows hold the booked seats / parties and the blocked
+seats for one date+slot. They are updated inside the same transaction as
+the reservation or slot block change (see reservations.signals), so capacity
+checks only need to read a single row.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from . import availability
+from .models import DaySlotBlockModel, ReservationModel, SlotOccupancyModel
+
+# Fields that change what a reservation contributes to the ledger.
+LEDGER_FIELDS = {"date", "slot", "slot_id", "party_size", "status"}
+
+
+def ledger_state(reservation) -> tuple | None:
+    """
+    (date, slot_id, party_size) a reservation contributes to the ledger,
+    or None if it does not count (unsaved, cancelled, incomplete).
+    """
+    if reservation is None:
+        return None
+    if reservation.status == ReservationModel.Status.CANCELLED:
+        return None
+    if not reservation.date or not reservation.slot_id or not reservation.party_size:
+        return None
+    return (reservation.date, reservation.slot_id, reservation.party_size)
+
+
+def stored_ledger_state(pk) -> tuple | None:
+    """
+    Ledger state of a reservation as currently stored in the database.
+    """
+    row = (
+        ReservationModel.objects
+        .filter(pk=pk)
+        .values("date", "slot_id", "party_size", "status")
+        .first()
+    )
+    if not row or row["status"] == ReservationModel.Status.CANCELLED:
+        return None
+    return (row["date"], row["slot_id"], row["party_size"])
+
+
+def seat_counts(date, slot_id, *, exclude: tuple | None = None) -> tuple[int, int]:
+    """
+    (booked_seats, blocked_seats) for date+slot in one read. `exclude` is a
+    ledger_state() that should not be counted (e.g. the reservation that is
+    being edited).
+    """
+    row = (
+        SlotOccupancyModel.objects
+        .filter(date=date, slot_id=slot_id)
+        .values_list("booked_seats", "blocked_seats")
+        .first()
+    )
+    booked, blocked = row or (0, 0)
+    if exclude and exclude[0] == date and exclude[1] == slot_id:
+        booked -= exclude[2]
+    return max(booked, 0), blocked
+
+
+def booked_seats(date, slot_id, *, exclude: tuple | None = None) -> int:
+    return seat_counts(date, slot_id, exclude=exclude)[0]
+
+
+def _apply_delta(date, slot_id, *, seats: int, parties: int) -> None:
+    if not seats and not parties:
+        return
+
+    with transaction.atomic():
+        updated = (
+            SlotOccupancyModel.objects
+            .filter(date=date, slot_id=slot_id)
+            .update(
+                booked_seats=F("booked_seats") + seats,
+                booked_parties=F("booked_parties") + parties,
+                version=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+        )
+        if updated:
+            return
+
+        try:
+            with transaction.atomic():
+                SlotOccupancyModel.objects.create(
+                    date=date,
+                    slot_id=slot_id,
+                    booked_seats=seats,
+                    booked_parties=parties,
+                    blocked_seats=_blocked_seats_from_blocks(date, slot_id),
+                )
+        except IntegrityError:
+            # Created concurrently by another booking → just apply the delta.
+            SlotOccupancyModel.objects.filter(date=date, slot_id=slot_id).update(
+                booked_seats=F("booked_seats") + seats,
+                booked_parties=F("booked_parties") + parties,
+                version=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+
+
+# =========================
+# Optimistic booking locks
+# =========================
+def ledger_row(date, slot_id) -> SlotOccupancyModel:
+    """
+    The ledger row of one (date, slot) as committed, created empty if missing.
+    """
+    row = SlotOccupancyModel.objects.filter(date=date, slot_id=slot_id).first()
+    if row is not None:
+        return row
+    blocked = _blocked_seats_from_blocks(date, slot_id)  # read before the write (SQLite lock upgrade)
+    try:
+        with transaction.atomic():
+            return SlotOccupancyModel.objects.create(date=date, slot_id=slot_id, blocked_seats=blocked)
+    except IntegrityError:
+        return SlotOccupancyModel.objects.get(date=date, slot_id=slot_id)
+
+
+def claim(row: SlotOccupancyModel) -> bool:
+    """
+    Bump the version of a ledger row read earlier, only if nothing changed
+    it since (optimistic lock, see reservations.booking). PostgreSQL makes
+    a concurrent claim wait for this transaction and then fail.
+    """
+    return bool(
+        SlotOccupancyModel.objects
+        .filter(pk=row.pk, version=row.version)
+        .update(version=F("version") + 1, updated_at=timezone.now())
+    )
+
+
+def touch(date, slot_ids) -> None:
+    """
+    Bump the version of the ledger rows of `date` for `slot_ids`, creating
+    missing ones, when the day or a slot is closed. A booking that checked
+    closures before this change then fails its claim() and re-checks.
+    """
+    now = timezone.now()
+    slot_ids = sorted(set(slot_ids))  # claim() order, so a move never deadlocks with this
+    touched = {
+        slot_id for slot_id in slot_ids
+        # the write goes first (SQLite lock upgrade)
+        if SlotOccupancyModel.objects.filter(date=date, slot_id=slot_id).update(
+            version=F("version") + 1, updated_at=now,
+        )
+    }
+    missing = [slot_id for slot_id in slot_ids if slot_id not in touched]
+    SlotOccupancyModel.objects.bulk_create(
+        [
+            SlotOccupancyModel(date=date, slot_id=slot_id, blocked_seats=_blocked_seats_from_blocks(date, slot_id))
+            for slot_id in missing
+        ],
+        ignore_conflicts=True,
+    )
+    if missing:
+        # rows created concurrently by a booking (ignored above) must move too
+        SlotOccupancyModel.objects.filter(date=date, slot_id__in=missing).update(
+            version=F("version") + 1, updated_at=now,
+        )
+
+
+def apply_reservation_change(before: tuple | None, after: tuple | None) -> None:
+    """
+    Move a reservation's contribution from `before` to `after`
+    (both ledger_state() tuples or None).
+    """
+    if before == after:
+        return
+
+    if before and after and before[:2] == after[:2]:
+        # same date+slot, only the party size changed
+        _apply_delta(after[0], after[1], seats=after[2] - before[2], parties=0)
+        return
+
+    if before:
+        _apply_delta(before[0], before[1], seats=-before[2], parties=-1)
+    if after:
+        _apply_delta(after[0], after[1], seats=after[2], parties=1)
+
+
+def _blocked_seats_from_blocks(date, slot_id) -> int:
+    return (
+        DaySlotBlockModel.objects
+        .filter(blocked_day__date=date, slot_id=slot_id)
+        .aggregate(total=Sum("blocked_seats"))["total"] or 0
+    )
+
+
+def refresh_blocked_seats(date, slot_id) -> None:
+    """
+    Re-read the slot block for date+slot into the ledger row.
+    """
+    if not date or not slot_id:
+        return
+
+    blocked = _blocked_seats_from_blocks(date, slot_id)
+    with transaction.atomic():
+        updated = SlotOccupancyModel.objects.filter(date=date, slot_id=slot_id).update(
+            blocked_seats=blocked,
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+        if not updated and blocked:
+            SlotOccupancyModel.objects.get_or_create(
+                date=date,
+                slot_id=slot_id,
+                defaults={"blocked_seats": blocked},
+            )
+
+
+def compute_expected(date_from=None, date_to=None) -> dict:
+    """
+    Ledger values derived from the raw reservations and slot blocks,
+    keyed by (date, slot_id).
+    """
+    reservations = ReservationModel.objects.exclude(status=ReservationModel.Status.CANCELLED)
+    blocks = DaySlotBlockModel.objects.filter(blocked_day__isnull=False)
+    if date_from:
+        reservations = reservations.filter(date__gte=date_from)
+        blocks = blocks.filter(blocked_day__date__gte=date_from)
+    if date_to:
+        reservations = reservations.filter(date__lte=date_to)
+        blocks = blocks.filter(blocked_day__date__lte=date_to)
+
+    expected = defaultdict(lambda: {"booked_seats": 0, "booked_parties": 0, "blocked_seats": 0})
+
+    for row in (
+        reservations
+        .values("date", "slot_id")
+        .annotate(seats=Sum("party_size"), parties=Count("id"))
+        .order_by()
+    ):
+        key = (row["date"], row["slot_id"])
+        expected[key]["booked_seats"] = row["seats"] or 0
+        expected[key]["booked_parties"] = row["parties"] or 0
+
+    for row in (
+        blocks
+        .values("blocked_day__date", "slot_id")
+        .annotate(seats=Sum("blocked_seats"))
+        .order_by()
+    ):
+        expected[(row["blocked_day__date"], row["slot_id"])]["blocked_seats"] = row["seats"] or 0
+
+    return dict(expected)
+
+
+def _ledger_rows(date_from=None, date_to=None):
+    qs = SlotOccupancyModel.objects.all()
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def verify(date_from=None, date_to=None) -> list[dict]:
+    """
+    Compare the ledger with the raw data. Returns one dict per drifting
+    (date, slot_id) with the stored and the expected values.
+    """
+    expected = compute_expected(date_from, date_to)
+    empty = {"booked_seats": 0, "booked_parties": 0, "blocked_seats": 0}
+    stored = {
+        (row["date"], row["slot_id"]): row
+        for row in _ledger_rows(date_from, date_to).values(
+            "date", "slot_id", "booked_seats", "booked_parties", "blocked_seats"
+        )
+    }
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, empty)
+        have = stored.get(key, empty)
+        if any(have[f] != want[f] for f in empty):
+            drift.append({
+                "date": key[0],
+                "slot_id": key[1],
+                "stored": {f: have[f] for f in empty},
+                "expected": dict(want),
+            })
+    return drift
+
+
+@transaction.atomic
+def rebuild(date_from=None, date_to=None) -> int:
+    """
+    Replace the ledger rows in the given range with values recomputed from
+    the raw data. Returns the number of rows written.
+    """
+    expected = compute_expected(date_from, date_to)
+
+    _ledger_rows(date_from, date_to).delete()
+    SlotOccupancyModel.objects.bulk_create(
+        [
+            SlotOccupancyModel(date=key[0], slot_id=key[1], **values)
+            for key, values in expected.items()
+        ],
+        batch_size=1000,
+    )
+    availability.invalidate()
+    return len(expected)
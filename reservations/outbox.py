@@ -0,0 +1,281 @@
+"""
+Persisted outbox for GAS emails.
+
+Views only insert an EmailOutboxModel row (inside their own transaction), so
+a slow or failing Apps Script webhook never blocks a booking. The worker
+(`manage.py process_email_outbox`) claims due rows, posts them, and retries
+failures with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, after
+which the row is dead-lettered and shown in the dashboard.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .email_sender import (
+    build_feedback_notification_email,
+    build_magic_link_email,
+    build_reservation_confirmation_email,
+    build_closure_notice_email,
+    build_reservation_update_email,
+    post_batch_to_gas,
+    post_to_gas,
+)
+from .gas_client import CircuitOpenError, GasBatchUnsupported
+from .models import BlockedDayModel, EmailOutboxModel, ReservationModel
+
+logger = logging.getLogger(__name__)
+
+Status = EmailOutboxModel.Status
+
+
+def max_attempts() -> int:
+    return getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 6)
+
+
+def backoff(attempts: int) -> timedelta:
+    """
+    Delay before retry number `attempts` (1-based): base * 2^(attempts-1), capped.
+    """
+    base = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30)
+    cap = getattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), cap))
+
+
+def batch_size() -> int:
+    """
+    Messages per webhook call for bulk notices; 1 disables the batch protocol.
+    """
+    return max(getattr(settings, "GAS_BATCH_SIZE", 1), 1)
+
+
+def _message(kind: str, payload: dict, group: str = "") -> EmailOutboxModel:
+    return EmailOutboxModel(
+        kind=kind,
+        group=group,
+        to_email=payload.get("to", ""),
+        subject=(payload.get("subject") or "")[:200],
+        payload=payload,
+    )
+
+
+def enqueue(kind: str, payload: dict) -> EmailOutboxModel:
+    message = _message(kind, payload)
+    message.save()
+    return message
+
+
+# =========================
+# Senders
+# =========================
+def queue_reservation_confirmation(**kwargs) -> EmailOutboxModel:
+    return enqueue("confirmation", build_reservation_confirmation_email(**kwargs))
+
+
+def queue_magic_link(**kwargs) -> EmailOutboxModel:
+    return enqueue("magic_link", build_magic_link_email(**kwargs))
+
+
+def queue_reservation_update(**kwargs) -> EmailOutboxModel:
+    return enqueue("update", build_reservation_update_email(**kwargs))
+
+
+def queue_feedback_notification(**kwargs) -> EmailOutboxModel:
+    return enqueue("feedback", build_feedback_notification_email(**kwargs))
+
+
+def queue_closure_notices(blocked_day: BlockedDayModel, *, restaurant_name: str = "Ming Dynastie") -> int:
+    """
+    Queue a notice for every active reservation hit by `blocked_day`: all of
+    them if the day is closed, otherwise those in closed slots. Guests that
+    were already notified for this date are skipped, so saving the day again
+    does not send duplicates. Returns the number of queued messages.
+    """
+    reservations = (
+        ReservationModel.objects
+        .exclude(status=ReservationModel.Status.CANCELLED)
+        .filter(date=blocked_day.date)
+        .exclude(email="")
+        .order_by("time")
+    )
+    if not blocked_day.is_closed:
+        closed_slots = blocked_day.slot_blocks.filter(is_closed=True).values_list("slot_id", flat=True)
+        reservations = reservations.filter(slot_id__in=list(closed_slots))
+
+    group = f"closure:{blocked_day.date.isoformat()}"
+    already = set(
+        EmailOutboxModel.objects
+        .filter(group=group)
+        .values_list("to_email", flat=True)
+    )
+
+    messages = []
+    for r in reservations:
+        email = r.email.strip().lower()
+        if email in already:
+            continue
+        already.add(email)
+        messages.append(_message("closure", build_closure_notice_email(
+            to_email=email,
+            restaurant_name=restaurant_name,
+            reservation_date=r.date.strftime("%d.%m.%Y"),
+            reservation_time=r.time.strftime("%H:%M"),
+            party_size=r.party_size,
+            customer_name=r.name,
+            reason=blocked_day.reason,
+        ), group=group))
+
+    EmailOutboxModel.objects.bulk_create(messages, batch_size=500)
+    return len(messages)
+
+
+# =========================
+# Worker
+# =========================
+def claim_batch(limit: int) -> list[EmailOutboxModel]:
+    """
+    Lock up to `limit` due messages for this worker. Rows stuck in SENDING
+    (worker crashed mid-send) are picked up again after the claim timeout.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS", 300))
+
+    with transaction.atomic():
+        ids = list(
+            EmailOutboxModel.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Status.PENDING, next_attempt_at__lte=now)
+                | Q(status=Status.SENDING, locked_at__lt=stale)
+            )
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        EmailOutboxModel.objects.filter(id__in=ids).update(status=Status.SENDING, locked_at=now)
+
+    return list(EmailOutboxModel.objects.filter(id__in=ids).order_by("next_attempt_at"))
+
+
+def mark_sent(message: EmailOutboxModel) -> None:
+    message.status = Status.SENT
+    message.attempts += 1
+    message.sent_at = timezone.now()
+    message.locked_at = None
+    message.last_error = ""
+    # drop the body once delivered: magic links carry a login token
+    message.payload = {}
+    message.save(update_fields=["status", "attempts", "sent_at", "locked_at", "last_error", "payload"])
+
+
+def mark_failed(message: EmailOutboxModel, error: str) -> None:
+    message.attempts += 1
+    message.locked_at = None
+    message.last_error = error[:2000]
+    if message.attempts >= max_attempts():
+        message.status = Status.DEAD
+        logger.error("Outbox message %s dead after %s attempts: %s", message.pk, message.attempts, error)
+    else:
+        message.status = Status.PENDING
+        message.next_attempt_at = timezone.now() + backoff(message.attempts)
+    message.save(update_fields=["status", "attempts", "next_attempt_at", "locked_at", "last_error"])
+
+
+def release(message: EmailOutboxModel, retry_at) -> None:
+    """
+    Hand a claimed message back without counting an attempt (GAS was not
+    even contacted because its circuit breaker is open).
+    """
+    message.status = Status.PENDING
+    message.locked_at = None
+    message.next_attempt_at = retry_at
+    message.save(update_fields=["status", "locked_at", "next_attempt_at"])
+
+
+# deliver() outcomes
+SENT = "sent"
+DEFERRED = "deferred"  # released unattempted: the GAS circuit breaker is open
+FAILED = "failed"  # attempt counted, retried later or dead-lettered
+
+
+def deliver(message: EmailOutboxModel) -> str:
+    """
+    Send one message and record its result. Returns SENT, DEFERRED or FAILED.
+    """
+    try:
+        post_to_gas(message.payload)
+    except CircuitOpenError as e:
+        release(message, datetime.fromtimestamp(e.retry_at, tz=dt_timezone.utc))
+        return DEFERRED
+    except Exception as e:
+        mark_failed(message, str(e))
+        return FAILED
+    mark_sent(message)
+    return SENT
+
+
+def deliver_batch(messages: list[EmailOutboxModel]) -> Counter:
+    """
+    Send `messages` in one webhook call and record each message's own
+    result. Returns the number of messages per deliver() outcome.
+    """
+    if len(messages) == 1:
+        return Counter([deliver(messages[0])])
+
+    try:
+        results = post_batch_to_gas([m.payload for m in messages])
+    except CircuitOpenError as e:
+        retry_at = datetime.fromtimestamp(e.retry_at, tz=dt_timezone.utc)
+        for m in messages:
+            release(m, retry_at)
+        return Counter({DEFERRED: len(messages)})
+    except GasBatchUnsupported as e:
+        logger.warning("GAS rejected a batch of %s, sending them one by one: %s", len(messages), e)
+        return Counter(deliver(m) for m in messages)
+    except Exception as e:
+        for m in messages:
+            mark_failed(m, str(e))
+        return Counter({FAILED: len(messages)})
+
+    outcomes = Counter()
+    for m, result in zip(messages, results):
+        if result["ok"]:
+            mark_sent(m)
+            outcomes[SENT] += 1
+        else:
+            mark_failed(m, result["error"] or "rejected by GAS")
+            outcomes[FAILED] += 1
+    return outcomes
+
+
+def process_batch(limit: int = 50) -> dict:
+    """
+    Claim and deliver one batch. Bulk notices (messages with a `group`) go
+    `batch_size()` per webhook call, everything else one per call.
+    Returns {"claimed", "sent", "deferred", "failed"}.
+    """
+    messages = claim_batch(limit)
+    size = batch_size()
+    bulk = [m for m in messages if m.group]
+    outcomes = Counter(deliver(m) for m in messages if not m.group)
+    for i in range(0, len(bulk), size):
+        outcomes += deliver_batch(bulk[i:i + size])
+    return {"claimed": len(messages), **{key: outcomes[key] for key in (SENT, DEFERRED, FAILED)}}
+
+
+def retry(message: EmailOutboxModel) -> None:
+    """
+    Put a dead (or failing) message back into the queue with fresh attempts.
+    """
+    message.status = Status.PENDING
+    message.attempts = 0
+    message.next_attempt_at = timezone.now()
+    message.locked_at = None
+    message.save(update_fields=["status", "attempts", "next_attempt_at", "locked_at"])
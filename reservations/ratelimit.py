@@ -0,0 +1,180 @@
+"""
+Rate limiting and duplicate-submission guard for the public endpoints.
+
+Sliding-window counters per (scope, IP) and (scope, email) live in the
+Django cache; if the cache backend is unavailable they fall back to a
+per-process dict, so a broken cache never blocks bookings. Limits are
+configured in RESV_RATE_LIMITS as {scope: {"ip": (burst, per_seconds),
+"email": ...}}: at most `burst` requests in any `per_seconds`.
+
+Counting uses cache.add() + cache.incr() only, so parallel requests (a bot
+flood, several gunicorn workers) each get their own count instead of all
+reading the same state. incr() is atomic on redis, memcached and locmem;
+FileBasedCache implements it as get + set, so there the limit is
+best-effort under concurrency.
+
+Idempotency: `claim(scope, *parts)` returns a key for an identical
+submission. The first request gets the key and stores its response with
+`remember()`; repeats inside RESV_IDEMPOTENCY_SECONDS replay that response
+instead of creating another reservation / session / email.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    "magic_link": {"ip": (10, 600), "email": (3, 600)},
+    "reservation": {"ip": (10, 600), "email": (5, 3600)},
+}
+
+_PENDING = "__pending__"
+
+_fallback: dict[str, tuple[int, float]] = {}  # window key -> (count, expires at)
+_fallback_lock = threading.Lock()
+
+
+def client_ip(request) -> str:
+    """
+    Client address. With RESV_RATELIMIT_TRUSTED_PROXIES = n the n-th entry
+    from the right of X-Forwarded-For is used (entries further left can be
+    forged by the client).
+    """
+    proxies = getattr(settings, "RESV_RATELIMIT_TRUSTED_PROXIES", 0)
+    if proxies:
+        forwarded = [p.strip() for p in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if p.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "") or "unknown"
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _count_cache(key: str, previous_key: str, ttl: int, delta: int) -> tuple[int, int]:
+    """
+    Add `delta` to the current window's counter; returns (current, previous).
+    """
+    if delta > 0:
+        cache.add(key, 0, ttl)
+        try:
+            current = cache.incr(key, delta)
+        except ValueError:  # evicted between add() and incr()
+            cache.add(key, 0, ttl)
+            current = cache.incr(key, delta)
+    else:
+        current = cache.decr(key, -delta)
+    return current, cache.get(previous_key, 0)
+
+
+def _count_fallback(key: str, previous_key: str, ttl: int, delta: int, now: float) -> tuple[int, int]:
+    with _fallback_lock:
+        if len(_fallback) > 10000:
+            for stale in [k for k, (_n, expires) in _fallback.items() if expires < now]:
+                del _fallback[stale]
+        count, expires = _fallback.get(key, (0, now + ttl))
+        _fallback[key] = (count + delta, expires)
+        previous, previous_expires = _fallback.get(previous_key, (0, now))
+        return count + delta, previous if previous_expires >= now else 0
+
+
+def hit(scope: str, kind: str, ident: str) -> float:
+    """
+    Count one request against the (scope, kind, ident) limit. Returns 0 if
+    the request is allowed, otherwise the seconds until it would be.
+
+    The previous fixed window is weighted by how much of it still overlaps
+    the sliding window ending now. Refused requests are not counted.
+    """
+    limits = getattr(settings, "RESV_RATE_LIMITS", DEFAULT_LIMITS).get(scope, {})
+    if kind not in limits or not ident:
+        return 0
+    burst, per_seconds = limits[kind]
+    now = time.time()
+    window = int(now // per_seconds)
+    base = f"resv:rl:{scope}:{kind}:{_digest(ident)}"
+    key, previous_key = f"{base}:{window}", f"{base}:{window - 1}"
+    ttl = int(2 * per_seconds) + 1  # still read as the previous window
+    overlap = 1 - (now % per_seconds) / per_seconds
+
+    def count(delta):
+        try:
+            return _count_cache(key, previous_key, ttl, delta)
+        except Exception:
+            logger.warning("Rate-limit cache unavailable, using in-process counters", exc_info=True)
+            return _count_fallback(key, previous_key, ttl, delta, now)
+
+    current, previous = count(1)
+    if current + previous * overlap <= burst:
+        return 0
+
+    count(-1)
+    if current <= burst and previous:
+        # the previous window's weight has to fall by the excess
+        wait = per_seconds * (current + previous * overlap - burst) / previous
+    else:
+        wait = per_seconds - now % per_seconds
+    return max(wait, 0.001)
+
+
+def check(request, scope: str, *, email: str = "") -> float:
+    """
+    Apply the IP and (if given) email buckets of `scope`. Returns 0 if the
+    request may proceed, else the Retry-After in seconds.
+    """
+    wait = hit(scope, "ip", client_ip(request))
+    if not wait and email:
+        wait = hit(scope, "email", email.strip().lower())
+    return wait
+
+
+# =========================
+# Idempotency
+# =========================
+def _idem_seconds() -> int:
+    return getattr(settings, "RESV_IDEMPOTENCY_SECONDS", 60)
+
+
+def claim(scope: str, *parts):
+    """
+    Claim an identical-submission key. Returns (key, None) for the first
+    request, (None, stored) for a repeat: `stored` is the remembered
+    response payload, or None while the first request is still running.
+    """
+    key = f"resv:idem:{scope}:{_digest(*parts)}"
+    try:
+        if cache.add(key, _PENDING, _idem_seconds()):
+            return key, None
+        stored = cache.get(key)
+    except Exception:
+        return key, None  # no cache → no dedup, but never block
+    if stored is None:
+        return key, None  # expired between add() and get()
+    return None, (None if stored == _PENDING else stored)
+
+
+def remember(key: str | None, payload) -> None:
+    if key:
+        try:
+            cache.set(key, payload, _idem_seconds())
+        except Exception:
+            pass
+
+
+def release(key: str | None) -> None:
+    """
+    Forget a claim whose request failed, so the user can submit again.
+    """
+    if key:
+        try:
+            cache.delete(key)
+        except Exception:
+            pass
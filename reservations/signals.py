@@ -0,0 +1,157 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import auth, availability, catalogue, changefeed, events, occupancy
+from .models import BlockedDayModel, DaySlotBlockModel, EmailSessionModel, ReservationModel, TimeSlotModel
+
+
+# =========================
+# Reservations → occupancy ledger
+# =========================
+def _touches_ledger(update_fields) -> bool:
+    return update_fields is None or bool(occupancy.LEDGER_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=ReservationModel)
+def reservation_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches_ledger(update_fields):
+        return
+    instance._ledger_before = occupancy.stored_ledger_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=ReservationModel)
+def reservation_post_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches_ledger(update_fields):
+        return
+    before = getattr(instance, "_ledger_before", None)
+    after = occupancy.ledger_state(instance)
+    occupancy.apply_reservation_change(before, after)
+    instance._ledger_before = None
+    if before != after:
+        availability.invalidate()
+
+
+@receiver(post_delete, sender=ReservationModel)
+def reservation_post_delete(sender, instance, **kwargs):
+    occupancy.apply_reservation_change(occupancy.ledger_state(instance), None)
+    availability.invalidate()
+
+
+# =========================
+# Slot blocks → occupancy ledger
+# =========================
+def _block_key(block):
+    if not block.blocked_day_id or not block.slot_id:
+        return None
+    date = (
+        BlockedDayModel.objects
+        .filter(pk=block.blocked_day_id)
+        .values_list("date", flat=True)
+        .first()
+    )
+    return (date, block.slot_id) if date else None
+
+
+@receiver(pre_save, sender=DaySlotBlockModel)
+def slot_block_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._ledger_before = None
+        return
+    old = DaySlotBlockModel.objects.filter(pk=instance.pk).first()
+    instance._ledger_before = _block_key(old) if old else None
+
+
+@receiver(post_save, sender=DaySlotBlockModel)
+def slot_block_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_ledger_before", None)
+    after = _block_key(instance)
+    for key in {before, after} - {None}:
+        occupancy.refresh_blocked_seats(*key)
+    if after and instance.is_closed:
+        # fail the claim of bookings that checked before the slot closed
+        occupancy.touch(after[0], [after[1]])
+    availability.invalidate()
+
+
+@receiver(pre_delete, sender=DaySlotBlockModel)
+def slot_block_pre_delete(sender, instance, **kwargs):
+    instance._ledger_before = _block_key(instance)
+
+
+@receiver(post_delete, sender=DaySlotBlockModel)
+def slot_block_post_delete(sender, instance, **kwargs):
+    key = getattr(instance, "_ledger_before", None)
+    if key:
+        occupancy.refresh_blocked_seats(*key)
+    availability.invalidate()
+
+
+@receiver(pre_save, sender=BlockedDayModel)
+def blocked_day_pre_save(sender, instance, raw=False, **kwargs):
+    instance._ledger_old_date = None
+    if raw or not instance.pk:
+        return
+    instance._ledger_old_date = (
+        BlockedDayModel.objects
+        .filter(pk=instance.pk)
+        .values_list("date", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=BlockedDayModel)
+def blocked_day_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    availability.invalidate()
+    if instance.is_closed:
+        # fail the claim of bookings that checked before the day closed
+        occupancy.touch(instance.date, TimeSlotModel.objects.values_list("pk", flat=True))
+
+    old_date = getattr(instance, "_ledger_old_date", None)
+    if not old_date or old_date == instance.date:
+        return
+    # The day was moved: its slot blocks now apply to a different date.
+    for slot_id in instance.slot_blocks.values_list("slot_id", flat=True):
+        occupancy.refresh_blocked_seats(old_date, slot_id)
+        occupancy.refresh_blocked_seats(instance.date, slot_id)
+
+
+@receiver(post_delete, sender=BlockedDayModel)
+def blocked_day_post_delete(sender, instance, **kwargs):
+    availability.invalidate()
+
+
+# =========================
+# Slot definitions → slot catalogue / availability cache
+# =========================
+@receiver(post_save, sender=TimeSlotModel)
+@receiver(post_delete, sender=TimeSlotModel)
+def timeslot_changed(sender, instance, **kwargs):
+    catalogue.invalidate()
+    availability.invalidate()
+
+
+# =========================
+# Magic-link sessions → verification cache
+# =========================
+@receiver(post_save, sender=EmailSessionModel)
+@receiver(post_delete, sender=EmailSessionModel)
+def email_session_changed(sender, instance, **kwargs):
+    auth.invalidate(instance.token_hash)
+
+
+# =========================
+# Reservations → dashboard change feed / live events
+# =========================
+@receiver(post_save, sender=ReservationModel)
+def reservation_change_logged(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        changefeed.record(instance.pk, events.reservation_event(instance, created, update_fields))
+
+
+@receiver(post_delete, sender=ReservationModel)
+def reservation_delete_logged(sender, instance, **kwargs):
+    changefeed.record(instance.pk, "deleted")
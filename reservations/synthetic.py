@@ -0,0 +1,363 @@
+"""
+Synthetic reservation history (manage.py generate_synthetic_data).
+
+Fills the database with production-sized tables for benchmarks and query
+plan checks:
+
+- blocked days: whole days closed, plus days where a slot is closed or
+  loses seats (DaySlotBlockModel);
+- reservations for every day from `years` back to `future_days` ahead,
+  with weekday/seasonal demand. Each (date, slot) is filled up to a random
+  share of its capacity minus blocked seats, so none is overbooked. Extra
+  parties are cancelled, and past parties are marked arrived unless they
+  were no-shows;
+- magic-link sessions (created, expired, some revoked) and
+  qrflow.Feedback rows over the same period.
+
+Everything is written with bulk_create in chunks, so model save() and the
+signals do not run. The code therefore fills in what they would have
+done: phone_digits, realistic created_at/updated_at, and an
+occupancy.rebuild() of the covered dates at the end.
+
+Synthetic rows use @synthetic.invalid addresses and "Synthetic" reasons.
+delete() removes them again.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from qrflow.models import Feedback, Location as FeedbackLocation
+
+from . import occupancy
+from .models import (
+    BlockedDayModel,
+    DaySlotBlockModel,
+    EmailSessionModel,
+    ReservationModel,
+    TimeSlotModel,
+    digits_only,
+)
+
+EMAIL_DOMAIN = "synthetic.invalid"
+REASON_PREFIX = "Synthetic"
+
+FIRST_NAMES = ("Anna", "Ben", "Chen", "Dana", "Emil", "Fatma", "Greta", "Hao", "Ines", "Jonas",
+               "Klara", "Leon", "Mia", "Noah", "Olga", "Paul", "Qing", "Rosa", "Sven", "Wei")
+LAST_NAMES = ("Schmidt", "Müller", "Wang", "Weber", "Li", "Fischer", "Becker", "Zhang", "Wolf",
+              "Klein", "Neumann", "Liu", "Hoffmann", "Krüger", "Chen", "Braun")
+MESSAGES = ("Kinderstuhl bitte", "Fensterplatz, wenn möglich", "Geburtstag", "Vegetarisch",
+            "Glutenfrei", "Wir kommen evtl. 10 Minuten später")
+FEEDBACK = ("Essen kam kalt an.", "Lange Wartezeit auf die Rechnung.", "Zu laut im Gastraum.",
+            "Reservierung wurde nicht gefunden.", "Portion zu klein.", "Service war unfreundlich.")
+USER_AGENTS = ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X)",
+               "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+               "Mozilla/5.0 (Linux; Android 14; Pixel 8)")
+
+# party size -> weight
+PARTY_SIZES = {1: 4, 2: 40, 3: 14, 4: 20, 5: 7, 6: 7, 7: 3, 8: 3, 10: 2}
+# Monday .. Sunday
+WEEKDAY_DEMAND = (0.6, 0.7, 0.8, 0.9, 1.2, 1.3, 1.0)
+
+
+@dataclass
+class Options:
+    years: float = 3
+    future_days: int = 90
+    occupancy: float = 0.65       # mean share of the free seats booked
+    cancel_rate: float = 0.08     # cancelled parties, on top of the booked ones
+    no_show_rate: float = 0.06
+    closed_days_per_year: int = 8
+    slot_blocks_per_year: int = 40
+    sessions_per_day: float = 25
+    feedback_per_day: float = 1.5
+    chunk_size: int = 5000
+    seed: int = 0
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create write the given created_at/updated_at instead of now().
+    """
+    fields = [
+        f for model in models for f in model._meta.concrete_fields
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _aware(day, t: time) -> datetime:
+    return timezone.make_aware(datetime.combine(day, t), timezone.get_current_timezone())
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth; the means here are small
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _times(slot: TimeSlotModel) -> list[time]:
+    """Quarter-hour arrival times from slot start to 30 minutes before its end."""
+    start = slot.start_time.hour * 60 + slot.start_time.minute
+    end = slot.end_time.hour * 60 + slot.end_time.minute
+    if end <= start:
+        end = 24 * 60  # overnight slot: arrivals until midnight
+    last = max(end - 30, start)
+    return [time(m // 60, m % 60) for m in range(start, last + 1, 15)]
+
+
+class Generator:
+    def __init__(self, options: Options, slots, stdout=None):
+        self.o = options
+        self.rng = random.Random(options.seed)
+        self.slots = list(slots)
+        self.times = {s.id: _times(s) for s in self.slots}
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.today = timezone.localdate()
+        self.first = self.today - timedelta(days=round(options.years * 365))
+        self.last = self.today + timedelta(days=options.future_days)
+        self.guests = max(int(options.years * 365 * 8), 100)  # repeat customers
+
+    def days(self):
+        day = self.first
+        while day <= self.last:
+            yield day
+            day += timedelta(days=1)
+
+    def log(self, message: str) -> None:
+        if self.stdout:
+            self.stdout.write(message)
+
+    def _bulk(self, model, rows) -> int:
+        written = 0
+        for chunk in _chunked(rows, self.o.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.o.chunk_size)
+            written += len(chunk)
+        return written
+
+    # ---------- blocked days ----------
+    def blocked_days(self) -> dict:
+        """Create the blocked days; returns {(date, slot_id): (is_closed, seats)} plus closed dates under None."""
+        years = (self.last - self.first).days / 365
+        taken = set(BlockedDayModel.objects.filter(date__range=(self.first, self.last)).values_list("date", flat=True))
+        candidates = [d for d in self.days() if d not in taken]
+        wanted = round(years * (self.o.closed_days_per_year + self.o.slot_blocks_per_year))
+        picked = self.rng.sample(candidates, min(wanted, len(candidates)))
+        closed_share = self.o.closed_days_per_year / max(self.o.closed_days_per_year + self.o.slot_blocks_per_year, 1)
+
+        days = [
+            BlockedDayModel(
+                date=d,
+                is_closed=self.rng.random() < closed_share,
+                reason=f"{REASON_PREFIX}: {'Betriebsferien' if self.rng.random() < 0.5 else 'Veranstaltung'}",
+                created_at=_aware(d - timedelta(days=self.rng.randint(1, 60)), time(10)),
+            )
+            for d in picked
+        ]
+        with explicit_timestamps(BlockedDayModel, DaySlotBlockModel):
+            self._bulk(BlockedDayModel, days)
+            stored = (
+                BlockedDayModel.objects
+                .filter(date__range=(self.first, self.last), reason__startswith=f"{REASON_PREFIX}:")
+                .exclude(date__in=taken)
+                .values_list("pk", "date", "is_closed")
+            )
+
+            blocks, result = [], {}
+            for pk, d, is_closed in stored:
+                if is_closed:
+                    result[(d, None)] = (True, 0)
+                    continue
+                for slot in self.rng.sample(self.slots, self.rng.randint(1, len(self.slots))):
+                    slot_closed = self.rng.random() < 0.3
+                    seats = 0 if slot_closed else self.rng.randint(1, max(slot.capacity // 2, 1))
+                    blocks.append(DaySlotBlockModel(
+                        blocked_day_id=pk, slot=slot, blocked_seats=seats, is_closed=slot_closed,
+                        reason=f"{REASON_PREFIX}: Gruppe", created_at=_aware(d, time(9)),
+                    ))
+                    result[(d, slot.id)] = (slot_closed, seats)
+            self._bulk(DaySlotBlockModel, blocks)
+
+        self.log(f"blocked days: {len(days)} ({sum(b.is_closed for b in days)} closed), slot blocks: {len(blocks)}")
+        return result
+
+    # ---------- reservations ----------
+    def _reservation(self, day, slot, party_size, cancelled: bool) -> ReservationModel:
+        rng = self.rng
+        guest = rng.randrange(self.guests)
+        first, last = FIRST_NAMES[guest % len(FIRST_NAMES)], LAST_NAMES[guest // len(FIRST_NAMES) % len(LAST_NAMES)]
+        phone = f"+49 30 {guest:07d}"
+        at = rng.choice(self.times[slot.id])
+        starts = _aware(day, at)
+
+        lead = timedelta(minutes=int(rng.expovariate(1 / (60 * 24 * 7))))  # mean: a week ahead
+        created = min(starts - lead, self.now - timedelta(minutes=rng.randint(1, 600)))
+        r = ReservationModel(
+            name=f"{first} {last}",
+            email=f"guest{guest}@{EMAIL_DOMAIN}",
+            phone=phone,
+            phone_digits=digits_only(phone),  # set by save(), which bulk_create skips
+            date=day,
+            slot=slot,
+            time=at,
+            party_size=party_size,
+            message=rng.choice(MESSAGES) if rng.random() < 0.1 else "",
+            created_at=created,
+            updated_at=created,
+        )
+        if cancelled:
+            r.status = ReservationModel.Status.CANCELLED
+            r.cancelled_at = min(created + (starts - created) * rng.random(), self.now)
+            r.cancelled_by = "customer" if rng.random() < 0.8 else "staff"
+            r.cancellation_note = f"{REASON_PREFIX} cancellation"
+            r.updated_at = r.cancelled_at
+        elif starts < self.now and rng.random() >= self.o.no_show_rate:
+            r.is_arrived = True
+            r.arrival_marked_at = starts + timedelta(minutes=rng.randint(-10, 25))
+            r.updated_at = r.arrival_marked_at
+        return r
+
+    def _reservations(self, blocks, existing):
+        rng = self.rng
+        sizes, weights = list(PARTY_SIZES), list(PARTY_SIZES.values())
+        for day in self.days():
+            if (day, None) in blocks:
+                continue
+            season = 1 + 0.15 * math.sin((day.timetuple().tm_yday - 80) / 365 * 2 * math.pi)
+            demand = self.o.occupancy * WEEKDAY_DEMAND[day.weekday()] * season
+            for slot in self.slots:
+                closed, blocked = blocks.get((day, slot.id), (False, 0))
+                if closed:
+                    continue
+                free = max(slot.capacity - blocked - existing.get((day, slot.id), 0), 0)
+                target = free * min(max(rng.gauss(demand, 0.15), 0), 1)
+
+                booked = 0
+                while True:
+                    size = rng.choices(sizes, weights)[0]
+                    if booked + size > target:
+                        break
+                    booked += size
+                    yield self._reservation(day, slot, size, cancelled=False)
+                for _ in range(_poisson(rng, max(booked, 1) / 3 * self.o.cancel_rate)):
+                    yield self._reservation(day, slot, rng.choices(sizes, weights)[0], cancelled=True)
+
+    def reservations(self, blocks) -> int:
+        existing = {
+            key: values["booked_seats"]
+            for key, values in occupancy.compute_expected(self.first, self.last).items()
+        }
+        with explicit_timestamps(ReservationModel):
+            written = self._bulk(ReservationModel, self._reservations(blocks, existing))
+        self.log(f"reservations: {written}")
+        return written
+
+    # ---------- sessions / feedback ----------
+    def _sessions(self):
+        rng = self.rng
+        n = 0
+        for day in self.days():
+            if day > self.today:
+                break
+            for _ in range(_poisson(rng, self.o.sessions_per_day)):
+                n += 1
+                created = _aware(day, time(rng.randint(8, 23), rng.randint(0, 59)))
+                yield EmailSessionModel(
+                    email=f"guest{rng.randrange(self.guests)}@{EMAIL_DOMAIN}",
+                    token_hash=hashlib.sha256(f"synthetic:{self.o.seed}:{n}:{rng.random()}".encode()).hexdigest(),
+                    created_at=created,
+                    expires_at=created + timedelta(days=30),
+                    user_agent=rng.choice(USER_AGENTS),
+                    ip_prefix=f"192.0.2.{rng.randint(1, 254)}",
+                    is_revoked=rng.random() < 0.1,
+                )
+
+    def _feedback(self, slugs):
+        rng = self.rng
+        for day in self.days():
+            if day > self.today:
+                break
+            for _ in range(_poisson(rng, self.o.feedback_per_day)):
+                yield Feedback(
+                    location_slug=rng.choice(slugs),
+                    what_went_wrong=rng.choice(FEEDBACK),
+                    email=f"guest{rng.randrange(self.guests)}@{EMAIL_DOMAIN}",  # also how delete() finds it
+                    created_at=_aware(day, time(rng.randint(12, 23), rng.randint(0, 59))),
+                )
+
+    def sessions_and_feedback(self) -> None:
+        slugs = list(FeedbackLocation.objects.values_list("slug", flat=True)) or ["ming-dynastie"]
+        with explicit_timestamps(EmailSessionModel, Feedback):
+            sessions = self._bulk(EmailSessionModel, self._sessions())
+            feedback = self._bulk(Feedback, self._feedback(slugs))
+        self.log(f"sessions: {sessions}, feedback: {feedback}")
+
+    def run(self) -> None:
+        blocks = self.blocked_days()
+        self.reservations(blocks)
+        self.sessions_and_feedback()
+        rows = occupancy.rebuild(self.first, self.last)
+        self.log(f"occupancy ledger rebuilt: {rows} rows ({self.first} .. {self.last})")
+
+
+def _raw_delete(model, column: str, value: str) -> int:
+    # plain DELETE: QuerySet.delete() would send a signal per row
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {connection.ops.quote_name(column)} LIKE %s", [value])
+        return cursor.rowcount
+
+
+@transaction.atomic
+def delete() -> dict:
+    """
+    Remove all synthetic rows and rebuild the ledger of the dates they covered.
+    """
+    pattern = f"%@{EMAIL_DOMAIN}"
+    span = ReservationModel.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").aggregate(first=Min("date"), last=Max("date"))
+    deleted = {
+        "reservations": _raw_delete(ReservationModel, "email", pattern),
+        "sessions": _raw_delete(EmailSessionModel, "email", pattern),
+        "feedback": _raw_delete(Feedback, "email", pattern),
+        # few rows, and their slot blocks cascade through the ORM
+        "blocked days": (
+            BlockedDayModel.objects.filter(reason__startswith=f"{REASON_PREFIX}:")
+            .delete()[1].get(BlockedDayModel._meta.label, 0)
+        ),
+    }
+    if span["first"]:
+        occupancy.rebuild(span["first"], span["last"])
+    return deleted
@@ -1,3 +1,192 @@
-from django.test import TestCase
+import threading
+import time as clock
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core_settings.models import SiteSettings
+from . import booking, loadtest, outbox, ratelimit
+from .gas_client import CircuitOpenError
+from .models import (
+    BlockedDayModel, EmailOutboxModel, ReservationChangeModel, ReservationModel, TimeSlotModel,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def make_dinner_slot(capacity=40):
+    SiteSettings.objects.update_or_create(pk=1, defaults={"opening_time": time(11), "closing_time": time(22)})
+    return TimeSlotModel.objects.create(
+        slug="dinner", label="Dinner", start_time=time(17), end_time=time(22), capacity=capacity,
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RESV_RATE_LIMITS={})
+class CreateReservationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot = make_dinner_slot()
+
+    def post(self, party_size):
+        return self.client.post(reverse("reservations:create"), {
+            "name": "Test Guest",
+            "email": "guest@example.com",
+            "phone": "030000000",
+            "date": (timezone.localdate() + timedelta(days=30)).isoformat(),
+            "time": "19:00",
+            "party_size": party_size,
+            "message": "",
+        }, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def test_oversized_group_can_be_resubmitted(self):
+        for _ in range(2):
+            response = self.post(12)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["code"], "GROUP_TOO_LARGE")
+        self.assertFalse(ReservationModel.objects.exists())
+
+    def test_identical_resubmission_is_answered_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.post(4)
+        second = self.post(4)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(ReservationModel.objects.count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BookingServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot = make_dinner_slot()
+        self.date = timezone.localdate() + timedelta(days=30)
+
+    def reservation(self, party_size=2):
+        return ReservationModel(
+            name="Test Guest", email="guest@example.com", phone="030000000",
+            date=self.date, time=time(19), party_size=party_size, slot=self.slot,
+        )
+
+    def test_day_closed_between_check_and_claim(self):
+        check_room = booking._check_room
+
+        def check_then_close_day(*args):
+            check_room(*args)
+            BlockedDayModel.objects.get_or_create(date=self.date, defaults={"is_closed": True})
+
+        with mock.patch.object(booking, "_check_room", side_effect=check_then_close_day):
+            with self.assertRaises(booking.BookingError) as raised:
+                booking.save(self.reservation())
+        self.assertEqual(raised.exception.code, "DAY_CLOSED")
+        self.assertFalse(ReservationModel.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["ming-dynastie.de"])
+class BookingLoadTests(TransactionTestCase):
+    """
+    Concurrency check through the real views: the same harness as
+    `manage.py benchmark_bookings`, small enough for the test suite.
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("threads on an in-memory SQLite database fail with 'table is locked'; "
+                          "set DATABASES['default']['TEST']['NAME'] to a file")
+        cache.clear()
+        self.slot = make_dinner_slot(capacity=12)
+
+    def test_concurrent_bookings_never_exceed_capacity(self):
+        stats = loadtest.run(workers=6, operations=60, slots=[self.slot], sample_interval=0.05)
+
+        self.assertGreater(stats.count("ok", kinds=("create",)), 0)
+        self.assertGreater(stats.count("rejected"), 0)  # 60 requests for 12 seats
+        self.assertEqual(stats.count("error"), 0)
+        self.assertEqual(stats.violations, {})
+        self.assertEqual(stats.drift, [])
+
+
+class OutboxTests(TestCase):
+    def queue(self, n):
+        EmailOutboxModel.objects.bulk_create(
+            EmailOutboxModel(kind="confirmation", to_email=f"g{i}@example.com", payload={"to": f"g{i}@example.com"})
+            for i in range(n)
+        )
+
+    def test_open_circuit_defers_instead_of_failing(self):
+        self.queue(3)
+        with mock.patch.object(outbox, "post_to_gas", side_effect=CircuitOpenError(clock.time() + 60)):
+            result = outbox.process_batch()
+        self.assertEqual(result, {"claimed": 3, "sent": 0, "deferred": 3, "failed": 0})
+        self.assertEqual(set(EmailOutboxModel.objects.values_list("status", "attempts")), {("pending", 0)})
+
+    def test_failed_and_sent_are_counted_apart(self):
+        self.queue(2)
+        with mock.patch.object(outbox, "post_to_gas", side_effect=[{"ok": True}, RuntimeError("GAS down")]):
+            result = outbox.process_batch()
+        self.assertEqual(result, {"claimed": 2, "sent": 1, "deferred": 0, "failed": 1})
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RESV_RATE_LIMITS={"reservation": {"ip": (5, 600)}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def hit_in_parallel(self, n=20):
+        start = threading.Barrier(n)
+        waits = []
+
+        def request():
+            start.wait()
+            waits.append(ratelimit.hit("reservation", "ip", "198.51.100.7"))
+
+        threads = [threading.Thread(target=request) for _ in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return waits
+
+    def test_parallel_hits_respect_the_limit(self):
+        real_get = LocMemCache.get
+
+        def slow_get(self, *args, **kwargs):
+            value = real_get(self, *args, **kwargs)
+            clock.sleep(0.01)  # let the other requests read too, as under a real flood
+            return value
+
+        # on the class: every thread has its own cache instance
+        with mock.patch.object(LocMemCache, "get", slow_get):
+            waits = self.hit_in_parallel()
+        self.assertEqual(sum(1 for w in waits if not w), 5)
+        self.assertTrue(all(w > 0 for w in waits if w))
+
+    def test_parallel_hits_respect_the_limit_without_cache(self):
+        ratelimit._fallback.clear()
+        with mock.patch.object(ratelimit, "_count_cache", side_effect=ConnectionError):
+            waits = self.hit_in_parallel()
+        self.assertEqual(sum(1 for w in waits if not w), 5)
+
+
+class ChangeFeedTests(TestCase):
+    def test_unmarking_an_arrival_is_an_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            slot = make_dinner_slot()
+            reservation = ReservationModel.objects.create(
+                name="Test Guest", email="guest@example.com", phone="030000000",
+                date=timezone.localdate(), time=time(19), party_size=2, slot=slot,
+            )
+        for arrived in (True, False):
+            reservation.is_arrived = arrived
+            with self.captureOnCommitCallbacks(execute=True):
+                reservation.save(update_fields=["is_arrived", "arrival_marked_at"])
+
+        events = ReservationChangeModel.objects.filter(reservation_id=reservation.pk).order_by("id")
+        self.assertEqual(list(events.values_list("event", flat=True)), ["created", "arrived", "updated"])
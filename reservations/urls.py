@@ -5,6 +5,7 @@ app_name = "reservations"
 
 urlpatterns = [
     path("create/", views.create_reservation, name="create"),
+    path("availability/", views.availability_json, name="availability"),
 
     # magic link auth
     path("start/", views.start_magic_login, name="start"),
@@ -1,12 +1,14 @@
 from __future__ import annotations
 import json
+import logging
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_protect
 
-from core_settings.models import SiteSettings
+from core_settings.cache import get_site_settings
 from .models import DaySlotBlockModel, ReservationModel, TimeSlotModel
 from .forms import ReservationCreateForm
+from . import availability, booking, ratelimit
 from django.views.decorators.http import require_GET
 from datetime import datetime, timedelta
 from urllib.parse import quote
@@ -18,16 +20,36 @@ from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_GET, require_http_methods
 from django.template.loader import render_to_string
-from .auth import get_verified_email
-from .email_sender import send_magic_link_via_gas, send_reservation_confirmation_via_gas
+from .auth import get_verified_email, revoke_request_session
+from .outbox import queue_magic_link, queue_reservation_confirmation
 from .models import EmailSessionModel, ReservationModel
-from django.db.models import Sum
 from django.db import transaction
 from reservations.models import BlockedDayModel, DaySlotBlockModel, TimeSlotModel, ReservationModel
 
+logger = logging.getLogger(__name__)
+
+
+def _rate_limited(payload: dict, wait: float) -> JsonResponse:
+    resp = JsonResponse(payload, status=429)
+    resp["Retry-After"] = str(max(int(wait + 0.999), 1))
+    return resp
+
+
 @require_POST
 @csrf_protect
 def create_reservation(request):
+    wait = ratelimit.check(request, "reservation", email=request.POST.get("email", ""))
+    if wait:
+        return _rate_limited({
+            "ok": False,
+            "code": "RATE_LIMITED",
+            "errors": {},
+            "popup": {
+                "title": "Zu viele Anfragen",
+                "text": "Bitte warten Sie einen Moment und versuchen Sie es dann erneut.",
+            },
+        }, wait)
+
     form = ReservationCreateForm(request.POST)
 
     if form.is_valid():
@@ -50,109 +72,54 @@ def create_reservation(request):
                 }
             }, status=400)
 
-        try:
-            with transaction.atomic():
-
-                # 1️⃣ Lock slot row (prevents race conditions)
-                locked_slot = (
-                    TimeSlotModel.objects
-                    .select_for_update()
-                    .get(pk=reservation.slot_id, is_active=True)
-                )
-
-                # 2️⃣ Get per-day slot block
-                # 2️⃣ Load blocked-day info for this reservation date
-                blocked_day = (
-                    BlockedDayModel.objects
-                    .prefetch_related("slot_blocks")
-                    .filter(date=reservation.date,is_closed=True)
-                    .first()
-                )
-
-                if blocked_day and blocked_day.is_closed:
-                    raise ValueError({
-                        "code": "DAY_CLOSED",
-                        "title": "Tag nicht verfügbar",
-                        "text": "An diesem Tag sind keine Reservierungen möglich."
-                    })
-
-                block = None
-                if blocked_day:
-                    block = blocked_day.slot_blocks.filter(slot_id=reservation.slot_id).first()
-                print(f'blockblock {block}')
-                if block and block.is_closed:
-                    raise ValueError({
-                        "code": "SLOT_CLOSED",
-                        "title": "Zeitraum nicht verfügbar",
-                        "text": "Dieser Zeitraum ist an diesem Tag nicht verfügbar."
-                    })
-
-                blocked_seats = block.blocked_seats if block else 0
-                effective_capacity = max(locked_slot.capacity - blocked_seats, 0)
-
-                # 3️⃣ Calculate already booked seats
-                booked = (
-                    ReservationModel.objects
-                    .filter(
-                        date=reservation.date,
-                        slot_id=reservation.slot_id,
-                        slot__is_active=True
-                    )
-                    .exclude(status=ReservationModel.Status.CANCELLED)
-                    .aggregate(total=Sum("party_size"))["total"] or 0
-                )
-
-                requested = reservation.party_size
-                available = max(effective_capacity - booked, 0)
-
-                # 4️⃣ First booking exceeds total capacity
-                if booked == 0 and requested > effective_capacity:
-                    raise ValueError({
-                        "code": "FIRST_BOOKING_EXCEEDS",
-                        "title": "Kapazität überschritten",
-                        "text": (
-                            f"Für diesen Zeitraum stehen insgesamt "
-                            f"{effective_capacity} Plätze zur Verfügung. "
-                            f"Sie haben {requested} Personen ausgewählt."
-                        )
-                    })
-
-                # 5️⃣ Not enough remaining seats
-                if requested > available:
-                    raise ValueError({
-                        "code": "SLOT_FULL",
-                        "title": "Nicht genügend Plätze verfügbar",
-                        "text": (
-                            f"Es sind nur noch {available} Plätze verfügbar. "
-                            f"Sie haben {requested} Personen ausgewählt."
-                        )
-                    })
-
-                # 6️⃣ Save reservation
-                reservation.save()
-                session, raw_token = EmailSessionModel.create_for_email(
-                    reservation.email.strip().lower(),
-                    days_valid=30,
-                    request=request,
-                )
+        # Same guest, same booking submitted again (double click, bot replay)
+        idem_key, previous = ratelimit.claim(
+            "reservation",
+            reservation.email.strip().lower(), reservation.name.strip().lower(),
+            reservation.date, reservation.time, reservation.party_size,
+        )
+        if idem_key is None:
+            if previous is not None:
+                return JsonResponse(previous)
+            return JsonResponse({
+                "ok": False,
+                "code": "DUPLICATE_PENDING",
+                "errors": {},
+                "popup": {
+                    "title": "Reservierung wird bearbeitet",
+                    "text": "Ihre Reservierung wird bereits bearbeitet. Bitte einen Moment Geduld.",
+                },
+            }, status=409)
+
+        def send_confirmation(reservation):
+            session, raw_token = EmailSessionModel.create_for_email(
+                reservation.email.strip().lower(),
+                days_valid=30,
+                request=request,
+            )
 
-                next_url = f"/?rid={reservation.pk}#my-reservations"
-                magic_url = request.build_absolute_uri(
-                    reverse("reservations:magic_login")
-                    + f"?token={raw_token}&next={quote(next_url, safe='/:?=#&')}"
-                )
-                send_reservation_confirmation_via_gas(
-                    to_email=reservation.email.strip().lower(),
-                    edit_cancel_url=magic_url,
-                    restaurant_name="Ming Dynastie Jannowitzbrücke",
-                    reservation_date=reservation.date.strftime("%d.%m.%Y"),
-                    reservation_time=reservation.time.strftime("%H:%M"),
-                    party_size=reservation.party_size,
-                    customer_name=reservation.name,
-                )
+            next_url = f"/?rid={reservation.pk}#my-reservations"
+            magic_url = request.build_absolute_uri(
+                reverse("reservations:magic_login")
+                + f"?token={raw_token}&next={quote(next_url, safe='/:?=#&')}"
+            )
+            # queued in the same transaction; process_email_outbox delivers it
+            queue_reservation_confirmation(
+                to_email=reservation.email.strip().lower(),
+                edit_cancel_url=magic_url,
+                restaurant_name="Ming Dynastie Jannowitzbrücke",
+                reservation_date=reservation.date.strftime("%d.%m.%Y"),
+                reservation_time=reservation.time.strftime("%H:%M"),
+                party_size=reservation.party_size,
+                customer_name=reservation.name,
+            )
 
+        try:
+            # closed day/slot and capacity checks, race-free (see reservations.booking)
+            booking.save(reservation, on_save=send_confirmation)
 
-        except ValueError as e:
+        except booking.BookingError as e:
+            ratelimit.release(idem_key)
             error_payload = e.args[0] if e.args else {}
 
             return JsonResponse({
@@ -164,19 +131,24 @@ def create_reservation(request):
                     "text": error_payload.get("text", "Es ist ein Fehler aufgetreten.")
                 }
             }, status=400)
+        except Exception:
+            ratelimit.release(idem_key)
+            raise
 
         else:
-            return JsonResponse({
+            payload = {
                 "ok": True,
                 "message": "Danke für Ihre Reservierung. Sie erhalten alle Details per E-Mail."
-            })
+            }
+            ratelimit.remember(idem_key, payload)
+            return JsonResponse(payload)
 
     # 🔹 Normal form validation errors
     errors_json = form.errors.get_json_data()
     clean_errors = {field: [e["message"] for e in errs] for field, errs in errors_json.items()}
 
     popup = None
-    print(f'cleanedcleaned {clean_errors}')
+    logger.debug("Reservation form rejected: %s", clean_errors)
     # If time field has error → show popup
     if "time" in clean_errors:
         popup = {
@@ -195,6 +167,44 @@ def create_reservation(request):
         "popup": popup
     }, status=400)
 
+@require_GET
+def availability_json(request):
+    """
+    Remaining seats per active slot for a date range.
+    ?date=YYYY-MM-DD            → one day
+    ?from=YYYY-MM-DD&to=...     → inclusive range (max RESV_AVAILABILITY_MAX_DAYS)
+    ?from=YYYY-MM-DD&days=N     → N days starting at `from`
+    """
+    try:
+        single = request.GET.get("date")
+        if single:
+            date_from = date_to = datetime.strptime(single, "%Y-%m-%d").date()
+        else:
+            raw_from = request.GET.get("from")
+            date_from = (
+                datetime.strptime(raw_from, "%Y-%m-%d").date()
+                if raw_from else timezone.localdate()
+            )
+            if request.GET.get("to"):
+                date_to = datetime.strptime(request.GET["to"], "%Y-%m-%d").date()
+            else:
+                days = int(request.GET.get("days") or 1)
+                date_to = date_from + timedelta(days=max(days, 1) - 1)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "invalid_date"}, status=400)
+
+    if date_to < date_from:
+        return JsonResponse({"ok": False, "error": "invalid_range"}, status=400)
+    if (date_to - date_from).days + 1 > availability.max_days():
+        return JsonResponse({"ok": False, "error": "range_too_large"}, status=400)
+
+    return JsonResponse({
+        "ok": True,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "days": availability.get_seat_map(date_from, date_to),
+    })
+
 @require_http_methods(["GET", "POST"])
 def start_magic_login(request):
     """
@@ -208,26 +218,29 @@ def start_magic_login(request):
     if request.method == "GET":
         return render(request, "/#my-reservations", {"sent": False})
 
-    print(f'request.POST {request.POST}')
     email = (request.POST.get("email") or "").strip().lower()
     if not email:
         return render(request, "reservations/partials/start_modal.html", {"sent": False, "error": "Bitte E-Mail eingeben."})
 
-    days_valid = getattr(settings, "RESV_SESSION_DAYS_VALID", 30)
-    session, raw_token = EmailSessionModel.create_for_email(email, days_valid=days_valid, request=request)
-
-    magic_url = request.build_absolute_uri(reverse("reservations:magic_login") + f"?token={raw_token}")
-
-    try:
-        send_magic_link_via_gas(to_email=email, magic_url=magic_url)
-    except Exception:
-        # optional: revoke token if sending fails
-        session.is_revoked = True
-        session.save(update_fields=["is_revoked"])
-        return render(request, "reservations/partials/start_modal.html", {
+    if ratelimit.check(request, "magic_link", email=email):
+        resp = render(request, "reservations/partials/start_modal.html", {
             "sent": False,
-            "error": "E-Mail konnte nicht gesendet werden. Bitte später erneut versuchen."
+            "error": "Zu viele Anfragen. Bitte versuchen Sie es in einigen Minuten erneut.",
         })
+        resp.status_code = 429
+        return resp
+
+    # a second click within the idempotency window reuses the first link
+    idem_key, _ = ratelimit.claim("magic_link", email)
+    if idem_key is None:
+        return render(request, "reservations/partials/start_modal.html", {"sent": True, "email": email})
+
+    days_valid = getattr(settings, "RESV_SESSION_DAYS_VALID", 30)
+    with transaction.atomic():
+        session, raw_token = EmailSessionModel.create_for_email(email, days_valid=days_valid, request=request)
+        magic_url = request.build_absolute_uri(reverse("reservations:magic_login") + f"?token={raw_token}")
+        queue_magic_link(to_email=email, magic_url=magic_url)
+    ratelimit.remember(idem_key, True)
 
     return render(request, "reservations/partials/start_modal.html", {"sent": True, "email": email})
 
@@ -291,6 +304,7 @@ def resv_logout(request):
     """
     Deletes cookie.
     """
+    revoke_request_session(request)
     resp = redirect("/#my-reservations")
     cookie_name = getattr(settings, "RESV_SESSION_COOKIE_NAME", "ming_resv_session")
     resp.delete_cookie(cookie_name)
@@ -324,23 +338,32 @@ def send_magic_link_ajax(request):
     if not email:
         return JsonResponse({"ok": False, "error": "Bitte E-Mail eingeben."}, status=400)
 
-    # Create token session
-    session, raw = EmailSessionModel.create_for_email(email, days_valid=30, request=request)
+    wait = ratelimit.check(request, "magic_link", email=email)
+    if wait:
+        return _rate_limited({
+            "ok": False,
+            "error": "Zu viele Anfragen. Bitte versuchen Sie es in einigen Minuten erneut.",
+        }, wait)
 
-    # IMPORTANT: redirect back to homepage and reopen modal
-    next_url = "/#my-reservations"
-    magic_url = request.build_absolute_uri(
-        reverse("reservations:magic_login") + f"?token={raw}&next={next_url}"
-    )
+    html = render_to_string("reservations/partials/sent_modal.html", {"email": email}, request=request)
 
-    try:
-        send_magic_link_via_gas(to_email=email, magic_url=magic_url)
-    except Exception:
-        session.is_revoked = True
-        session.save(update_fields=["is_revoked"])
-        return JsonResponse({"ok": False, "error": "E-Mail konnte nicht gesendet werden. Bitte später erneut versuchen."}, status=500)
+    # a second click within the idempotency window reuses the first link
+    idem_key, _ = ratelimit.claim("magic_link", email)
+    if idem_key is None:
+        return JsonResponse({"ok": True, "html": html})
+
+    with transaction.atomic():
+        # Create token session
+        session, raw = EmailSessionModel.create_for_email(email, days_valid=30, request=request)
+
+        # IMPORTANT: redirect back to homepage and reopen modal
+        next_url = "/#my-reservations"
+        magic_url = request.build_absolute_uri(
+            reverse("reservations:magic_login") + f"?token={raw}&next={next_url}"
+        )
+        queue_magic_link(to_email=email, magic_url=magic_url)
+    ratelimit.remember(idem_key, True)
 
-    html = render_to_string("reservations/partials/sent_modal.html", {"email": email}, request=request)
     return JsonResponse({"ok": True, "html": html})
 
 
@@ -418,7 +441,7 @@ def edit_reservation_ajax(request, pk: int):
         return JsonResponse({"ok": False, "error": "not_found"}, status=404)
 
     # ✅ load settings (singleton pk=1)
-    settings_obj = SiteSettings.objects.filter(pk=1).first()
+    settings_obj = get_site_settings()
     opening_time = settings_obj.opening_time if settings_obj else None
     closing_time = settings_obj.closing_time if settings_obj else None
 
@@ -460,17 +483,24 @@ def update_reservation_ajax(request, pk: int):
     r = ReservationModel.objects.filter(pk=pk, email=email).first()
     if not r:
         return JsonResponse({"ok": False, "error": "not_found"}, status=404)
-    print(f'_can_edit_reservation {_can_edit_reservation(r)}')
     if not _can_edit_reservation(r):
+        logger.debug("Edit of reservation %s not allowed", r.pk)
         return JsonResponse({"ok": False, "error": "edit_not_allowed"}, status=403)
 
     form = ReservationCreateForm(request.POST, instance=r)
-    settings_obj = SiteSettings.objects.filter(pk=1).first()
+    settings_obj = get_site_settings()
     opening_time = settings_obj.opening_time if settings_obj else None
     closing_time = settings_obj.closing_time if settings_obj else None
 
+    if form.is_valid():
+        try:
+            # move/resize, race-free against other bookings (see reservations.booking)
+            booking.save(form.save(commit=False))
+        except booking.BookingError as e:
+            form.add_error("time", e.args[0]["text"])
+
     if not form.is_valid():
-        print("FORM ERRORS:", form.errors)
+        logger.debug("Update of reservation %s rejected: %s", r.pk, form.errors.get_json_data())
         html = render_to_string(
             "reservations/partials/edit_form.html",
             {"form": form, "reservation": r, "opening_time": opening_time, "closing_time": closing_time},
@@ -478,8 +508,6 @@ def update_reservation_ajax(request, pk: int):
         )
         return JsonResponse({"ok": False, "html": html}, status=400)
 
-    form.save()
-
     # return updated list (same template you already use)
     reservations = ReservationModel.objects.filter(email=email).order_by("-date", "-created_at")
     _prepare_reservation_flags(reservations)
@@ -519,47 +547,41 @@ def cancel_reservation_ajax(request, pk: int):
     if not email:
         return JsonResponse({"ok": False, "error": "not_authenticated"}, status=401)
 
-    with transaction.atomic():
-        r = (
-            ReservationModel.objects
-            .select_for_update()
-            .filter(pk=pk, email=email)
-            .first()
-        )
+    r = ReservationModel.objects.filter(pk=pk, email=email).first()
 
-        if not r:
-            return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+    if not r:
+        return JsonResponse({"ok": False, "error": "not_found"}, status=404)
 
-        if _is_cancelled(r):
-            reservations = ReservationModel.objects.filter(email=email).order_by("-date", "-created_at")
-            _prepare_reservation_flags(reservations)
+    if _is_cancelled(r):
+        reservations = ReservationModel.objects.filter(email=email).order_by("-date", "-created_at")
+        _prepare_reservation_flags(reservations)
 
-            html = render_to_string(
-                "reservations/partials/my_modal.html",
-                {"email": email, "reservations": reservations},
-                request=request
-            )
-            return JsonResponse({"ok": True, "html": html})
+        html = render_to_string(
+            "reservations/partials/my_modal.html",
+            {"email": email, "reservations": reservations},
+            request=request
+        )
+        return JsonResponse({"ok": True, "html": html})
 
-        if not _can_cancel_reservation(r):
-            return JsonResponse({
-                "ok": False,
-                "code": "cancel_not_allowed",
-                "popup": {
-                    "title": "Bitte Restaurant anrufen",
-                    "text": (
-                        "Diese Reservierung kann online nur bis "
-                        "<b>24 Stunden vorher</b> storniert werden.<br>"
-                        "Bitte rufen Sie das Restaurant direkt an."
-                    )
-                }
-            }, status=403)
+    if not _can_cancel_reservation(r):
+        return JsonResponse({
+            "ok": False,
+            "code": "cancel_not_allowed",
+            "popup": {
+                "title": "Bitte Restaurant anrufen",
+                "text": (
+                    "Diese Reservierung kann online nur bis "
+                    "<b>24 Stunden vorher</b> storniert werden.<br>"
+                    "Bitte rufen Sie das Restaurant direkt an."
+                )
+            }
+        }, status=403)
 
-        r.status = ReservationModel.Status.CANCELLED
-        r.cancelled_at = timezone.now()
-        r.cancelled_by = "customer"
-        r.cancellation_note = "Cancelled by customer via online reservation area."
-        r.save(update_fields=["status", "cancelled_at", "cancelled_by", "cancellation_note", "updated_at"])
+    try:
+        # releases the seats in the same transaction (see reservations.booking)
+        booking.cancel(r, by="customer", note="Cancelled by customer via online reservation area.")
+    except booking.BookingError as e:
+        return JsonResponse({"ok": False, "code": e.code, "popup": e.args[0]}, status=409)
 
     reservations = ReservationModel.objects.filter(email=email).order_by("-date", "-created_at")
     _prepare_reservation_flags(reservations)